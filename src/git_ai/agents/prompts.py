@@ -1,7 +1,12 @@
 """Prompt builders for AI agents."""
 
+from dataclasses import dataclass
+
 from git_ai.enums import CommitType
 
+PROMPT_VERSION = "2"
+"""Bump whenever the prompts change, so cached responses to older prompts are not reused."""
+
 LANGUAGE_NAMES: dict[str, str] = {
     "pt-BR": "Brazilian Portuguese",
     "es": "Spanish",
@@ -14,6 +19,24 @@ LANGUAGE_NAMES: dict[str, str] = {
 }
 
 
+@dataclass(frozen=True)
+class PromptParts:
+    """
+    A prompt split where providers can cache it.
+
+    The prefix holds the instructions, which only change with the config, so
+    providers can reuse it between calls; the suffix carries the per-call
+    diff or commit list.
+    """
+
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}\n\n{self.suffix}"
+
+
 def _build_language_instruction(language: str) -> str:
     if language == "en":
         return "8. Write the description and body in English."
@@ -51,13 +74,26 @@ def build_commit_prompt(
     body_preference: str = "auto",
 ) -> str:
     """Build the full prompt for commit message generation."""
+    return build_commit_prompt_parts(
+        diff, language, allowed_scopes, allowed_types, body_preference
+    ).text
+
+
+def build_commit_prompt_parts(
+    diff: str,
+    language: str = "en",
+    allowed_scopes: list[str] | None = None,
+    allowed_types: list[str] | None = None,
+    body_preference: str = "auto",
+) -> PromptParts:
+    """Build the commit prompt as cacheable instructions followed by the diff."""
     types_description = CommitType.to_prompt_description()
     language_instruction = _build_language_instruction(language)
     scope_instruction = _build_scope_instruction(allowed_scopes or [])
     types_instruction = _build_types_instruction(allowed_types or [])
     body_instruction = _build_body_instruction(body_preference)
 
-    return f"""You are a Git commit message expert that strictly follows the Conventional Commits specification (v1.0.0).
+    prefix = f"""You are a Git commit message expert that strictly follows the Conventional Commits specification (v1.0.0).
 
 Your task is to analyze a git diff and generate a precise, descriptive commit message.
 
@@ -93,13 +129,13 @@ Use this exact structure:
     "description": "string",
     "body": "string or empty string",
     "is_breaking_change": false
-}}
-
-Analyze this git diff and generate a commit message:
+}}"""
+    suffix = f"""Analyze this git diff and generate a commit message:
 
 ```diff
 {diff}
 ```"""
+    return PromptParts(prefix, suffix)
 
 
 def build_changelog_prompt(
@@ -107,12 +143,20 @@ def build_changelog_prompt(
     language: str = "en",
 ) -> str:
     """Build the full prompt for changelog generation."""
+    return build_changelog_prompt_parts(commits_prompt, language).text
+
+
+def build_changelog_prompt_parts(
+    commits_prompt: str,
+    language: str = "en",
+) -> PromptParts:
+    """Build the changelog prompt as cacheable instructions followed by the commits."""
     if language == "en":
         language_instruction = "Write in English."
     else:
         language_instruction = f"Write in the language identified by the code: {language}. Keep technical terms in English."
 
-    return f"""You are a changelog writer. You receive a list of git commits grouped by type and generate a clean, human-readable changelog.
+    prefix = f"""You are a changelog writer. You receive a list of git commits grouped by type and generate a clean, human-readable changelog.
 
 ## Rules:
 1. For each commit, write a concise, user-friendly description of what changed.
@@ -132,6 +176,61 @@ Use this exact structure:
             "entries": ["Description of change 1", "Description of change 2"]
         }}
     ]
-}}
+}}"""
+    return PromptParts(prefix, commits_prompt)
+
 
-{commits_prompt}"""
+def build_changelog_entries_prompt_parts(
+    commits_prompt: str,
+    language: str = "en",
+) -> PromptParts:
+    """Build the prompt that rewrites each commit as its own changelog entry."""
+    if language == "en":
+        language_instruction = "Write in English."
+    else:
+        language_instruction = f"Write in the language identified by the code: {language}. Keep technical terms in English."
+
+    prefix = f"""You are a changelog writer. You receive a list of git commits grouped by type, each one preceded by its id in square brackets, and rewrite every commit as a changelog entry.
+
+## Rules:
+1. Write exactly one entry per commit, under the id it was listed with.
+2. Focus on the impact for the end user or developer, not implementation details.
+3. Keep each entry to a single line.
+4. Do NOT include commit hashes, author names, or dates in the entries.
+5. If a scope is present, keep it as a prefix in parentheses.
+6. {language_instruction}
+
+You MUST respond with ONLY a valid JSON object (no markdown, no code fences, no extra text).
+Use this exact structure:
+{{
+    "entries": [
+        {{"id": "3f2a1b9c0d", "entry": "Description of the change"}}
+    ]
+}}"""
+    return PromptParts(prefix, commits_prompt)
+
+
+def build_file_summary_prompt_parts(diff: str) -> PromptParts:
+    """Build the prompt that summarizes each file in one part of a diff too large to send."""
+    prefix = """You summarize parts of a large git diff for a commit message writer who cannot see the diff itself.
+
+## Rules:
+1. Write exactly one entry per file in the diff, using the path shown after `b/` in its `diff --git` line.
+2. In one or two sentences, say what changed in the file and, when the diff shows it, why.
+3. Name the functions, classes, settings or endpoints that were added, removed or changed.
+4. Say so explicitly when a change breaks existing callers or users.
+5. Write in English.
+
+You MUST respond with ONLY a valid JSON object (no markdown, no code fences, no extra text).
+Use this exact structure:
+{
+    "files": [
+        {"path": "src/app.py", "summary": "Adds a retry to the HTTP client."}
+    ]
+}"""
+    suffix = f"""Summarize the changes to each file in this diff:
+
+```diff
+{diff}
+```"""
+    return PromptParts(prefix, suffix)
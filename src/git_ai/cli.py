@@ -1,25 +1,45 @@
 """CLI commands for Git AI using Typer."""
 
+from __future__ import annotations
+
 import os
 import re
 import shutil
+import signal
 import stat
+import time
+from contextlib import contextmanager
 from datetime import date
+from functools import cache
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any, cast
 
 import typer
-from rich.console import Console
-from rich.panel import Panel
-from rich.prompt import Confirm, Prompt
 
 from git_ai.__version__ import __version__
-from git_ai.config import GitAiConfig, load_config
-from git_ai.enums import CommitType
-from git_ai.services.ai_service import AiService
-from git_ai.services.factory import resolve_ai_service
-from git_ai.services.git_service import GitService
-from git_ai.support.commit_template import CommitTemplate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from rich.console import Console, RenderableType
+
+    from git_ai.config import GitAiConfig
+    from git_ai.services.ai_service import AiService
+    from git_ai.services.candidate_pool import CandidatePool
+    from git_ai.services.git_service import GitService
+    from git_ai.support.commit_index import CommitIndex, IndexedCommit
+    from git_ai.support.commit_log import CommitRecord
+    from git_ai.support.commit_template import CommitTemplate
+    from git_ai.support.diff_budget import DiffBudget
+    from git_ai.support.diff_reducers import ReducerPipeline
+    from git_ai.support.latency_history import LatencyHistory
+    from git_ai.support.pregenerated_store import PregeneratedStore
+    from git_ai.support.release_ranges import ReleaseTag
+    from git_ai.support.response_cache import ResponseCache
+    from git_ai.support.staged_snapshot import MoveDetection, StagedSnapshot
+
+# rich, pydantic and the provider SDKs are imported by the code that uses them,
+# so `git-ai --version` and commands that never reach the AI start without them
 
 app = typer.Typer(
     name="git-ai",
@@ -27,13 +47,35 @@ app = typer.Typer(
     add_completion=False,
 )
 
-console = Console()
+
+class _LazyConsole:
+    """Stands in for the rich Console, which is only created once something is printed."""
+
+    def __init__(self) -> None:
+        self._console: Console | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return getattr(self._console, name)
+
+    # rich's Live holds the console as a context manager, which skips __getattr__
+    def __enter__(self) -> Console:
+        return cast("Console", self.__getattr__("__enter__")())
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.__getattr__("__exit__")(*exc_info)
+
+
+console = cast("Console", _LazyConsole())
 
 
 def version_callback(value: bool) -> None:
     """Print version and exit."""
     if value:
-        console.print(f"git-ai version: [bold]{__version__}[/bold]")
+        typer.echo(f"git-ai version: {typer.style(__version__, bold=True)}")
         raise typer.Exit()
 
 
@@ -74,6 +116,16 @@ def commit(
         bool, typer.Option("--no-body", help="Strip body from the commit message")
     ] = False,
     footer: Annotated[list[str] | None, typer.Option(help="Add custom footer line(s)")] = None,
+    candidates: Annotated[
+        int,
+        typer.Option(
+            "--candidates",
+            "-n",
+            min=1,
+            max=10,
+            help="Generate N messages at once to pick from; regenerate then answers instantly",
+        ),
+    ] = 1,
 ) -> None:
     """
     Generate AI-powered commit message following Conventional Commits.
@@ -87,20 +139,21 @@ def commit(
         $ git-ai commit --all
 
         $ git-ai commit --template=minimal
+
+        $ git-ai commit --candidates 3
     """
+    from git_ai.config import load_config
+    from git_ai.services.factory import resolve_ai_service
+    from git_ai.services.git_service import GitService
+
     config = load_config()
-    git = GitService()
+    git = GitService(backend=config.git_backend)
 
     if not git.is_git_repository():
         console.print("[red]This directory is not a Git repository.[/red]")
         raise typer.Exit(1)
 
-    # Resolve template
-    try:
-        tmpl = CommitTemplate.resolve(template, config)
-    except ValueError as e:
-        console.print(f"[red]{e}[/red]")
-        raise typer.Exit(1)
+    tmpl, reducers, moves = _commit_settings(template, config)
 
     # Apply CLI overrides
     body_override = "never" if no_body else None
@@ -116,52 +169,366 @@ def commit(
     if all:
         git.add_all()
 
-    if not git.has_staged_changes():
+    snapshot = git.get_staged_snapshot(budget=_diff_budget(config), moves=moves)
+    if snapshot.is_empty:
         console.print(
             "[yellow]No staged changes found. Use `git add` to stage your changes first, "
             "or run with --all flag.[/yellow]"
         )
         raise typer.Exit(1)
 
-    diff = _prepare_diff(git, config)
-    stat_output = git.get_staged_stat()
-    console.print(f"\n[dim]Staged changes:[/dim]\n{stat_output}\n")
+    console.print(f"\n[dim]Staged changes:[/dim]\n{snapshot.stat}\n")
+
+    def prepare() -> tuple[AiService, str]:
+        # Resolve AI service
+        try:
+            ai = resolve_ai_service(
+                config, cache=_response_cache(git, config), history=_latency_history(git)
+            )
+        except RuntimeError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(1)
+        return ai, _prepare_diff(snapshot, git, reducers, config, ai, moves)
+
+    if candidates <= 1 and (pregenerated := _pregenerated_message(git, tmpl, config)):
+        # The provider and the diff are only needed if the user asks for another message
+        _handle_user_choice(git, pregenerated, tmpl, config, cache(prepare))
+        return
+
+    ai, diff = prepare()
+
+    if candidates > 1:
+        from git_ai.services.candidate_pool import CandidatePool
+
+        _report_prompt_tokens(_commit_prompt(diff, config), config)
+        with CandidatePool(ai, diff, candidates) as pool:
+            commit_message = _choose_candidate(pool, tmpl, config)
+            if commit_message is None:
+                raise typer.Exit(1)
+            _handle_user_choice(git, commit_message, tmpl, config, lambda: (ai, diff), pool)
+        return
+
+    commit_message = _generate_commit_message(ai, diff, tmpl, config)
+    if commit_message is None:
+        raise typer.Exit(1)
+
+    _handle_user_choice(git, commit_message, tmpl, config, lambda: (ai, diff))
+
+
+def _commit_settings(
+    template: str | None, config: GitAiConfig
+) -> tuple[CommitTemplate, ReducerPipeline, MoveDetection]:
+    """Resolve the template and diff settings, exiting on invalid configuration."""
+    from git_ai.support.commit_template import CommitTemplate
+    from git_ai.support.diff_budget import DIFF_STRATEGIES
+    from git_ai.support.diff_reducers import ReducerPipeline
+    from git_ai.support.staged_snapshot import MoveDetection
 
-    # Resolve AI service
     try:
-        ai = resolve_ai_service(config)
-    except RuntimeError as e:
+        tmpl = CommitTemplate.resolve(template, config)
+        reducers = ReducerPipeline.from_config(config)
+        moves = MoveDetection(config.diff.rename_threshold, copies=config.diff.find_copies)
+        if config.diff.strategy not in DIFF_STRATEGIES:
+            raise ValueError(
+                f"Invalid diff strategy: '{config.diff.strategy}'. "
+                "Must be 'budget', 'auto', or 'map-reduce'."
+            )
+    except ValueError as e:
         console.print(f"[red]{e}[/red]")
         raise typer.Exit(1)
+    return tmpl, reducers, moves
 
-    commit_message = _generate_commit_message(ai, diff, tmpl, config)
-    if commit_message is None:
+
+def _pregenerated_message(git: GitService, tmpl: CommitTemplate, config: GitAiConfig) -> str | None:
+    """The message `git-ai watch` generated for exactly what is staged now, if any."""
+    from git_ai.support.pregenerated_store import PregeneratedStore
+
+    if not (git_dir := git.get_git_dir()):
+        return None
+    try:
+        tree = git.write_tree()
+    except RuntimeError:
+        return None
+    response = PregeneratedStore.for_git_dir(git_dir).get(tree, _pregeneration_fingerprint(config))
+    if response is None:
+        return None
+    console.print("[dim]Using the message pregenerated by git-ai watch.[/dim]")
+    return _format_commit_message(response, tmpl, config)
+
+
+def _pregeneration_fingerprint(config: GitAiConfig) -> str:
+    """Hash the settings that shape the commit prompt, so config changes miss the store."""
+    from git_ai.agents.prompts import PROMPT_VERSION
+    from git_ai.support.response_cache import ResponseCache
+
+    settings = config.model_dump_json(
+        include={
+            "language": True,
+            "scopes": True,
+            "types": True,
+            "max_diff_size": True,
+            "max_prompt_tokens": True,
+            "diff": True,
+            "commit": {"body"},
+        }
+    )
+    return ResponseCache.key(config.provider, config.model or "", PROMPT_VERSION, settings)
+
+
+def _diff_budget(config: GitAiConfig) -> DiffBudget:
+    from git_ai.support.diff_budget import DiffBudget
+    from git_ai.support.token_estimator import TokenEstimator
+
+    if config.max_prompt_tokens is None:
+        return DiffBudget(config.max_diff_size)
+
+    # The diff gets whatever the fixed part of the prompt leaves over
+    estimator = TokenEstimator(config.provider)
+    overhead = estimator.count(_commit_prompt("", config))
+    room = _prompt_room(config.max_prompt_tokens, overhead)
+    return DiffBudget(estimator.units_for(room), measure=estimator.units)
+
+
+def _prompt_room(max_prompt_tokens: int, overhead: int) -> int:
+    """The tokens max_prompt_tokens leaves after the instructions, exiting if it leaves none."""
+    if (room := max_prompt_tokens - overhead) <= 0:
+        console.print(
+            f"[red]max_prompt_tokens ({max_prompt_tokens}) is too small: the instructions "
+            f"alone take ~{overhead} tokens.[/red]"
+        )
         raise typer.Exit(1)
+    return room
+
+
+def _commit_prompt(diff: str, config: GitAiConfig) -> str:
+    from git_ai.agents.prompts import build_commit_prompt
+
+    return build_commit_prompt(
+        diff=diff,
+        language=config.language,
+        allowed_scopes=config.scopes,
+        allowed_types=config.types,
+        body_preference=config.commit.body,
+    )
 
-    _handle_user_choice(git, ai, commit_message, diff, tmpl, config)
 
+def _report_prompt_tokens(prompt: str, config: GitAiConfig) -> None:
+    from git_ai.support.token_estimator import TokenEstimator
 
-def _prepare_diff(git: GitService, config: GitAiConfig) -> str:
-    diff = git.get_staged_diff()
-    max_size = config.max_diff_size
-    if len(diff) <= max_size:
-        return diff
-    console.print("[yellow]Diff is too large. Truncating to fit the AI context window.[/yellow]")
-    return diff[:max_size] + "\n\n[... diff truncated ...]"
+    tokens = TokenEstimator(config.provider).count(prompt)
+    limit = f" of {config.max_prompt_tokens}" if config.max_prompt_tokens else ""
+    console.print(f"[dim]Estimated prompt tokens: ~{tokens}{limit}[/dim]")
+
+
+def _prepare_diff(
+    snapshot: StagedSnapshot,
+    git: GitService,
+    reducers: ReducerPipeline,
+    config: GitAiConfig,
+    ai: AiService | None = None,
+    moves: MoveDetection | None = None,
+) -> str:
+    budget = _diff_budget(config)
+    reduced = reducers.apply(snapshot, git, measure=budget.measure)
+    budgeted = budget.apply(reduced)
+    strategy = config.diff.strategy
+    if ai is not None and (strategy == "map-reduce" or (strategy == "auto" and budgeted.truncated)):
+        if snapshot.truncated:
+            from git_ai.support.diff_budget import PerFileBudget
+
+            # The budgeted snapshot dropped what did not fit; a summary call takes up to a
+            # whole budget of each file
+            per_file = PerFileBudget(budget.max_size, budget.measure)
+            reduced = reducers.apply(
+                git.get_staged_snapshot(budget=per_file, moves=moves), git, measure=budget.measure
+            )
+        if (summaries := _summarize_diff(ai, reduced, budget, git, config)) is not None:
+            return summaries
+    if budgeted.truncated:
+        console.print(
+            "[yellow]Diff is too large. Splitting the size budget across "
+            f"{len(snapshot.files)} files to fit the AI context window.[/yellow]"
+        )
+    return budgeted.text
+
+
+def _summarize_diff(
+    ai: AiService,
+    snapshot: StagedSnapshot,
+    budget: DiffBudget,
+    git: GitService,
+    config: GitAiConfig,
+) -> str | None:
+    """Per-file summaries to send in place of the diff, or None to fall back to the budget."""
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
+
+    from git_ai.services.diff_summarizer import DiffSummarizer
+
+    summarizer = DiffSummarizer(
+        ai,
+        budget.max_size,
+        measure=budget.measure,
+        concurrency=config.diff.concurrency,
+        cache=_response_cache(git, config),
+        fingerprint=config.diff.model_dump_json(),
+    )
+    console.print(f"[blue]Summarizing the diff of {len(snapshot.files)} files first.[/blue]")
+    try:
+        with Progress(
+            TextColumn("Summarizing files"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            console=console,
+            transient=True,
+        ) as progress:
+            task = progress.add_task("parts", total=None)
+            return summarizer.summarize(
+                snapshot,
+                on_progress=lambda done, total: progress.update(task, completed=done, total=total),
+            )
+    except Exception as e:
+        console.print(
+            f"[yellow]Could not summarize the diff ({e}); sending it cut to size.[/yellow]"
+        )
+        return None
+
+
+def _response_cache(git: GitService, config: GitAiConfig) -> ResponseCache | None:
+    from git_ai.support.response_cache import ResponseCache
+
+    if not config.cache.enabled or not (git_dir := git.get_git_dir()):
+        return None
+    return ResponseCache.for_git_dir(
+        git_dir,
+        max_bytes=config.cache.max_size_mb * 1024 * 1024,
+        max_age_seconds=config.cache.max_age_days * 86400,
+    )
+
+
+def _commit_index(git: GitService, config: GitAiConfig) -> CommitIndex | None:
+    from git_ai.support.commit_index import CommitIndex
+
+    if not config.changelog.incremental or not (git_dir := git.get_git_dir()):
+        return None
+    return CommitIndex.for_git_dir(git_dir)
+
+
+def _latency_history(git: GitService) -> LatencyHistory | None:
+    from git_ai.support.latency_history import LatencyHistory
+
+    if not (git_dir := git.get_git_dir()):
+        return None
+    return LatencyHistory.for_git_dir(git_dir)
+
+
+def _report_usage(ai: AiService) -> None:
+    """Show what the provider billed, and how much of the prompt its cache served."""
+    if (usage := ai.last_usage) is None:
+        return
+    cached = f" ({usage.cache_read_tokens} from prompt cache)" if usage.cache_read_tokens else ""
+    first = (
+        f", first token after {usage.first_token_seconds:.1f}s"
+        if usage.first_token_seconds is not None
+        else ""
+    )
+    console.print(
+        f"[dim]Provider tokens: {usage.input_tokens} in{cached}, "
+        f"{usage.output_tokens} out, {usage.seconds:.1f}s{first}[/dim]"
+    )
 
 
 def _generate_commit_message(
-    ai: AiService, diff: str, tmpl: CommitTemplate, config: GitAiConfig
+    ai: AiService, diff: str, tmpl: CommitTemplate, config: GitAiConfig, fresh: bool = False
 ) -> str | None:
+    _report_prompt_tokens(_commit_prompt(diff, config), config)
+    from rich.live import Live
+
+    draft: dict[str, Any] = {}
+
+    def show(fields: dict[str, Any], partial: dict[str, str]) -> None:
+        draft.clear()
+        draft.update(fields)
+        live.update(_draft_view(fields, partial))
+
     try:
-        with console.status("Generating commit message..."):
-            response = ai.generate_commit_message(diff)
+        with Live(_draft_view({}, {}), console=console, transient=True) as live:
+            try:
+                response = ai.generate_commit_message(diff, fresh=fresh, on_update=show)
+            except KeyboardInterrupt:
+                # Once the title is complete, Ctrl+C keeps it instead of aborting
+                if "type" not in draft or "description" not in draft:
+                    raise
+                response = draft
+                console.print("[yellow]Stopped early; keeping what had arrived.[/yellow]")
+        if ai.last_from_cache:
+            console.print("[dim]Reusing the cached response for this diff.[/dim]")
+        _report_usage(ai)
         return _format_commit_message(response, tmpl, config)
     except Exception as e:
         console.print(f"[red]Failed to generate commit message: {e}[/red]")
         return None
 
 
+def _choose_candidate(pool: CandidatePool, tmpl: CommitTemplate, config: GitAiConfig) -> str | None:
+    from rich.markup import escape
+    from rich.prompt import Prompt
+
+    from git_ai.services.candidate_pool import FOLLOWER_WAIT
+
+    # Candidates are listed as they arrive, and the slowest ones are not waited for
+    ready: list[dict[str, Any]] = []
+    deadline = None
+    try:
+        with console.status(f"Generating {pool.size} commit messages..."):
+            while len(ready) < pool.size:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                arrived = pool.wait(len(ready) + 1, timeout)
+                if len(arrived) == len(ready):
+                    break
+                if not ready:
+                    console.print("\n[bold]Candidates:[/bold]")
+                    deadline = time.monotonic() + FOLLOWER_WAIT
+                for number, response in enumerate(arrived[len(ready) :], len(ready) + 1):
+                    title = _format_commit_message(response, tmpl, config).split("\n")[0]
+                    console.print(f"  [cyan]{number}[/cyan]. {escape(title)}")
+                ready = arrived
+    except RuntimeError as e:
+        console.print(f"[red]Failed to generate commit message: {e}[/red]")
+        return None
+
+    if len(ready) == 1:
+        return _format_commit_message(pool.take(ready[0]), tmpl, config)
+
+    choice = Prompt.ask(
+        "Which one?", choices=[str(n) for n in range(1, len(ready) + 1)], default="1"
+    )
+    return _format_commit_message(pool.take(ready[int(choice) - 1]), tmpl, config)
+
+
+def _draft_view(fields: dict[str, Any], partial: dict[str, str]) -> RenderableType:
+    """The commit message as it streams in: the title once its fields complete, then the body."""
+    from rich.panel import Panel
+    from rich.spinner import Spinner
+    from rich.text import Text
+
+    if "type" not in fields:
+        return Spinner("dots", text="Generating commit message...")
+
+    title = fields["type"]
+    if fields.get("scope"):
+        title += f"({fields['scope']})"
+    if "description" in fields:
+        title += f": {fields['description']}"
+    view = Text()
+    view.append(title, style="bold")
+    if body := fields.get("body", partial.get("body", "")):
+        view.append(f"\n\n{body}")
+    hint = "Ctrl+C keeps this title" if "description" in fields else None
+    return Panel(view, border_style="dim", subtitle=hint)
+
+
 def _format_commit_message(response: dict, tmpl: CommitTemplate, config: GitAiConfig) -> str:
     commit_type = response.get("type", "")
     scope = response.get("scope", "")
@@ -211,12 +578,16 @@ def _format_commit_message(response: dict, tmpl: CommitTemplate, config: GitAiCo
 
 def _handle_user_choice(
     git: GitService,
-    ai: AiService,
     commit_message: str,
-    diff: str,
     tmpl: CommitTemplate,
     config: GitAiConfig,
+    prepare: Callable[[], tuple[AiService, str]],
+    pool: CandidatePool | None = None,
 ) -> None:
+    """Show the message until the user commits or cancels; `prepare` gives the AI and diff."""
+    from rich.panel import Panel
+    from rich.prompt import Prompt
+
     while True:
         console.print("\n[bold]Generated commit message:[/bold]")
         console.print(Panel(commit_message, border_style="green"))
@@ -238,8 +609,19 @@ def _handle_user_choice(
                     raise typer.Exit(1)
             case "edit":
                 commit_message = _edit_message(commit_message)
+            case "regenerate" if pool is not None:
+                # The pool has usually finished the next candidate while the user read this one
+                try:
+                    with console.status("Waiting for the next candidate..."):
+                        response = pool.next()
+                except RuntimeError as e:
+                    console.print(f"[red]{e}[/red]")
+                    continue
+                commit_message = _format_commit_message(response, tmpl, config)
             case "regenerate":
-                new_msg = _generate_commit_message(ai, diff, tmpl, config)
+                # Regenerating must ask the provider again, not replay the cache
+                ai, diff = prepare()
+                new_msg = _generate_commit_message(ai, diff, tmpl, config, fresh=True)
                 if new_msg is None:
                     raise typer.Exit(1)
                 commit_message = new_msg
@@ -249,6 +631,8 @@ def _handle_user_choice(
 
 
 def _edit_message(current: str) -> str:
+    from rich.prompt import Prompt
+
     lines = current.split("\n")
     first_line = lines[0]
     body = "\n".join(lines[2:]) if len(lines) > 2 else ""
@@ -262,6 +646,116 @@ def _edit_message(current: str) -> str:
     return message
 
 
+# ---------------------------------------------------------------------------
+# watch
+# ---------------------------------------------------------------------------
+
+
+@app.command()
+def watch(
+    debounce: Annotated[
+        float,
+        typer.Option(min=0.1, help="Seconds the index must stay unchanged before generating"),
+    ] = 1.5,
+) -> None:
+    """
+    Pre-generate commit messages whenever the staged changes change.
+
+    `git-ai commit` then shows the message at once while the staged content
+    still matches.
+
+    Examples:
+
+        $ git-ai watch
+    """
+    from git_ai.config import load_config
+    from git_ai.services.factory import resolve_ai_service
+    from git_ai.services.git_service import GitService
+    from git_ai.support.index_watcher import IndexWatcher
+    from git_ai.support.pregenerated_store import PregeneratedStore
+
+    config = load_config()
+    git = GitService(backend=config.git_backend)
+
+    if not git.is_git_repository():
+        console.print("[red]This directory is not a Git repository.[/red]")
+        raise typer.Exit(1)
+
+    tmpl, reducers, moves = _commit_settings(None, config)
+    if tmpl.body == "always":
+        config.commit.body = "always"
+
+    git_dir = git.get_git_dir()
+    index_path = git.get_index_path()
+    if not git_dir or not index_path:
+        console.print("[red]Could not locate the Git index.[/red]")
+        raise typer.Exit(1)
+
+    try:
+        ai = resolve_ai_service(
+            config, cache=_response_cache(git, config), history=_latency_history(git)
+        )
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+    store = PregeneratedStore.for_git_dir(git_dir)
+    fingerprint = _pregeneration_fingerprint(config)
+
+    def pregenerate() -> None:
+        _pregenerate(git, ai, store, fingerprint, reducers, moves, tmpl, config)
+
+    with IndexWatcher(index_path, debounce=debounce) as watcher:
+        method = "inotify" if watcher.uses_inotify else "polling"
+        console.print(f"[dim]Watching staged changes ({method}). Press Ctrl+C to stop.[/dim]")
+        try:
+            pregenerate()
+            for _ in watcher.changes():
+                pregenerate()
+        except KeyboardInterrupt:
+            console.print("\n[dim]Stopped watching.[/dim]")
+
+
+def _pregenerate(
+    git: GitService,
+    ai: AiService,
+    store: PregeneratedStore,
+    fingerprint: str,
+    reducers: ReducerPipeline,
+    moves: MoveDetection,
+    tmpl: CommitTemplate,
+    config: GitAiConfig,
+) -> None:
+    from rich.markup import escape
+
+    try:
+        tree = git.write_tree()
+    except RuntimeError:
+        # Unmerged entries have no tree; wait for the conflict to be resolved
+        return
+    if store.get(tree, fingerprint) is not None:
+        return
+
+    snapshot = git.get_staged_snapshot(budget=_diff_budget(config), moves=moves)
+    if snapshot.is_empty:
+        return
+    diff = _prepare_diff(snapshot, git, reducers, config, ai, moves)
+    # Staged again while the diff was read: the next change event covers it
+    if git.write_tree() != tree:
+        return
+
+    try:
+        with console.status("Pre-generating commit message..."):
+            response = ai.generate_commit_message(diff)
+    except Exception as e:
+        console.print(f"[red]Failed to pre-generate commit message: {e}[/red]")
+        return
+
+    store.put(tree, fingerprint, response)
+    title = _format_commit_message(response, tmpl, config).split("\n")[0]
+    console.print(f"[green]Ready[/green] [dim]{tree[:8]}[/dim] {escape(title)}")
+
+
 # ---------------------------------------------------------------------------
 # changelog
 # ---------------------------------------------------------------------------
@@ -277,6 +771,15 @@ def changelog(
     dry_run: Annotated[
         bool, typer.Option("--dry-run", help="Preview without writing to file")
     ] = False,
+    engine: Annotated[
+        str,
+        typer.Option(
+            help="Who writes the entries: 'ai', or 'local' to build them from the commits offline"
+        ),
+    ] = "ai",
+    all_tags: Annotated[
+        bool, typer.Option("--all-tags", help="Rewrite the changelog of every tagged release")
+    ] = False,
 ) -> None:
     """
     Generate changelog from commits using AI.
@@ -288,14 +791,38 @@ def changelog(
         $ git-ai changelog --from v1.0.0 --to v2.0.0
 
         $ git-ai changelog --tag v2.0.0 --dry-run
+
+        $ git-ai changelog --tag v2.0.0 --engine local
+
+        $ git-ai changelog --all-tags
     """
+    from rich.markup import escape
+    from rich.panel import Panel
+    from rich.prompt import Confirm, Prompt
+
+    from git_ai.config import load_config
+    from git_ai.services.factory import resolve_ai_service
+    from git_ai.services.git_service import GitService
+    from git_ai.support.local_changelog import CHANGELOG_ENGINES, local_entries, local_sections
+
+    if engine not in CHANGELOG_ENGINES:
+        console.print(f"[red]Invalid engine: '{engine}'. Must be 'ai' or 'local'.[/red]")
+        raise typer.Exit(1)
+    if all_tags and (from_ref or tag or to_ref != "HEAD"):
+        console.print("[red]--all-tags cannot be combined with --from, --to or --tag.[/red]")
+        raise typer.Exit(1)
+
     config = load_config()
-    git = GitService()
+    git = GitService(backend=config.git_backend)
 
     if not git.is_git_repository():
         console.print("[red]This directory is not a Git repository.[/red]")
         raise typer.Exit(1)
 
+    if all_tags:
+        _backfill_changelog(git, config, engine, dry_run)
+        return
+
     resolved_from = _resolve_from_reference(git, from_ref)
     if resolved_from is None:
         console.print(
@@ -303,32 +830,50 @@ def changelog(
         )
         raise typer.Exit(1)
 
-    commits = git.get_commits_between(resolved_from, to_ref)
-    if not commits:
+    index = _commit_index(git, config)
+    records = git.iter_commits(resolved_from, to_ref)
+    if engine == "local":
+        # Parsing is all the work there is; no index, provider or API key is involved
+        entries = list(local_entries(records))
+        total = len(entries)
+    elif index is not None:
+        # Only the commits missing from the index are parsed
+        commits = list(index.index(records))
+        total = len(commits)
+    else:
+        # Commits are grouped as git streams them; only their subjects are kept
+        grouped = _group_commits_by_type(records)
+        total = sum(len(messages) for messages in grouped.values())
+    if not total:
         console.print(f"[yellow]No commits found between {resolved_from} and {to_ref}.[/yellow]")
         return
 
-    console.print(
-        f"[blue]Found {len(commits)} commits between {resolved_from} and {to_ref}.[/blue]"
-    )
-
-    grouped = _group_commits_by_type(commits)
+    console.print(f"[blue]Found {total} commits between {resolved_from} and {to_ref}.[/blue]")
 
-    try:
-        ai = resolve_ai_service(config)
-    except RuntimeError as e:
-        console.print(f"[red]{e}[/red]")
-        raise typer.Exit(1)
+    changelog_sections: list[dict[str, Any]] | None
+    if engine == "local":
+        changelog_sections = local_sections(entries)
+    else:
+        try:
+            ai = resolve_ai_service(
+                config, cache=_response_cache(git, config), history=_latency_history(git)
+            )
+        except RuntimeError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(1)
 
-    changelog_sections = _generate_changelog(ai, grouped)
-    if changelog_sections is None:
-        raise typer.Exit(1)
+        if index is not None:
+            changelog_sections = _generate_changelog_from_index(ai, index, commits, config)
+        else:
+            changelog_sections = _generate_changelog(ai, grouped, config)
+        if changelog_sections is None:
+            raise typer.Exit(1)
 
     version_tag = tag or Prompt.ask("What version tag should this changelog use?", default="v1.0.0")
     formatted = _format_changelog(version_tag, changelog_sections, config)
 
     console.print("\n[dim]Preview:[/dim]")
-    console.print(Panel(formatted, border_style="blue"))
+    console.print(Panel(escape(formatted), border_style="blue"))
 
     if dry_run:
         console.print("[blue]Dry run complete. No files were written.[/blue]")
@@ -356,45 +901,281 @@ def _resolve_from_reference(git: GitService, from_ref: str | None) -> str | None
     return None
 
 
-def _group_commits_by_type(commits: list[dict[str, str]]) -> dict[str, list[str]]:
+def _group_commits_by_type(commits: Iterable[CommitRecord]) -> dict[str, list[str]]:
     grouped: dict[str, list[str]] = {}
-    pattern = re.compile(
-        r"^(?P<type>[a-z]+)(?:\((?P<scope>[^)]+)\))?!?:\s*(?P<description>.+)$", re.I
-    )
+    for ctype, line in map(_typed_line, commits):
+        grouped.setdefault(ctype, []).append(line)
+    return grouped
 
-    for commit in commits:
-        msg = commit["message"]
-        if m := pattern.match(msg):
-            ctype = m.group("type").lower()
-            grouped.setdefault(ctype, []).append(msg)
-        else:
-            grouped.setdefault("other", []).append(msg)
 
-    return grouped
+def _typed_line(commit: CommitRecord) -> tuple[str, str]:
+    """The section type of a commit and the line that stands for it in a prompt."""
+    from git_ai.support.changelog_batches import changelog_line
+    from git_ai.support.conventional_commit import parse_commit_message
+
+    parsed = parse_commit_message(commit.message)
+    ctype = "other" if parsed is None else parsed.type.lower()
+    return ctype, changelog_line(commit.subject, parsed)
+
 
+def _generate_changelog(
+    ai: AiService, grouped: dict[str, list[str]], config: GitAiConfig
+) -> list[dict] | None:
+    from git_ai.agents.prompts import build_changelog_prompt
+    from git_ai.support.changelog_batches import commits_prompt
 
-def _generate_changelog(ai: AiService, grouped: dict[str, list[str]]) -> list[dict] | None:
-    prompt = "Generate a changelog from these grouped commits:\n\n"
-    for ctype, messages in grouped.items():
-        prompt += f"## {ctype}\n"
-        for msg in messages:
-            prompt += f"- {msg}\n"
-        prompt += "\n"
+    batches = _changelog_batches(grouped, config)
+    if len(batches) > 1:
+        return _generate_changelog_in_batches(ai, batches, config)
+
+    prompt = commits_prompt(grouped)
+    _report_prompt_tokens(build_changelog_prompt(prompt, config.language), config)
 
     try:
         with console.status("Generating changelog..."):
             response = ai.generate_changelog(prompt)
+        if ai.last_from_cache:
+            console.print("[dim]Reusing the cached response for these commits.[/dim]")
+        _report_usage(ai)
         return response.get("sections", [])
     except Exception as e:
         console.print(f"[red]Failed to generate changelog: {e}[/red]")
         return None
 
 
-def _format_changelog(version_tag: str, sections: list[dict], config: GitAiConfig) -> str:
+def _changelog_batches(
+    grouped: dict[str, list[str]], config: GitAiConfig
+) -> list[dict[str, list[str]]]:
+    """Split the commits so every prompt fits max_prompt_tokens and every answer the output cap."""
+    from git_ai.agents.prompts import build_changelog_prompt
+    from git_ai.support.changelog_batches import COMMITS_HEADER, batch_commits
+    from git_ai.support.token_estimator import TokenEstimator
+
+    estimator = TokenEstimator(config.provider)
+    budget = None
+    if config.max_prompt_tokens is not None:
+        overhead = estimator.count(build_changelog_prompt(COMMITS_HEADER, config.language))
+        budget = _prompt_room(config.max_prompt_tokens, overhead)
+    return batch_commits(grouped, estimator, budget, config.max_output_tokens)
+
+
+def _generate_changelog_in_batches(
+    ai: AiService, batches: list[dict[str, list[str]]], config: GitAiConfig
+) -> list[dict] | None:
+    from git_ai.services.changelog_pipeline import generate_changelog_sections
+    from git_ai.support.changelog_batches import commits_prompt
+
+    total = sum(len(messages) for batch in batches for messages in batch.values())
+    console.print(
+        f"[blue]Summarizing {total} commits in {len(batches)} batches, "
+        f"{config.changelog.concurrency} at a time.[/blue]"
+    )
+    prompts = [commits_prompt(batch) for batch in batches]
+    try:
+        with _batch_progress(len(prompts)) as on_done:
+            sections = generate_changelog_sections(
+                ai, prompts, config.changelog.concurrency, on_done=on_done
+            )
+    except Exception as e:
+        console.print(f"[red]Failed to generate changelog: {e}[/red]")
+        return None
+    entries = sum(len(section.get("entries", [])) for section in sections)
+    console.print(f"[dim]Merged {len(batches)} batches into {entries} entries.[/dim]")
+    return sections
+
+
+def _generate_changelog_from_index(
+    ai: AiService, index: CommitIndex, commits: list[IndexedCommit], config: GitAiConfig
+) -> list[dict] | None:
+    """Build the sections from per-commit entries, asking the AI only for commits not indexed."""
+    from git_ai.agents.prompts import PROMPT_VERSION
+    from git_ai.services.changelog_pipeline import generate_changelog_entries
+    from git_ai.support.changelog_batches import commits_prompt, merge_sections
+    from git_ai.support.commit_index import entry_ids
+    from git_ai.support.response_cache import ResponseCache
+
+    fingerprint = ResponseCache.key(
+        "changelog-entry", ai.provider, ai.model, PROMPT_VERSION, config.language
+    )
+    entries = index.entries((commit.sha for commit in commits), fingerprint)
+    pending = [commit for commit in commits if commit.sha not in entries]
+    if not pending:
+        console.print(f"[dim]All {len(commits)} commits are in the index already.[/dim]")
+    else:
+        shas = entry_ids(commit.sha for commit in pending)
+        ids = {sha: id_ for id_, sha in shas.items()}
+        grouped: dict[str, list[str]] = {}
+        for commit in pending:
+            grouped.setdefault(commit.type, []).append(f"[{ids[commit.sha]}] {commit.line}")
+        batches = _changelog_batches(grouped, config)
+        console.print(
+            f"[blue]Summarizing {len(pending)} new commits in {len(batches)} batches; "
+            f"{len(commits) - len(pending)} come from the index.[/blue]"
+        )
+        prompts = [commits_prompt(batch) for batch in batches]
+        try:
+            with _batch_progress(len(prompts)) as on_done:
+                written = generate_changelog_entries(
+                    ai, prompts, config.changelog.concurrency, on_done=on_done
+                )
+        except Exception as e:
+            console.print(f"[red]Failed to generate changelog: {e}[/red]")
+            return None
+        new = {shas[id_]: entry for id_, entry in written.items() if id_ in shas}
+        index.add_entries(fingerprint, new)
+        entries.update(new)
+
+    sections: dict[str, list[str]] = {}
+    for commit in commits:
+        # A commit the AI skipped is listed by its subject, and asked about again next time
+        sections.setdefault(commit.type, []).append(entries.get(commit.sha, commit.line))
+    return merge_sections([[{"type": t, "entries": lines} for t, lines in sections.items()]])
+
+
+def _backfill_changelog(git: GitService, config: GitAiConfig, engine: str, dry_run: bool) -> None:
+    """Rewrite the changelog with one section per tagged release, newest first."""
+    from rich.markup import escape
+    from rich.panel import Panel
+    from rich.prompt import Confirm
+
+    from git_ai.support.local_changelog import local_commit_entry, local_sections
+    from git_ai.support.release_ranges import split_releases
+
+    tags = git.get_release_tags()
+    if not tags:
+        console.print("[yellow]No tags found. Use --tag to write the first release.[/yellow]")
+        return
+
+    # One walk over the history of every tag; each commit is parsed as it streams in
+    records = git.iter_history(*dict.fromkeys(tag.sha for tag in tags))
+    if engine == "local":
+        local = split_releases(tags, records, local_commit_entry)
+        releases = [
+            (tag, [entry for entry in entries if entry is not None])
+            for tag, entries in zip(tags, local, strict=True)
+        ]
+    else:
+        typed = split_releases(tags, records, _typed_line)
+        releases = list(zip(tags, typed, strict=True))
+    # A tag on a commit an earlier tag already released adds nothing
+    releases = [(tag, commits) for tag, commits in releases if commits]
+    if not releases:
+        console.print("[yellow]No commits found in any tagged release.[/yellow]")
+        return
+
+    total = sum(len(commits) for _, commits in releases)
+    console.print(f"[blue]Found {total} commits across {len(releases)} releases.[/blue]")
+
+    if engine == "local":
+        sections = [local_sections(entries) for _, entries in releases]
+    else:
+        generated = _generate_release_changelogs(git, config, [c for _, c in releases])
+        if generated is None:
+            raise typer.Exit(1)
+        sections = generated
+
+    formatted = "\n".join(
+        _format_changelog(tag.name, release_sections, config, released=tag.date)
+        for (tag, _), release_sections in reversed(list(zip(releases, sections, strict=True)))
+    )
+
+    # Sections written with --tag before their tag exists stay on top; the rest are rewritten
+    existing = _changelog_sections(Path(config.changelog.path))
+    kept = _newer_sections(existing, tags)
+    rewritten = {tag.name for tag, _ in releases}
+    discarded = [name for name, _, _ in existing[len(kept) :] if name not in rewritten]
+    if kept:
+        console.print(
+            f"[blue]Keeping {len(kept)} sections newer than {tags[-1].name}: "
+            f"{', '.join(name for name, _, _ in kept)}[/blue]"
+        )
+        formatted = "".join(text.rstrip("\n") + "\n\n" for _, _, text in kept) + formatted
+    if discarded:
+        console.print(
+            f"[yellow]Discarding {len(discarded)} sections that match no tagged release: "
+            f"{', '.join(discarded)}[/yellow]"
+        )
+
+    console.print("\n[dim]Preview:[/dim]")
+    console.print(Panel(escape(formatted), border_style="blue"))
+
+    if dry_run:
+        console.print("[blue]Dry run complete. No files were written.[/blue]")
+        return
+
+    if not Confirm.ask(
+        f"Replace {config.changelog.path} with these {len(releases)} releases?", default=True
+    ):
+        console.print("[yellow]Changelog generation cancelled.[/yellow]")
+        return
+
+    _write_changelog(formatted, config, replace=True)
+
+
+def _generate_release_changelogs(
+    git: GitService, config: GitAiConfig, releases: list[list[tuple[str, str]]]
+) -> list[list[dict]] | None:
+    """Summarize every release's batches in one bounded pool, one list of sections per release."""
+    from git_ai.services.changelog_pipeline import generate_release_sections
+    from git_ai.services.factory import resolve_ai_service
+    from git_ai.support.changelog_batches import commits_prompt
+
+    try:
+        ai = resolve_ai_service(
+            config, cache=_response_cache(git, config), history=_latency_history(git)
+        )
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        return None
+
+    prompts = []
+    for commits in releases:
+        grouped: dict[str, list[str]] = {}
+        for ctype, line in commits:
+            grouped.setdefault(ctype, []).append(line)
+        prompts.append([commits_prompt(batch) for batch in _changelog_batches(grouped, config)])
+
+    batches = sum(len(release) for release in prompts)
+    console.print(
+        f"[blue]Summarizing {len(releases)} releases in {batches} batches, "
+        f"{config.changelog.concurrency} at a time.[/blue]"
+    )
+    try:
+        with _batch_progress(batches) as on_done:
+            sections = generate_release_sections(
+                ai, prompts, config.changelog.concurrency, on_done=on_done
+            )
+    except Exception as e:
+        console.print(f"[red]Failed to generate changelog: {e}[/red]")
+        return None
+    return sections
+
+
+@contextmanager
+def _batch_progress(total: int) -> Iterator[Callable[[int], None]]:
+    """Show a progress bar over `total` batches; the callback marks one as done."""
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn
+
+    with Progress(
+        TextColumn("Summarizing batches"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        console=console,
+        transient=True,
+    ) as progress:
+        task = progress.add_task("batches", total=total)
+        yield lambda index: progress.advance(task)
+
+
+def _format_changelog(
+    version_tag: str, sections: list[dict], config: GitAiConfig, released: str | None = None
+) -> str:
+    from git_ai.enums import CommitType
+
     with_emojis = config.changelog.with_emojis
-    today = date.today().isoformat()
+    released = released or date.today().isoformat()
 
-    lines = [f"## [{version_tag}] - {today}", ""]
+    lines = [f"## [{version_tag}] - {released}", ""]
 
     for section in sections:
         ctype = section.get("type", "other")
@@ -419,14 +1200,44 @@ def _format_changelog(version_tag: str, sections: list[dict], config: GitAiConfi
     return "\n".join(lines)
 
 
-def _write_changelog(new_content: str, config: GitAiConfig) -> None:
+_SECTION_HEADING = re.compile(r"^## \[([^\]\n]+)\](?: - (\d{4}-\d{2}-\d{2}))?", re.MULTILINE)
+
+
+def _changelog_sections(path: Path) -> list[tuple[str, str | None, str]]:
+    """The version, date and text of every `## [version]` section of the changelog at `path`."""
+    if not path.is_file():
+        return []
+    text = path.read_text()
+    headings = list(_SECTION_HEADING.finditer(text))
+    ends = [heading.start() for heading in headings[1:]] + [len(text)]
+    return [
+        (heading[1], heading[2], text[heading.start() : end])
+        for heading, end in zip(headings, ends, strict=True)
+    ]
+
+
+def _newer_sections(
+    sections: list[tuple[str, str | None, str]], tags: list[ReleaseTag]
+) -> list[tuple[str, str | None, str]]:
+    """The leading sections of no tag, dated no earlier than the latest tag or not at all."""
+    names = {tag.name for tag in tags}
+    newer = []
+    for section in sections:
+        name, released, _ = section
+        if name in names or (released is not None and released < tags[-1].date):
+            break
+        newer.append(section)
+    return newer
+
+
+def _write_changelog(new_content: str, config: GitAiConfig, replace: bool = False) -> None:
     changelog_path = Path(config.changelog.path)
     header = (
         "# Changelog\n\nAll notable changes to this project will be documented in this file.\n\n"
     )
 
     existing = ""
-    if changelog_path.is_file():
+    if changelog_path.is_file() and not replace:
         existing = changelog_path.read_text()
         existing = re.sub(r"^# Changelog\n+.*?(?=## \[)", "", existing, flags=re.DOTALL)
 
@@ -455,6 +1266,10 @@ def setup() -> None:
 
         $ git-ai setup
     """
+    from rich.panel import Panel
+
+    from git_ai.services.git_service import GitService
+
     console.print(
         Panel.fit(
             "🚀 [bold]Git AI - Setup[/bold]",
@@ -485,6 +1300,8 @@ def setup() -> None:
 
 
 def _ask_provider() -> str:
+    from rich.prompt import Prompt
+
     return Prompt.ask(
         "Which AI provider do you want to use?",
         choices=["anthropic", "openai", "claude-code"],
@@ -493,6 +1310,8 @@ def _ask_provider() -> str:
 
 
 def _ask_language() -> str:
+    from rich.prompt import Prompt
+
     options = {
         "en": "English",
         "pt-BR": "Português (Brasil)",
@@ -516,6 +1335,8 @@ def _ask_language() -> str:
 
 
 def _ask_scopes() -> list[str]:
+    from rich.prompt import Confirm, Prompt
+
     if not Confirm.ask(
         "Do you want to define allowed commit scopes for this project?", default=False
     ):
@@ -526,6 +1347,10 @@ def _ask_scopes() -> list[str]:
 
 
 def _ask_types() -> list[str]:
+    from rich.prompt import Confirm, Prompt
+
+    from git_ai.enums import CommitType
+
     if not Confirm.ask("Do you want to restrict which commit types are allowed?", default=False):
         return []
 
@@ -542,6 +1367,8 @@ def _ask_types() -> list[str]:
 
 
 def _ask_body_preference() -> str:
+    from rich.prompt import Prompt
+
     return Prompt.ask(
         "How should commit message body be handled? (auto/always/never)",
         choices=["auto", "always", "never"],
@@ -550,6 +1377,8 @@ def _ask_body_preference() -> str:
 
 
 def _ask_hook(git: GitService) -> bool:
+    from rich.prompt import Confirm
+
     if not git.is_git_repository():
         console.print("[yellow]Not a Git repository. Skipping hook installation.[/yellow]")
         return False
@@ -639,5 +1468,44 @@ def _list_to_toml(items: list[str]) -> str:
     return f"[{inner}]"
 
 
+# ---------------------------------------------------------------------------
+# daemon
+# ---------------------------------------------------------------------------
+
+
+@app.command()
+def daemon() -> None:
+    """
+    Keep git-ai loaded in the background so every command starts instantly.
+
+    While the daemon runs, `git-ai` hands each command to it over a Unix
+    socket and the command runs in a process forked with the imports,
+    parsed config and provider clients already in place. Without a daemon,
+    commands run in-process as before. Set GIT_AI_NO_DAEMON=1 to bypass it.
+
+    Examples:
+
+        $ git-ai daemon &
+    """
+    from git_ai.daemon import Daemon
+
+    try:
+        server = Daemon()
+        server.listen()
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+    def stop(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    console.print(f"[dim]Listening on {server.path}. Press Ctrl+C to stop.[/dim]")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        console.print("\n[dim]Daemon stopped.[/dim]")
+
+
 if __name__ == "__main__":
     app()
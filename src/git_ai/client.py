@@ -0,0 +1,139 @@
+"""Thin `git-ai` entry point that hands the command to a running daemon.
+
+This module runs before anything else on every invocation, so it only
+imports the standard library pieces it needs; typer, rich, pydantic and
+the provider SDKs are only imported when no daemon takes the command.
+"""
+
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+
+from git_ai.__version__ import __version__
+
+SOCKET_ENV = "GIT_AI_DAEMON_SOCKET"
+"""Overrides where the daemon listens and where the client looks for it."""
+
+DISABLE_ENV = "GIT_AI_NO_DAEMON"
+"""When set, commands always run in-process."""
+
+HEADER = struct.Struct("!I")
+"""Length prefix of a request."""
+
+
+def socket_path() -> str:
+    """Where the daemon listens: $GIT_AI_DAEMON_SOCKET, else a per-user runtime path."""
+    if path := os.environ.get(SOCKET_ENV):
+        return path
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(runtime_dir, "git-ai", "daemon.sock")
+    return os.path.join("/tmp", f"git-ai-{os.getuid()}", "daemon.sock")
+
+
+def is_private_directory(path: str) -> bool:
+    """Whether `path` is a real directory that only this user can enter."""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(info.st_mode)
+        and info.st_uid == os.getuid()
+        and stat.S_IMODE(info.st_mode) == 0o700
+    )
+
+
+def peer_uid(connection: socket.socket) -> int | None:
+    """The user id of the process on the other end, or None where the platform cannot tell."""
+    if hasattr(socket, "SO_PEERCRED"):
+        # struct ucred: pid, uid, gid
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, 12)
+        return int.from_bytes(credentials[4:8], sys.byteorder)
+    if hasattr(socket, "LOCAL_PEERCRED"):
+        # struct xucred on macOS and the BSDs: version, uid, ...; level 0 is SOL_LOCAL
+        credentials = connection.getsockopt(0, socket.LOCAL_PEERCRED, 76)
+        return int.from_bytes(credentials[4:8], sys.byteorder)
+    return None
+
+
+def main() -> None:
+    if (code := forward(sys.argv[1:])) is not None:
+        sys.exit(code)
+
+    from git_ai.cli import app
+
+    app()
+
+
+def forward(argv: list[str]) -> int | None:
+    """
+    Run the command in the daemon and return its exit status.
+
+    Returns None when no daemon can take it, before anything has run, so
+    the caller can run the command in-process instead. The command runs
+    with this process's whole environment, as it would in-process, so the
+    terminal and the environment with its provider keys are only handed to
+    a daemon of this same user, listening in a directory no one else can enter.
+    """
+    if os.environ.get(DISABLE_ENV) or argv[:1] == ["daemon"] or not hasattr(socket, "AF_UNIX"):
+        return None
+
+    path = socket_path()
+    if not is_private_directory(os.path.dirname(path)) or not _own_socket(path):
+        return None
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with connection:
+        try:
+            connection.connect(path)
+            if peer_uid(connection) != os.getuid():
+                return None
+            request = json.dumps(
+                {
+                    "version": __version__,
+                    "argv": argv,
+                    "cwd": os.getcwd(),
+                    "env": dict(os.environ),
+                }
+            ).encode()
+            payload = HEADER.pack(len(request)) + request
+            # The command reads and writes this terminal directly
+            sent = socket.send_fds(connection, [payload], [0, 1, 2])
+            connection.sendall(payload[sent:])
+        except OSError:
+            return None
+        return _wait(connection)
+
+
+def _own_socket(path: str) -> bool:
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def _wait(connection: socket.socket) -> int | None:
+    """Relay Ctrl+C to the process running the command and return its exit status."""
+    replies = connection.makefile("rb")
+    started = json.loads(replies.readline() or b"{}")
+    if "pid" not in started:
+        # An outdated daemon declined the command
+        return None
+
+    def interrupt(signum: int, frame: object) -> None:
+        try:
+            os.kill(started["pid"], signal.SIGINT)
+        except ProcessLookupError:
+            pass
+
+    previous = signal.signal(signal.SIGINT, interrupt)
+    try:
+        finished = json.loads(replies.readline() or b"{}")
+    finally:
+        signal.signal(signal.SIGINT, previous)
+    return int(finished.get("exit", 1))
@@ -27,6 +27,14 @@ class TemplatesConfig(BaseModel):
 class ChangelogConfig(BaseModel):
     path: str = "CHANGELOG.md"
     with_emojis: bool = True
+    concurrency: int = 4
+    incremental: bool = False
+
+
+class CacheConfig(BaseModel):
+    enabled: bool = True
+    max_size_mb: int = 50
+    max_age_days: int = 30
 
 
 class HookConfig(BaseModel):
@@ -34,17 +42,44 @@ class HookConfig(BaseModel):
     strict: bool = True
 
 
+class HedgeConfig(BaseModel):
+    percentile: float = 0.95
+    initial_delay: float = 10.0
+    min_delay: float = 1.0
+
+
+class DiffConfig(BaseModel):
+    reducers: list[str] = Field(
+        default_factory=lambda: ["binary", "lockfile", "notebook", "svg", "minified", "rename"]
+    )
+    rules: dict[str, list[str]] = Field(default_factory=dict)
+    keep: list[str] = Field(default_factory=list)
+    rename_threshold: int = 50
+    find_copies: bool = True
+    python_summary: str = "off"
+    strategy: str = "budget"
+    concurrency: int = 4
+
+
 class GitAiConfig(BaseModel):
     provider: str = "anthropic"
+    providers: list[str] = Field(default_factory=list)
     model: str | None = None
+    timeout: float = 120.0
     language: str = "en"
     scopes: list[str] = Field(default_factory=list)
     types: list[str] = Field(default_factory=list)
     max_diff_size: int = 15000
+    max_prompt_tokens: int | None = None
+    max_output_tokens: int = 4096
+    git_backend: str = "auto"
     commit: CommitConfig = Field(default_factory=CommitConfig)
+    diff: DiffConfig = Field(default_factory=DiffConfig)
     templates: TemplatesConfig = Field(default_factory=TemplatesConfig)
     changelog: ChangelogConfig = Field(default_factory=ChangelogConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
     hook: HookConfig = Field(default_factory=HookConfig)
+    hedge: HedgeConfig = Field(default_factory=HedgeConfig)
 
 
 def find_config_file(start_dir: str | None = None) -> Path | None:
@@ -76,23 +111,40 @@ def load_config(start_dir: str | None = None) -> GitAiConfig:
 
     if val := os.environ.get("GIT_AI_PROVIDER"):
         env_overrides["provider"] = val
+    if val := os.environ.get("GIT_AI_PROVIDERS"):
+        env_overrides["providers"] = [p.strip() for p in val.split(",") if p.strip()]
     if val := os.environ.get("GIT_AI_MODEL"):
         env_overrides["model"] = val
     if val := os.environ.get("GIT_AI_LANGUAGE"):
         env_overrides["language"] = val
     if val := os.environ.get("GIT_AI_MAX_DIFF_SIZE"):
         env_overrides["max_diff_size"] = int(val)
+    if val := os.environ.get("GIT_AI_MAX_PROMPT_TOKENS"):
+        env_overrides["max_prompt_tokens"] = int(val)
+    if val := os.environ.get("GIT_AI_MAX_OUTPUT_TOKENS"):
+        env_overrides["max_output_tokens"] = int(val)
+    if val := os.environ.get("GIT_AI_TIMEOUT"):
+        env_overrides["timeout"] = float(val)
+    if val := os.environ.get("GIT_AI_GIT_BACKEND"):
+        env_overrides["git_backend"] = val
     if val := os.environ.get("GIT_AI_COMMIT_BODY"):
         env_overrides.setdefault("commit", {})["body"] = val
     if val := os.environ.get("GIT_AI_CO_AUTHORED_BY"):
         env_overrides.setdefault("commit", {}).setdefault("footer", {})["co_authored_by"] = (
             val.lower() in ("true", "1", "yes")
         )
+    if val := os.environ.get("GIT_AI_DIFF_STRATEGY"):
+        env_overrides.setdefault("diff", {})["strategy"] = val
+    if val := os.environ.get("GIT_AI_CACHE"):
+        env_overrides.setdefault("cache", {})["enabled"] = val.lower() in ("true", "1", "yes")
     if val := os.environ.get("GIT_AI_TEMPLATE"):
         env_overrides.setdefault("templates", {})["default"] = val
 
     # Merge: file data + env overrides
     merged = _deep_merge(file_data, env_overrides)
+    # A provider chain without an explicit provider starts with its first entry
+    if merged.get("providers") and "provider" not in merged:
+        merged["provider"] = merged["providers"][0]
 
     return GitAiConfig(**merged)
 
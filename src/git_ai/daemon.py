@@ -0,0 +1,271 @@
+"""Long-lived server behind `git-ai daemon`, running each command in a warm forked process."""
+
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from git_ai.__version__ import __version__
+from git_ai.client import HEADER, is_private_directory, peer_uid, socket_path
+from git_ai.config import GitAiConfig, find_config_file, load_config
+from git_ai.services.factory import close_shared_clients
+
+PRELOAD = (
+    "git_ai.cli",
+    "git_ai.services.anthropic_service",
+    "git_ai.services.openai_service",
+    "git_ai.services.claude_code_service",
+)
+"""Modules imported once by the daemon, so no command pays for them again."""
+
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+MAX_CONFIGS = 64
+RECEIVE_TIMEOUT = 5.0
+
+
+class Daemon:
+    """
+    Serves `git-ai` commands over a Unix domain socket.
+
+    The daemon imports the CLI and the provider SDKs up front and keeps the
+    parsed config of each repository and the providers' pooled clients. Every
+    request runs in a child forked from this warm process, with the client's
+    terminal, working directory and environment, so commands start at once
+    while staying as isolated as separate invocations.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        if not hasattr(socket, "AF_UNIX") or not hasattr(os, "fork"):
+            raise RuntimeError("The daemon needs Unix domain sockets and fork.")
+        self.path = path or socket_path()
+        self._configs: dict[tuple[Any, ...], GitAiConfig] = {}
+        self._children: set[int] = set()
+        self._server: socket.socket | None = None
+
+    def serve(self) -> None:
+        """Accept commands until interrupted; the socket is removed on the way out."""
+        for name in PRELOAD:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue
+
+        if self._server is None:
+            self.listen()
+        assert self._server is not None
+        try:
+            while True:
+                connection, _ = self._server.accept()
+                with connection:
+                    self._handle(connection)
+                self._reap()
+        finally:
+            self._server.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def listen(self) -> None:
+        """Bind the socket, replacing one a crashed daemon left behind."""
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not is_private_directory(directory):
+            # Another user could have created it to receive our clients' terminals and keys
+            raise RuntimeError(
+                f"Refusing to listen in {directory}: it must be a directory owned by you "
+                "with mode 0700."
+            )
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with probe:
+            try:
+                probe.connect(self.path)
+            except OSError:
+                # Left behind by a daemon that did not shut down cleanly
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+            else:
+                raise RuntimeError(f"A git-ai daemon is already listening on {self.path}.")
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen(16)
+        self._server = server
+
+    def _handle(self, connection: socket.socket) -> None:
+        if not _same_user(connection):
+            return
+        connection.settimeout(RECEIVE_TIMEOUT)
+        try:
+            request, fds = _receive(connection)
+        except (OSError, ValueError):
+            return
+        try:
+            if request.get("version") != __version__:
+                connection.sendall(b'{"outdated": true}\n')
+                return
+            connection.settimeout(None)
+            config = self._warm(request["cwd"], request["env"])
+            pid = os.fork()
+            if pid == 0:
+                # Never return into the accept loop from a child
+                code = 1
+                try:
+                    code = self._run(connection, request, fds, config)
+                finally:
+                    # os._exit skips atexit, which would stop the command's CLI sessions
+                    close_shared_clients()
+                    os._exit(code)
+            self._children.add(pid)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def _warm(self, cwd: str, env: dict[str, str]) -> GitAiConfig | None:
+        """Parse the repository's config once and build its provider client in this process."""
+        from git_ai.services.factory import resolve_ai_service
+
+        config_path = find_config_file(cwd)
+        key = (
+            config_path,
+            config_path.stat().st_mtime_ns if config_path else None,
+            tuple(sorted((k, v) for k, v in env.items() if k.startswith("GIT_AI_"))),
+        )
+        with _environment(env):
+            config = self._configs.get(key)
+            if config is None:
+                try:
+                    config = load_config(cwd)
+                except (OSError, ValueError):
+                    # The command reports the error itself
+                    return None
+                if len(self._configs) >= MAX_CONFIGS:
+                    self._configs.clear()
+                self._configs[key] = config
+            try:
+                # Clients land in the shared registry, which every child inherits
+                resolve_ai_service(config)
+            except RuntimeError:
+                pass
+        return config
+
+    def _run(
+        self,
+        connection: socket.socket,
+        request: dict[str, Any],
+        fds: list[int],
+        config: GitAiConfig | None,
+    ) -> int:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        if self._server is not None:
+            self._server.close()
+        # Leave the daemon's session so the client's terminal behaves as if the command were local
+        os.setsid()
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.stdin = open(0, encoding="utf-8", closefd=False)
+        sys.stdout = open(1, "w", buffering=1, encoding="utf-8", closefd=False)
+        sys.stderr = open(
+            2, "w", buffering=1, encoding="utf-8", errors="backslashreplace", closefd=False
+        )
+        connection.sendall(json.dumps({"pid": os.getpid()}).encode() + b"\n")
+
+        code = _run_command(request["argv"], config)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            connection.sendall(json.dumps({"exit": code}).encode() + b"\n")
+        except OSError:
+            pass
+        return code
+
+    def _reap(self) -> None:
+        for pid in list(self._children):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                self._children.discard(pid)
+
+
+def _run_command(argv: list[str], config: GitAiConfig | None) -> int:
+    from rich.console import Console
+
+    import git_ai.config
+    from git_ai import cli
+
+    # The console detected the daemon's terminal when it was created
+    cli.console = Console()
+    if config is not None:
+        git_ai.config.load_config = lambda start_dir=None: config
+    try:
+        cli.app(args=argv, prog_name="git-ai")
+    except SystemExit as e:
+        match e.code:
+            case None:
+                return 0
+            case int(code):
+                return code
+            case message:
+                print(message, file=sys.stderr)
+                return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def _receive(connection: socket.socket) -> tuple[dict[str, Any], list[int]]:
+    data, fds, _, _ = socket.recv_fds(connection, 64 * 1024, 3)
+    try:
+        while len(data) < HEADER.size:
+            data += _recv(connection)
+        (length,) = HEADER.unpack_from(data)
+        if length > MAX_REQUEST_BYTES:
+            raise ValueError("Request too large.")
+        while len(data) < HEADER.size + length:
+            data += _recv(connection)
+        if len(fds) != 3:
+            raise ValueError("Expected the client's stdin, stdout and stderr.")
+        request = json.loads(data[HEADER.size : HEADER.size + length])
+    except BaseException:
+        for fd in fds:
+            os.close(fd)
+        raise
+    return request, fds
+
+
+def _recv(connection: socket.socket) -> bytes:
+    if not (chunk := connection.recv(64 * 1024)):
+        raise ValueError("The client disconnected mid-request.")
+    return chunk
+
+
+def _same_user(connection: socket.socket) -> bool:
+    """Whether the peer runs as this user; the socket's directory already restricts access."""
+    return (uid := peer_uid(connection)) is None or uid == os.getuid()
+
+
+@contextmanager
+def _environment(env: dict[str, str]) -> Iterator[None]:
+    """Swap in the client's environment, which config and provider clients read."""
+    saved = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
@@ -1,6 +1,22 @@
 """Services for Git AI."""
 
-from git_ai.services.ai_service import AiService
-from git_ai.services.git_service import GitService
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from git_ai.services.ai_service import AiService
+    from git_ai.services.git_service import GitService
 
 __all__ = ["AiService", "GitService"]
+
+_EXPORTS = {
+    "AiService": "git_ai.services.ai_service",
+    "GitService": "git_ai.services.git_service",
+}
+
+
+def __getattr__(name: str) -> Any:
+    # Importing one service should not pull in the others' dependencies
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name]), name)
@@ -1,26 +1,255 @@
 """Contract for AI service implementations."""
 
+import asyncio
+import json
+import re
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Generator
+from contextlib import closing
+from dataclasses import dataclass, replace
 from typing import Any
 
+from git_ai.agents.prompts import (
+    PROMPT_VERSION,
+    PromptParts,
+    build_changelog_entries_prompt_parts,
+    build_changelog_prompt_parts,
+    build_commit_prompt_parts,
+    build_file_summary_prompt_parts,
+)
+from git_ai.config import GitAiConfig
+from git_ai.support.json_stream import JsonStreamParser
+from git_ai.support.response_cache import ResponseCache
+
+COMMIT_KEYS = ["type", "scope", "description", "body", "is_breaking_change"]
+CHANGELOG_KEYS = ["sections"]
+CHANGELOG_ENTRY_KEYS = ["entries"]
+FILE_SUMMARY_KEYS = ["files"]
+
+StreamCallback = Callable[[dict[str, Any], dict[str, str]], None]
+"""Receives the completed fields and the string fields still arriving."""
+
+
+@dataclass(frozen=True)
+class UsageStats:
+    """Token usage a provider reported for one call, including its prompt cache."""
+
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    seconds: float = 0.0
+    first_token_seconds: float | None = None
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        """Share of the input tokens that were read from the provider's cache."""
+        return self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0
+
 
 class AiService(ABC):
-    """Defines the operations that any AI provider must support."""
+    """
+    Defines the operations that any AI provider must support.
 
-    @abstractmethod
-    def generate_commit_message(self, diff: str) -> dict[str, Any]:
+    Providers only implement `_call`, which sends one prompt and returns the
+    raw text. Prompt building, response caching and JSON parsing are shared.
+    Prompts arrive split into an instruction prefix and a per-call suffix so
+    providers can cache the prefix; `_call` records what the provider billed
+    in `last_usage`. Providers that can stream also implement `_stream`, and
+    those with a native async client implement `_acall`. The `last_*`
+    attributes describe the latest call, so they are only meaningful while
+    calls on one instance do not overlap.
+    """
+
+    provider = "abstract"
+    default_model = "default"
+
+    def __init__(self, config: GitAiConfig, cache: ResponseCache | None = None) -> None:
+        self.config = config
+        self.cache = cache
+        self.last_from_cache = False
+        self.last_usage: UsageStats | None = None
+
+    @property
+    def model(self) -> str:
+        return self.config.model or self.default_model
+
+    def generate_commit_message(
+        self, diff: str, fresh: bool = False, on_update: StreamCallback | None = None
+    ) -> dict[str, Any]:
         """
         Generate a commit message from a git diff.
 
-        Returns dict with keys: type, scope, description, body, is_breaking_change
+        Returns dict with keys: type, scope, description, body, is_breaking_change.
+        A cached response for the same prompt is reused unless `fresh` is set.
+        With `on_update`, the response is streamed and the callback sees each
+        field as soon as it completes.
         """
-        ...
+        return self._generate(self._commit_prompt(diff), COMMIT_KEYS, fresh, on_update)
 
-    @abstractmethod
-    def generate_changelog(self, prompt: str) -> dict[str, Any]:
+    def generate_changelog(self, prompt: str, fresh: bool = False) -> dict[str, Any]:
         """
         Generate changelog sections from grouped commits.
 
         Returns dict with key: sections (list of {type, entries})
         """
+        full_prompt = build_changelog_prompt_parts(prompt, self.config.language)
+        return self._generate(full_prompt, CHANGELOG_KEYS, fresh)
+
+    async def agenerate_commit_message(
+        self, diff: str, fresh: bool = False, temperature: float | None = None
+    ) -> dict[str, Any]:
+        """
+        Async counterpart of `generate_commit_message`, for running many at once.
+
+        `temperature` overrides the provider's default sampling temperature,
+        which spreads out concurrent candidates; it is part of the cache key.
+        """
+        return await self._agenerate(self._commit_prompt(diff), COMMIT_KEYS, fresh, temperature)
+
+    async def agenerate_changelog(self, prompt: str, fresh: bool = False) -> dict[str, Any]:
+        """Async counterpart of `generate_changelog`."""
+        full_prompt = build_changelog_prompt_parts(prompt, self.config.language)
+        return await self._agenerate(full_prompt, CHANGELOG_KEYS, fresh)
+
+    async def agenerate_changelog_entries(self, prompt: str, fresh: bool = False) -> dict[str, Any]:
+        """
+        Rewrite each commit of a listing whose lines start with `[id]` as a changelog entry.
+
+        Returns dict with key: entries (list of {id, entry})
+        """
+        full_prompt = build_changelog_entries_prompt_parts(prompt, self.config.language)
+        return await self._agenerate(full_prompt, CHANGELOG_ENTRY_KEYS, fresh)
+
+    async def agenerate_file_summaries(self, diff: str, fresh: bool = False) -> dict[str, Any]:
+        """
+        Summarize each file of a part of a diff too large to send whole.
+
+        Returns dict with key: files (list of {path, summary})
+        """
+        prompt = build_file_summary_prompt_parts(diff)
+        return await self._agenerate(prompt, FILE_SUMMARY_KEYS, fresh)
+
+    @abstractmethod
+    def _call(self, prompt: PromptParts) -> str:
+        """Send the prompt to the provider and return the raw response text."""
         ...
+
+    def _stream(self, prompt: PromptParts) -> Generator[str]:
+        """Yield the response text as it arrives; providers that cannot stream yield it once."""
+        yield self._call(prompt)
+
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        """
+        Async `_call`; without a native async client it runs in a worker thread.
+
+        Providers without sampling control ignore `temperature`.
+        """
+        return await asyncio.to_thread(self._call, prompt)
+
+    def _commit_prompt(self, diff: str) -> PromptParts:
+        return build_commit_prompt_parts(
+            diff=diff,
+            language=self.config.language,
+            allowed_scopes=self.config.scopes,
+            allowed_types=self.config.types,
+            body_preference=self.config.commit.body,
+        )
+
+    def _generate(
+        self,
+        prompt: PromptParts,
+        required_keys: list[str],
+        fresh: bool,
+        on_update: StreamCallback | None = None,
+    ) -> dict[str, Any]:
+        key = self._start(prompt)
+        if (data := self._from_cache(key, required_keys, fresh)) is not None:
+            return data
+
+        started = time.monotonic()
+        first_token = None
+        if on_update is None:
+            response = self._call(prompt)
+        else:
+            parser = JsonStreamParser()
+            chunks: list[str] = []
+            # Closing the stream on Ctrl+C ends the provider request too
+            with closing(self._stream(prompt)) as stream:
+                for chunk in stream:
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                    chunks.append(chunk)
+                    if parser.feed(chunk):
+                        on_update(parser.fields, parser.partial)
+            response = "".join(chunks)
+        self._time_usage(started, first_token)
+        return self._store(key, response, required_keys)
+
+    async def _agenerate(
+        self,
+        prompt: PromptParts,
+        required_keys: list[str],
+        fresh: bool,
+        temperature: float | None = None,
+    ) -> dict[str, Any]:
+        key = self._start(prompt, temperature)
+        if (data := self._from_cache(key, required_keys, fresh)) is not None:
+            return data
+
+        started = time.monotonic()
+        response = await self._acall(prompt, temperature)
+        self._time_usage(started, None)
+        return self._store(key, response, required_keys)
+
+    def _start(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        """Reset the per-call state and return the cache key for the prompt."""
+        self.last_from_cache = False
+        self.last_usage = None
+        parts = [self.provider, self.model, PROMPT_VERSION, prompt.text]
+        if temperature is not None:
+            parts.append(f"temperature={temperature}")
+        return ResponseCache.key(*parts)
+
+    def _from_cache(self, key: str, required_keys: list[str], fresh: bool) -> dict[str, Any] | None:
+        if self.cache is None or fresh or (cached := self.cache.get(key)) is None:
+            return None
+        try:
+            data = self._parse_json(cached, required_keys)
+        except RuntimeError:
+            return None
+        self.last_from_cache = True
+        return data
+
+    def _time_usage(self, started: float, first_token: float | None) -> None:
+        if self.last_usage is not None:
+            self.last_usage = replace(
+                self.last_usage,
+                seconds=time.monotonic() - started,
+                first_token_seconds=first_token,
+            )
+
+    def _store(self, key: str, response: str, required_keys: list[str]) -> dict[str, Any]:
+        data = self._parse_json(response, required_keys)
+        # Only responses that parsed are worth replaying
+        if self.cache is not None:
+            self.cache.put(key, response)
+        return data
+
+    def _parse_json(self, text: str, required_keys: list[str]) -> dict[str, Any]:
+        text = re.sub(r"^```(?:json)?\s*\n?", "", text, flags=re.MULTILINE)
+        text = re.sub(r"\n?```\s*$", "", text, flags=re.MULTILINE)
+        text = text.strip()
+
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise RuntimeError(
+                f"Failed to parse AI response as JSON: {e}\nResponse: {text[:500]}"
+            ) from e
+
+        for key in required_keys:
+            if key not in data:
+                raise RuntimeError(f'AI response missing required key: "{key}".')
+        return data
@@ -1,70 +1,78 @@
 """AI service implementation using the Anthropic API."""
 
-import json
 import os
-import re
+from collections.abc import Generator
 from typing import Any
 
 import anthropic
 
-from git_ai.agents.prompts import build_changelog_prompt, build_commit_prompt
+from git_ai.agents.prompts import PromptParts
 from git_ai.config import GitAiConfig
-from git_ai.services.ai_service import AiService
+from git_ai.services.ai_service import AiService, UsageStats
+from git_ai.services.factory import shared_async_client, shared_client
+from git_ai.support.response_cache import ResponseCache
 
 
 class AnthropicAiService(AiService):
     """Uses the Anthropic Claude API to generate commit messages and changelogs."""
 
-    def __init__(self, config: GitAiConfig) -> None:
-        self.config = config
+    provider = "anthropic"
+    default_model = "claude-sonnet-4-20250514"
+
+    def __init__(self, config: GitAiConfig, cache: ResponseCache | None = None) -> None:
+        super().__init__(config, cache)
         api_key = os.environ.get("ANTHROPIC_API_KEY", "")
         if not api_key:
             raise RuntimeError(
                 "ANTHROPIC_API_KEY environment variable is not set. "
                 "Please set it or run 'git-ai setup' to configure."
             )
-        self.client = anthropic.Anthropic(api_key=api_key)
-
-    def generate_commit_message(self, diff: str) -> dict[str, Any]:
-        prompt = build_commit_prompt(
-            diff=diff,
-            language=self.config.language,
-            allowed_scopes=self.config.scopes,
-            allowed_types=self.config.types,
-            body_preference=self.config.commit.body,
-        )
-        response = self._call(prompt)
-        return self._parse_json(
-            response, ["type", "scope", "description", "body", "is_breaking_change"]
+        self.api_key = api_key
+        self.client = shared_client(
+            ("anthropic", api_key), lambda: anthropic.Anthropic(api_key=api_key)
         )
 
-    def generate_changelog(self, prompt: str) -> dict[str, Any]:
-        full_prompt = build_changelog_prompt(prompt, self.config.language)
-        response = self._call(full_prompt)
-        return self._parse_json(response, ["sections"])
+    def _call(self, prompt: PromptParts) -> str:
+        message = self.client.messages.create(**self._request(prompt))
+        self._record_usage(message.usage)
+        return message.content[0].text
 
-    def _call(self, prompt: str) -> str:
-        model = self.config.model or "claude-sonnet-4-20250514"
-        message = self.client.messages.create(
-            model=model,
-            max_tokens=1024,
-            messages=[{"role": "user", "content": prompt}],
-        )
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        message = await self._async_client().messages.create(**self._request(prompt, temperature))
+        self._record_usage(message.usage)
         return message.content[0].text
 
-    def _parse_json(self, text: str, required_keys: list[str]) -> dict[str, Any]:
-        text = re.sub(r"^```(?:json)?\s*\n?", "", text, flags=re.MULTILINE)
-        text = re.sub(r"\n?```\s*$", "", text, flags=re.MULTILINE)
-        text = text.strip()
+    def _stream(self, prompt: PromptParts) -> Generator[str]:
+        with self.client.messages.stream(**self._request(prompt)) as stream:
+            yield from stream.text_stream
+            self._record_usage(stream.get_final_message().usage)
 
-        try:
-            data = json.loads(text)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(
-                f"Failed to parse AI response as JSON: {e}\nResponse: {text[:500]}"
-            ) from e
+    def _async_client(self) -> anthropic.AsyncAnthropic:
+        return shared_async_client(
+            ("anthropic", self.api_key), lambda: anthropic.AsyncAnthropic(api_key=self.api_key)
+        )
 
-        for key in required_keys:
-            if key not in data:
-                raise RuntimeError(f'AI response missing required key: "{key}".')
-        return data
+    def _request(self, prompt: PromptParts, temperature: float | None = None) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": self.config.max_output_tokens,
+            # The instructions only change with the config, so the API can reuse them
+            "system": [
+                {"type": "text", "text": prompt.prefix, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [{"role": "user", "content": prompt.suffix}],
+            "timeout": self.config.timeout,
+        }
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+
+    def _record_usage(self, usage: anthropic.types.Usage) -> None:
+        cache_read = usage.cache_read_input_tokens or 0
+        cache_write = usage.cache_creation_input_tokens or 0
+        self.last_usage = UsageStats(
+            input_tokens=usage.input_tokens + cache_read + cache_write,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write,
+        )
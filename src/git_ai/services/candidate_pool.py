@@ -0,0 +1,141 @@
+"""Concurrent generation of commit message candidates."""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from contextlib import suppress
+from typing import Any, Self
+
+from git_ai.services.ai_service import AiService
+from git_ai.services.factory import aclose_shared_clients
+
+CANDIDATE_TEMPERATURES = (0.4, 0.7, 1.0)
+"""Sampling temperatures cycled through after the first, default-temperature candidate."""
+
+FOLLOWER_WAIT = 3.0
+"""Seconds to wait for more candidates once one is ready; later ones serve regenerate."""
+
+
+class CandidatePool:
+    """
+    Generates commit message candidates ahead of the user.
+
+    The first `size` generations are sent at once on an event loop running in
+    a background thread. Every candidate taken is replaced by a new request,
+    so the next regenerate is usually already answered. The first candidate
+    uses the provider's default temperature and may come from the response
+    cache; the rest skip it and cycle through CANDIDATE_TEMPERATURES.
+    Candidates repeating a title already seen are dropped and retried, at
+    most `size` times over the pool's life.
+    """
+
+    def __init__(self, ai: AiService, diff: str, size: int) -> None:
+        if size < 1:
+            raise ValueError(f"Invalid candidate count: {size}. Must be at least 1.")
+        self.ai = ai
+        self.diff = diff
+        self.size = size
+        self._submitted = 0
+        self._pending: set[Future] = set()
+        self._unused: list[dict[str, Any]] = []
+        self._titles: set[tuple[str, str, str]] = set()
+        self._error: Exception | None = None
+        self._retries_left = size
+        self._condition = threading.Condition()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        with self._condition:
+            self._top_up()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def wait(self, count: int, timeout: float | None = None) -> list[dict[str, Any]]:
+        """
+        Block until `count` unused candidates are ready or nothing is left in flight.
+
+        Candidates are listed in the order they arrived. After `timeout`
+        seconds, whatever is ready is returned, if anything is.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self._unused) >= count or not self._pending, timeout
+            )
+            if not self._unused:
+                if self._error is not None:
+                    raise RuntimeError(str(self._error)) from self._error
+                raise RuntimeError("The AI kept suggesting messages that were already shown.")
+            return list(self._unused)
+
+    def take(self, candidate: dict[str, Any]) -> dict[str, Any]:
+        """Mark a candidate as used and request a replacement in the background."""
+        with self._condition:
+            self._unused.remove(candidate)
+            self._top_up()
+        return candidate
+
+    def next(self) -> dict[str, Any]:
+        """The next unused candidate, waiting only if none is ready yet."""
+        return self.take(self.wait(1)[0])
+
+    def close(self) -> None:
+        with self._condition:
+            pending = list(self._pending)
+            self._pending.clear()
+        for future in pending:
+            future.cancel()
+        if self._thread.is_alive():
+            # Clients are tied to this loop, so they are closed before it stops
+            with suppress(Exception):
+                asyncio.run_coroutine_threadsafe(aclose_shared_clients(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop.close()
+
+    def _top_up(self) -> None:
+        """Keep `size` candidates ready or in flight. Call with the condition held."""
+        while len(self._unused) + len(self._pending) < self.size:
+            index = self._submitted
+            self._submitted += 1
+            future = asyncio.run_coroutine_threadsafe(
+                self.ai.agenerate_commit_message(
+                    self.diff, fresh=index > 0, temperature=_temperature(index)
+                ),
+                self._loop,
+            )
+            self._pending.add(future)
+            future.add_done_callback(self._collect)
+
+    def _collect(self, future: Future) -> None:
+        with self._condition:
+            if future not in self._pending:
+                return
+            self._pending.discard(future)
+            if future.cancelled():
+                pass
+            elif (error := future.exception()) is not None:
+                self._error = error if isinstance(error, Exception) else RuntimeError(str(error))
+            else:
+                response = future.result()
+                title = (
+                    str(response.get("type", "")),
+                    str(response.get("scope", "")),
+                    str(response.get("description", "")),
+                )
+                if title not in self._titles:
+                    self._titles.add(title)
+                    self._unused.append(response)
+                elif self._retries_left > 0:
+                    self._retries_left -= 1
+                    self._top_up()
+            self._condition.notify_all()
+
+
+def _temperature(index: int) -> float | None:
+    if index == 0:
+        return None
+    return CANDIDATE_TEMPERATURES[(index - 1) % len(CANDIDATE_TEMPERATURES)]
@@ -0,0 +1,80 @@
+"""Map-reduce changelog generation for commit ranges too large for one prompt."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from git_ai.services.ai_service import AiService
+from git_ai.services.concurrency import gather_bounded
+from git_ai.support.changelog_batches import merge_sections
+
+
+def generate_changelog_sections(
+    ai: AiService,
+    prompts: list[str],
+    concurrency: int,
+    on_done: Callable[[int], None] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Summarize each batch prompt and merge the results into one list of sections.
+
+    At most `concurrency` batches are in flight at a time, and `on_done`
+    receives the index of every batch as it completes. Each batch goes
+    through the response cache on its own, so a rerun after a failure only
+    pays for the batches that did not finish.
+    """
+    responses = _run(ai.agenerate_changelog, prompts, concurrency, on_done)
+    return merge_sections(response.get("sections", []) for response in responses)
+
+
+def generate_release_sections(
+    ai: AiService,
+    prompts: list[list[str]],
+    concurrency: int,
+    on_done: Callable[[int], None] | None = None,
+) -> list[list[dict[str, Any]]]:
+    """
+    Summarize the batch prompts of several releases at once, one list of sections per release.
+
+    Every batch of every release shares the one pool of `concurrency`
+    requests, so a release with a single batch never waits for a long one;
+    `on_done` receives the position of each batch among all of them.
+    """
+    flat = [prompt for release in prompts for prompt in release]
+    responses = _run(ai.agenerate_changelog, flat, concurrency, on_done)
+    sections = []
+    start = 0
+    for release in prompts:
+        batch = responses[start : start + len(release)]
+        sections.append(merge_sections(response.get("sections", []) for response in batch))
+        start += len(release)
+    return sections
+
+
+def generate_changelog_entries(
+    ai: AiService,
+    prompts: list[str],
+    concurrency: int,
+    on_done: Callable[[int], None] | None = None,
+) -> dict[str, str]:
+    """
+    Rewrite the commits of each batch prompt as changelog entries, keyed by their ids.
+
+    Runs like `generate_changelog_sections`; entries without an id or text
+    are dropped, so a commit the AI skipped is simply missing.
+    """
+    entries: dict[str, str] = {}
+    for response in _run(ai.agenerate_changelog_entries, prompts, concurrency, on_done):
+        for item in response.get("entries", []):
+            if isinstance(item, dict) and item.get("id") and item.get("entry"):
+                entries[str(item["id"])] = str(item["entry"])
+    return entries
+
+
+def _run(
+    call: Callable[[str], Awaitable[dict[str, Any]]],
+    prompts: list[str],
+    concurrency: int,
+    on_done: Callable[[int], None] | None,
+) -> list[dict[str, Any]]:
+    return asyncio.run(gather_bounded(call, prompts, concurrency, on_done))
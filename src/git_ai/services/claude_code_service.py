@@ -1,14 +1,23 @@
 """AI service implementation using Claude Code CLI."""
 
+import asyncio
+import atexit
 import json
-import re
 import shutil
 import subprocess
+import tempfile
+import threading
+from collections.abc import Generator, Iterator
+from contextlib import closing, suppress
 from typing import Any
 
-from git_ai.agents.prompts import build_changelog_prompt, build_commit_prompt
+from git_ai.agents.prompts import PromptParts
 from git_ai.config import GitAiConfig
-from git_ai.services.ai_service import AiService
+from git_ai.services.ai_service import AiService, UsageStats
+from git_ai.services.factory import shared_client
+from git_ai.support.response_cache import ResponseCache
+
+CLOSE_TIMEOUT = 5.0
 
 
 class ClaudeCodeAiService(AiService):
@@ -16,78 +25,286 @@ class ClaudeCodeAiService(AiService):
     Invokes the `claude` CLI installed on the user's machine.
 
     Allows usage through an existing Claude subscription without requiring
-    a separate API key.
+    a separate API key. Prompts go over stdin, so large diffs never hit the
+    argument length limit. Once a kind of prompt repeats, as with
+    candidates and changelog batches, the next CLI is started ahead of
+    time so those calls do not wait for it to start.
     """
 
-    def __init__(self, config: GitAiConfig) -> None:
-        self.config = config
+    provider = "claude-code"
 
-    def generate_commit_message(self, diff: str) -> dict[str, Any]:
-        prompt = build_commit_prompt(
-            diff=diff,
-            language=self.config.language,
-            allowed_scopes=self.config.scopes,
-            allowed_types=self.config.types,
-            body_preference=self.config.commit.body,
-        )
-        result = self._run_claude(prompt)
-        return self._parse_json(
-            result, ["type", "scope", "description", "body", "is_breaking_change"]
-        )
+    def __init__(self, config: GitAiConfig, cache: ResponseCache | None = None) -> None:
+        super().__init__(config, cache)
+        self.sessions = shared_client(("claude-code",), ClaudeSessionPool)
 
-    def generate_changelog(self, prompt: str) -> dict[str, Any]:
-        full_prompt = build_changelog_prompt(prompt, self.config.language)
-        result = self._run_claude(full_prompt)
-        return self._parse_json(result, ["sections"])
+    def _call(self, prompt: PromptParts) -> str:
+        return self._answer(self._session(prompt), prompt)
 
-    def _run_claude(self, prompt: str) -> str:
-        self._ensure_claude_cli_exists()
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        # The CLI has no sampling options, so temperature is ignored
+        session = self._session(prompt)
+        try:
+            return await asyncio.to_thread(self._answer, session, prompt)
+        except asyncio.CancelledError:
+            # The worker thread sees the CLI go away and hands the session back
+            session.kill()
+            raise
 
-        command = ["claude", "-p", prompt, "--output-format", "json", "--max-turns", "1"]
+    def _answer(self, session: "ClaudeSession", prompt: PromptParts) -> str:
+        # The result event always comes last
+        return self._read_result(list(self._turn(session, prompt))[-1])
 
-        if self.config.model:
-            command.extend(["--model", self.config.model])
+    def _stream(self, prompt: PromptParts) -> Generator[str]:
+        streamed = False
+        with closing(self._turn(self._session(prompt), prompt)) as events:
+            for event in events:
+                if event.get("type") == "result":
+                    text = self._read_result(event)
+                    # The result repeats the streamed text; yield it when no delta carried it
+                    if not streamed:
+                        yield text
+                elif text := _text_delta(event):
+                    streamed = True
+                    yield text
 
-        result = subprocess.run(command, capture_output=True, text=True)
+    def _turn(self, session: "ClaudeSession", prompt: PromptParts) -> Generator[dict[str, Any]]:
+        """The session's events for one prompt; the session is closed after."""
+        try:
+            yield from session.ask(prompt.suffix, self.config.timeout)
+        finally:
+            self.sessions.release(session)
 
-        if result.returncode != 0:
+    def _read_result(self, event: dict[str, Any]) -> str:
+        if event.get("is_error"):
             raise RuntimeError(
-                f"Claude Code CLI failed (exit code {result.returncode}): "
-                f"{(result.stderr or result.stdout).strip()}"
+                f"Claude Code CLI failed: {event.get('result') or event.get('subtype')}"
             )
-
-        try:
-            cli_response = json.loads(result.stdout)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"Failed to parse Claude Code CLI output: {e}") from e
-
-        if "result" not in cli_response:
+        if "result" not in event:
             raise RuntimeError(
                 'Unexpected Claude Code CLI response format: missing "result" field.'
             )
+        if isinstance(usage := event.get("usage"), dict):
+            self.last_usage = _usage_stats(usage)
+        result: str = event["result"]
+        return result
 
-        return cli_response["result"]
-
-    def _parse_json(self, text: str, required_keys: list[str]) -> dict[str, Any]:
-        text = re.sub(r"^```(?:json)?\s*\n?", "", text, flags=re.MULTILINE)
-        text = re.sub(r"\n?```\s*$", "", text, flags=re.MULTILINE)
-        text = text.strip()
-
-        try:
-            data = json.loads(text)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(
-                f"Failed to parse AI response as JSON: {e}\nResponse: {text[:500]}"
-            ) from e
+    def _session(self, prompt: PromptParts) -> "ClaudeSession":
+        return self.sessions.acquire(self._command(prompt))
 
-        for key in required_keys:
-            if key not in data:
-                raise RuntimeError(f'AI response missing required key: "{key}".')
-        return data
+    def _command(self, prompt: PromptParts) -> tuple[str, ...]:
+        command = [
+            self._ensure_claude_cli_exists(),
+            "-p",
+            "--input-format",
+            "stream-json",
+            "--output-format",
+            "stream-json",
+            "--verbose",
+            "--include-partial-messages",
+            "--append-system-prompt",
+            prompt.prefix,
+            "--max-turns",
+            "1",
+        ]
+        if self.config.model:
+            command.extend(["--model", self.config.model])
+        return tuple(command)
 
-    def _ensure_claude_cli_exists(self) -> None:
-        if shutil.which("claude") is None:
+    def _ensure_claude_cli_exists(self) -> str:
+        if (path := shutil.which("claude")) is None:
             raise RuntimeError(
                 "Claude Code CLI not found. Please install it first: "
                 "https://docs.anthropic.com/en/docs/claude-code"
             )
+        return path
+
+
+class ClaudeSession:
+    """
+    A `claude -p` process that reads a prompt from stdin as stream-json.
+
+    The CLI answers a user message with its events and a final result
+    event. Every later message would continue the same conversation, so a
+    session answers a single prompt and the next one gets a fresh process.
+    """
+
+    def __init__(self, command: tuple[str, ...]) -> None:
+        self.command = command
+        self.asked = False
+        self.answering = False
+        self.timed_out = False
+        # A file rather than a pipe, so a chatty CLI never blocks on a full stderr buffer
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the CLI is running and has not been asked anything yet."""
+        return not self.asked and self._process.poll() is None
+
+    def ask(self, text: str, timeout: float | None = None) -> Iterator[dict[str, Any]]:
+        """
+        Send one prompt and yield the CLI's events, ending with the result event.
+
+        A CLI that has not finished answering after `timeout` seconds is killed.
+        """
+        assert self._process.stdin is not None and self._process.stdout is not None
+        if self.asked:
+            raise RuntimeError("A Claude Code session answers a single prompt.")
+        self.asked = True
+        self.answering = True
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, self._expire)
+            timer.daemon = True
+            timer.start()
+        message = {"type": "user", "message": {"role": "user", "content": text}}
+        try:
+            try:
+                self._process.stdin.write(json.dumps(message) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                # The CLI is gone; its exit status says why
+                pass
+            else:
+                for line in self._process.stdout:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if event.get("type") == "result":
+                        self.answering = False
+                    yield event
+                    if not self.answering:
+                        return
+        finally:
+            if timer is not None:
+                timer.cancel()
+        if self.timed_out:
+            self.answering = False
+            raise RuntimeError(f"Claude Code CLI did not answer within {timeout:g} seconds.")
+        raise self._failure()
+
+    def _expire(self) -> None:
+        self.timed_out = True
+        self.kill()
+
+    def kill(self) -> None:
+        """Stop the CLI mid-answer; safe to call from another thread."""
+        with suppress(OSError):
+            self._process.kill()
+
+    def close(self) -> None:
+        """
+        End the CLI's input and wait for it to exit.
+
+        One still answering is killed, and one never asked anything is
+        terminated, since it has nothing to finish.
+        """
+        if self.answering:
+            self.kill()
+        elif not self.asked:
+            with suppress(OSError):
+                self._process.terminate()
+        if self._process.stdin is not None:
+            with suppress(OSError):
+                self._process.stdin.close()
+        try:
+            self._process.wait(CLOSE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            self._process.wait()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+        self._stderr.close()
+
+    def _failure(self) -> RuntimeError:
+        self.answering = False
+        try:
+            returncode = self._process.wait(CLOSE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            returncode = self._process.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace")
+        return RuntimeError(f"Claude Code CLI failed (exit code {returncode}): {stderr.strip()}")
+
+
+class ClaudeSessionPool:
+    """
+    Claude Code sessions started ahead of time, keyed by their command line.
+
+    Once a command is asked for a second time, handing out a session starts
+    the next one for it, so it is ready by the time the following prompt of
+    that kind arrives. A single prompt, like a plain commit, only ever
+    launches one CLI, and no conversation ever carries one prompt into
+    another. Concurrent
+    prompts each take their own session, so async generation still runs in
+    parallel. The system prompt and model are part of the command, so a
+    session only answers the kind of prompt it was started for.
+    """
+
+    def __init__(self) -> None:
+        self._idle: dict[tuple[str, ...], list[ClaudeSession]] = {}
+        self._asked: set[tuple[str, ...]] = set()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def acquire(self, command: tuple[str, ...]) -> ClaudeSession:
+        stale = []
+        session = None
+        with self._lock:
+            idle = self._idle.setdefault(command, [])
+            while idle and session is None:
+                candidate = idle.pop()
+                if candidate.fresh:
+                    session = candidate
+                else:
+                    stale.append(candidate)
+            if not idle and command in self._asked:
+                idle.append(ClaudeSession(command))
+            self._asked.add(command)
+        for candidate in stale:
+            candidate.close()
+        return session or ClaudeSession(command)
+
+    def release(self, session: ClaudeSession) -> None:
+        session.close()
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = [session for idle in self._idle.values() for session in idle]
+            self._idle.clear()
+            self._asked.clear()
+        for session in sessions:
+            session.close()
+
+
+def _text_delta(event: dict) -> str:
+    """The text a stream-json partial message adds, if any."""
+    if event.get("type") != "stream_event":
+        return ""
+    inner = event.get("event") or {}
+    delta = inner.get("delta") or {}
+    if inner.get("type") == "content_block_delta" and delta.get("type") == "text_delta":
+        return delta.get("text") or ""
+    return ""
+
+
+def _usage_stats(usage: dict) -> UsageStats:
+    cache_read = usage.get("cache_read_input_tokens") or 0
+    cache_write = usage.get("cache_creation_input_tokens") or 0
+    return UsageStats(
+        input_tokens=(usage.get("input_tokens") or 0) + cache_read + cache_write,
+        output_tokens=usage.get("output_tokens") or 0,
+        cache_read_tokens=cache_read,
+        cache_write_tokens=cache_write,
+    )
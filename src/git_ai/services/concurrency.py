@@ -0,0 +1,41 @@
+"""Runs provider requests concurrently, a bounded number at a time."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+
+from git_ai.services.factory import aclose_shared_clients
+
+
+async def gather_bounded[T, R](
+    call: Callable[[T], Awaitable[R]],
+    items: Sequence[T],
+    concurrency: int,
+    on_done: Callable[[int], None] | None = None,
+) -> list[R]:
+    """
+    Await `call` on every item, at most `concurrency` at a time, results in item order.
+
+    `on_done` receives the index of every item as it completes. The first
+    failure is raised and cancels the calls still running. Shared provider
+    clients are closed before returning, as they are tied to the running loop.
+    """
+    if concurrency < 1:
+        raise ValueError(f"Invalid concurrency: {concurrency}. Must be at least 1.")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, item: T) -> R:
+        async with semaphore:
+            result = await call(item)
+        if on_done is not None:
+            on_done(index)
+        return result
+
+    tasks = [asyncio.ensure_future(run(i, item)) for i, item in enumerate(items)]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # One failure fails the whole; the other calls stop rather than run on
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await aclose_shared_clients()
@@ -0,0 +1,174 @@
+"""Map-reduce commit messages: summarize a huge staged diff file by file first."""
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from git_ai.agents.prompts import PROMPT_VERSION
+from git_ai.services.ai_service import AiService
+from git_ai.services.concurrency import gather_bounded
+from git_ai.support.diff_budget import OMITTED_MARKER
+from git_ai.support.response_cache import ResponseCache
+from git_ai.support.staged_snapshot import FilePatch, Measure, StagedFile, StagedSnapshot
+
+SUMMARIES_HEADER = (
+    "The staged changes are too large to show in full. "
+    "Instead, every changed file is listed with a summary of its diff.\n"
+)
+
+ProgressCallback = Callable[[int, int], None]
+"""Receives the number of summary calls finished and the total."""
+
+
+@dataclass(frozen=True)
+class FileDiff:
+    """One staged file and its patch, cut to fit a single summary call."""
+
+    file: StagedFile
+    text: str
+
+
+class DiffSummarizer:
+    """
+    Turns a staged diff too large for one prompt into per-file summaries.
+
+    Files are packed in path order, so neighbours from the same directory
+    share a call, into parts of at most `max_size` units, and the parts are
+    summarized concurrently. Each file's summary is cached under its old and
+    new blob hashes, so after re-staging a small fix only the files whose
+    content changed are summarized again. The result replaces the diff in
+    the commit prompt, which then synthesizes the message from the summaries.
+    """
+
+    def __init__(
+        self,
+        ai: AiService,
+        max_size: int,
+        measure: Measure = len,
+        concurrency: int = 4,
+        cache: ResponseCache | None = None,
+        fingerprint: str = "",
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError(f"Invalid concurrency: {concurrency}. Must be at least 1.")
+        self.ai = ai
+        self.max_size = max_size
+        self.measure = measure
+        self.concurrency = concurrency
+        self.cache = cache
+        self.fingerprint = fingerprint
+
+    def summarize(
+        self, snapshot: StagedSnapshot, on_progress: ProgressCallback | None = None
+    ) -> str:
+        """The summaries of every staged file, as text to send in place of the diff."""
+        # A diff without any patch section, such as one of binary files only, has no patches
+        patches = snapshot.patches or tuple(FilePatch.placeholder(f) for f in snapshot.files)
+        diffs = [self._fit(f, p) for f, p in zip(snapshot.files, patches, strict=True)]
+        summaries: dict[str, str] = {}
+        pending: list[FileDiff] = []
+        for diff in diffs:
+            if (cached := self._cached(diff.file)) is not None:
+                summaries[diff.file.path] = cached
+            else:
+                pending.append(diff)
+
+        parts = self.pack(pending)
+        if on_progress is not None:
+            on_progress(0, len(parts))
+        if parts:
+            summaries.update(asyncio.run(self._summarize(parts, on_progress)))
+
+        lines = [SUMMARIES_HEADER, snapshot.stat, ""]
+        for diff in diffs:
+            file = diff.file
+            summary = summaries.get(file.path) or "No summary available."
+            lines.append(
+                f"- {file.display_path} ({file.status}, +{file.additions} -{file.deletions}): "
+                f"{summary}"
+            )
+        return "\n".join(lines)
+
+    def pack(self, diffs: list[FileDiff]) -> list[list[FileDiff]]:
+        """Group the files, in path order, into parts of at most `max_size` units."""
+        parts: list[list[FileDiff]] = []
+        part: list[FileDiff] = []
+        used = 0
+        for diff in sorted(diffs, key=lambda d: d.file.path):
+            size = self.measure(diff.text) + 1
+            if part and used + size > self.max_size:
+                parts.append(part)
+                part = []
+                used = 0
+            part.append(diff)
+            used += size
+        if part:
+            parts.append(part)
+        return parts
+
+    def _fit(self, file: StagedFile, patch: FilePatch) -> FileDiff:
+        """The file's patch, cut so that it fits one summary call on its own."""
+        header, _ = patch.render(body_limit=0, measure=self.measure)
+        limit = max(0, self.max_size - self.measure(header) - 1)
+        text, kept = patch.render(body_limit=limit, measure=self.measure)
+        total = patch.changed_lines if patch.summary is not None else file.lines_changed
+        if (omitted := total - kept) > 0 and not file.binary:
+            text += "\n" + OMITTED_MARKER.format(omitted)
+        return FileDiff(file, text)
+
+    async def _summarize(
+        self, parts: list[list[FileDiff]], on_progress: ProgressCallback | None
+    ) -> dict[str, str]:
+        finished = 0
+
+        async def summarize(part: list[FileDiff]) -> dict[str, str]:
+            response = await self.ai.agenerate_file_summaries("\n".join(diff.text for diff in part))
+            summaries = _by_path(response.get("files"))
+            for diff in part:
+                if summary := summaries.get(diff.file.path):
+                    self._store(diff.file, summary)
+            return summaries
+
+        def done(index: int) -> None:
+            nonlocal finished
+            finished += 1
+            if on_progress is not None:
+                on_progress(finished, len(parts))
+
+        results = await gather_bounded(summarize, parts, self.concurrency, done)
+        return {path: summary for result in results for path, summary in result.items()}
+
+    def _key(self, file: StagedFile) -> str:
+        return ResponseCache.key(
+            "file-summary",
+            self.ai.provider,
+            self.ai.model,
+            PROMPT_VERSION,
+            self.fingerprint,
+            file.old_path or "",
+            file.path,
+            file.old_blob,
+            file.new_blob,
+        )
+
+    def _cached(self, file: StagedFile) -> str | None:
+        if self.cache is None or not file.new_blob:
+            return None
+        return self.cache.get(self._key(file))
+
+    def _store(self, file: StagedFile, summary: str) -> None:
+        if self.cache is not None and file.new_blob:
+            self.cache.put(self._key(file), summary)
+
+
+def _by_path(files: object) -> dict[str, str]:
+    """The summaries in a response, keyed by path; malformed entries are skipped."""
+    if not isinstance(files, list):
+        return {}
+    return {
+        entry["path"]: entry["summary"]
+        for entry in files
+        if isinstance(entry, dict)
+        and isinstance(entry.get("path"), str)
+        and isinstance(entry.get("summary"), str)
+    }
@@ -1,21 +1,127 @@
 """Factory for resolving the appropriate AI service."""
 
-from git_ai.config import GitAiConfig
-from git_ai.services.ai_service import AiService
+from __future__ import annotations
 
+import threading
+import weakref
+from collections.abc import Callable
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, cast
 
-def resolve_ai_service(config: GitAiConfig) -> AiService:
-    """Resolve the AI service based on the provider configuration."""
+if TYPE_CHECKING:
+    import asyncio
+
+    from git_ai.config import GitAiConfig
+    from git_ai.services.ai_service import AiService
+    from git_ai.support.latency_history import LatencyHistory
+    from git_ai.support.response_cache import ResponseCache
+
+_clients: dict[tuple[str, ...], Any] = {}
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, ...], Any]] = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def resolve_ai_service(
+    config: GitAiConfig,
+    cache: ResponseCache | None = None,
+    history: LatencyHistory | None = None,
+) -> AiService:
+    """
+    Resolve the AI service based on the provider configuration.
+
+    With a chain of `providers`, the available ones are hedged in order and
+    `history` supplies the deadlines; providers missing credentials are
+    skipped, and only when none is usable does the first one's error surface.
+    """
+    chain = list(dict.fromkeys([config.provider, *config.providers]))
+    if len(chain) == 1:
+        return _resolve_provider(config, cache)
+
+    services: list[AiService] = []
+    errors: list[RuntimeError] = []
+    for index, provider in enumerate(chain):
+        # `model` names a model of the first provider; the others use their defaults
+        provider_config = config
+        if index > 0:
+            provider_config = config.model_copy(update={"provider": provider, "model": None})
+        try:
+            services.append(_resolve_provider(provider_config, cache))
+        except RuntimeError as e:
+            errors.append(e)
+    if not services:
+        raise errors[0]
+    if len(services) == 1:
+        return services[0]
+
+    from git_ai.services.hedged_service import HedgedAiService
+
+    return HedgedAiService(services, history)
+
+
+def _resolve_provider(config: GitAiConfig, cache: ResponseCache | None) -> AiService:
     match config.provider:
         case "claude-code":
             from git_ai.services.claude_code_service import ClaudeCodeAiService
 
-            return ClaudeCodeAiService(config)
+            return ClaudeCodeAiService(config, cache)
         case "openai":
             from git_ai.services.openai_service import OpenAiService
 
-            return OpenAiService(config)
+            return OpenAiService(config, cache)
         case _:
             from git_ai.services.anthropic_service import AnthropicAiService
 
-            return AnthropicAiService(config)
+            return AnthropicAiService(config, cache)
+
+
+def shared_client[T](key: tuple[str, ...], create: Callable[[], T]) -> T:
+    """
+    Return the process-wide client for key, creating it on first use.
+
+    Services resolved later reuse the client and its keep-alive connections
+    instead of opening a new pool for every call.
+    """
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = create()
+        return cast(T, _clients[key])
+
+
+def shared_async_client[T](key: tuple[str, ...], create: Callable[[], T]) -> T:
+    """
+    Return the async client for key on the running event loop.
+
+    Async connection pools belong to the loop that opened them, so each loop
+    gets its own clients; they are dropped together with the loop.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        if key not in clients:
+            clients[key] = create()
+        return cast(T, clients[key])
+
+
+def close_shared_clients() -> None:
+    """Close the process-wide clients, for a process that exits without running atexit."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        with suppress(Exception):
+            client.close()
+
+
+async def aclose_shared_clients() -> None:
+    """Close the running loop's async clients, before a long-lived loop shuts down."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.close()
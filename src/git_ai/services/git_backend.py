@@ -0,0 +1,243 @@
+"""Pluggable backends that execute Git operations for GitService."""
+
+import configparser
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Any
+
+BACKEND_NAMES = ("auto", "gitpython", "subprocess")
+
+
+class GitBackend(ABC):
+    """
+    Runs git commands and answers repository queries for GitService.
+
+    Backends may answer some queries in-process instead of spawning git.
+    Everything else goes through `run`, which receives the arguments that
+    follow the `git` executable name.
+    """
+
+    name = "abstract"
+
+    def __init__(self, working_directory: str) -> None:
+        self.working_directory = working_directory
+
+    @abstractmethod
+    def run(self, args: list[str]) -> subprocess.CompletedProcess[str]:
+        """Run `git <args>` and capture its output as text."""
+        ...
+
+    def open_stream(self, args: list[str]) -> subprocess.Popen[bytes]:
+        """Start `git <args>` with its stdout available as a binary pipe."""
+        return subprocess.Popen(
+            ["git", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.working_directory,
+        )
+
+    def is_repository(self) -> bool:
+        result = self.run(["rev-parse", "--is-inside-work-tree"])
+        return result.returncode == 0 and result.stdout.strip() == "true"
+
+    def list_tags(self) -> list[str]:
+        """Return tag names, most recently committed first."""
+        result = self.run(
+            ["for-each-ref", "--sort=-committerdate", "--format=%(refname:short)", "refs/tags"]
+        )
+        if result.returncode != 0:
+            return []
+        return [t.strip() for t in result.stdout.splitlines() if t.strip()]
+
+    def get_config(self, key: str) -> str | None:
+        result = self.run(["config", key])
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        return result.stdout.strip()
+
+    def get_git_dir(self) -> str | None:
+        result = self.run(["rev-parse", "--absolute-git-dir"])
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        return result.stdout.strip()
+
+    def read_blobs(self, shas: list[str]) -> dict[str, bytes]:
+        """Return the content of each blob, skipping the ones that do not exist."""
+        output = self._cat_file("--batch", shas)
+        blobs: dict[str, bytes] = {}
+        position = 0
+        while position < len(output):
+            end = output.index(b"\n", position)
+            sha, kind, *rest = output[position:end].decode().split(" ")
+            position = end + 1
+            if kind == "missing" or not rest:
+                continue
+            size = int(rest[0])
+            if kind == "blob":
+                blobs[sha] = output[position : position + size]
+            position += size + 1
+        return blobs
+
+    def blob_sizes(self, shas: list[str]) -> dict[str, int]:
+        """Return the size in bytes of each blob, without reading its content."""
+        sizes: dict[str, int] = {}
+        for line in self._cat_file("--batch-check", shas).decode().splitlines():
+            sha, kind, *rest = line.split(" ")
+            if kind == "blob" and rest:
+                sizes[sha] = int(rest[0])
+        return sizes
+
+    def close(self) -> None:
+        """Release any long-lived resources held by the backend."""
+
+    def _cat_file(self, mode: str, shas: list[str]) -> bytes:
+        """Answer every sha with a single `git cat-file` process."""
+        if not shas:
+            return b""
+        result = subprocess.run(
+            ["git", "cat-file", mode],
+            input="".join(f"{sha}\n" for sha in shas).encode(),
+            capture_output=True,
+            cwd=self.working_directory,
+        )
+        return result.stdout if result.returncode == 0 else b""
+
+
+class SubprocessGitBackend(GitBackend):
+    """Spawns one `git` process per operation. Always available."""
+
+    name = "subprocess"
+
+    def run(self, args: list[str]) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            cwd=self.working_directory,
+        )
+
+
+class GitPythonBackend(GitBackend):
+    """
+    Keeps one GitPython `Repo` open for the lifetime of the command.
+
+    Repository discovery, refs and config are read in-process, and object
+    reads go through GitPython's persistent `git cat-file --batch` pipes.
+    Porcelain commands still run git, but without an intermediate shell.
+    """
+
+    name = "gitpython"
+
+    def __init__(self, working_directory: str, repo: Any) -> None:
+        super().__init__(working_directory)
+        self.repo = repo
+
+    @classmethod
+    def open(cls, working_directory: str) -> "GitPythonBackend | None":
+        """Open the repository containing working_directory, or None if there is none."""
+        try:
+            import git
+        except ImportError:
+            return None
+
+        try:
+            repo = git.Repo(working_directory, search_parent_directories=True)
+        except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+            return None
+        if repo.bare:
+            repo.close()
+            return None
+        return cls(working_directory, repo)
+
+    def run(self, args: list[str]) -> subprocess.CompletedProcess[str]:
+        status, stdout, stderr = self.repo.git.execute(
+            ["git", *args],
+            with_extended_output=True,
+            with_exceptions=False,
+            strip_newline_in_stdout=False,
+        )
+        return subprocess.CompletedProcess(["git", *args], status, stdout, stderr)
+
+    def is_repository(self) -> bool:
+        return True
+
+    def list_tags(self) -> list[str]:
+        dated: list[tuple[int, str]] = []
+        for tag in self.repo.tags:
+            try:
+                dated.append((tag.commit.committed_date, tag.name))
+            except ValueError:
+                # Tags pointing at trees or blobs have no commit date
+                dated.append((0, tag.name))
+        dated.sort(key=lambda item: item[0], reverse=True)
+        return [name for _, name in dated]
+
+    def get_config(self, key: str) -> str | None:
+        # As `git config`: section and option names ignore case, subsections do not
+        section, _, option = key.rpartition(".")
+        name, _, subsection = section.partition(".")
+        reader = self.repo.config_reader()
+        value = None
+        for candidate in reader.sections():
+            # Subsections are stored as `remote "origin"` by the config parser
+            candidate_name, _, candidate_subsection = candidate.partition(" ")
+            if candidate_name.lower() != name.lower():
+                continue
+            if candidate_subsection.strip('"') != subsection:
+                continue
+            for candidate_option in reader.options(candidate):
+                if candidate_option.lower() == option.lower():
+                    try:
+                        value = reader.get_value(candidate, candidate_option)
+                    except (configparser.NoSectionError, configparser.NoOptionError):
+                        continue
+        return str(value) if value is not None and value != "" else None
+
+    def get_git_dir(self) -> str | None:
+        return str(self.repo.git_dir)
+
+    def read_blobs(self, shas: list[str]) -> dict[str, bytes]:
+        from gitdb.exc import BadObject
+
+        blobs: dict[str, bytes] = {}
+        for sha in shas:
+            try:
+                blobs[sha] = self.repo.odb.stream(bytes.fromhex(sha)).read()
+            except (BadObject, ValueError):
+                continue
+        return blobs
+
+    def blob_sizes(self, shas: list[str]) -> dict[str, int]:
+        from gitdb.exc import BadObject
+
+        sizes: dict[str, int] = {}
+        for sha in shas:
+            try:
+                sizes[sha] = self.repo.odb.info(bytes.fromhex(sha)).size
+            except (BadObject, ValueError):
+                continue
+        return sizes
+
+    def close(self) -> None:
+        self.repo.close()
+
+
+def resolve_git_backend(working_directory: str, name: str | None = None) -> GitBackend:
+    """
+    Resolve the Git backend by name.
+
+    'auto' is the subprocess backend: importing GitPython alone runs `git
+    version` twice, more than it saves on a single command. 'gitpython'
+    falls back to subprocess when GitPython is unavailable or the
+    directory is not inside a repository.
+    """
+    name = name or "auto"
+    if name not in BACKEND_NAMES:
+        raise ValueError(f"Unknown git backend: '{name}'. Available: {', '.join(BACKEND_NAMES)}")
+
+    if name == "gitpython":
+        backend = GitPythonBackend.open(working_directory)
+        if backend is not None:
+            return backend
+
+    return SubprocessGitBackend(working_directory)
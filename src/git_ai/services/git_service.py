@@ -2,92 +2,185 @@
 
 import os
 import subprocess
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from io import BufferedReader
 from pathlib import Path
+from types import TracebackType
+from typing import Self, cast
+
+from git_ai.services.git_backend import GitBackend, resolve_git_backend
+from git_ai.support.commit_log import LOG_FORMAT, CommitRecord, parse_commit_log
+from git_ai.support.diff_budget import DiffBudget
+from git_ai.support.release_ranges import TAG_FORMAT, ReleaseTag, parse_release_tags
+from git_ai.support.staged_snapshot import RAW_FLAGS, MoveDetection, StagedSnapshot
+
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class GitService:
     """Encapsulates Git commands in typed and testable methods."""
 
-    def __init__(self, working_directory: str | None = None) -> None:
+    def __init__(
+        self, working_directory: str | None = None, backend: str | GitBackend | None = None
+    ) -> None:
         self.working_directory = working_directory or os.getcwd()
+        if isinstance(backend, GitBackend):
+            self.backend = backend
+        else:
+            self.backend = resolve_git_backend(self.working_directory, backend)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.backend.close()
 
     def is_git_repository(self) -> bool:
-        result = self._run("git rev-parse --is-inside-work-tree")
-        return result.returncode == 0 and result.stdout.strip() == "true"
+        return self.backend.is_repository()
 
     def get_staged_diff(self) -> str:
-        result = self._run("git diff --staged")
+        result = self._run("diff", "--staged")
         return result.stdout.strip() if result.returncode == 0 else ""
 
     def get_staged_stat(self) -> str:
-        result = self._run("git diff --staged --stat")
+        result = self._run("diff", "--staged", "--stat")
         return result.stdout.strip() if result.returncode == 0 else ""
 
     def has_staged_changes(self) -> bool:
-        return self.get_staged_diff() != ""
+        # --quiet exits with 1 on the first difference, without producing a patch
+        return self._run("diff", "--cached", "--quiet").returncode == 1
+
+    def get_staged_snapshot(
+        self, budget: DiffBudget | None = None, moves: MoveDetection | None = None
+    ) -> StagedSnapshot:
+        """
+        Collect patch, numstat and name-status of the index in a single git run.
+
+        The patch is streamed; with a budget, each file only retains its share
+        and git is stopped once nothing more can be kept, so memory follows
+        the budget rather than the size of the diff. Moves are detected with
+        git's defaults unless `moves` says otherwise, so a moved file only
+        contributes the lines that changed along the way.
+        """
+        if not self.has_staged_changes():
+            return StagedSnapshot.empty()
+
+        move_flags = moves.flags if moves else ()
+        with self._stream("diff", "--cached", *move_flags, *RAW_FLAGS) as chunks:
+            return StagedSnapshot.from_stream(chunks, budget)
+
+    def read_blobs(self, shas: Iterable[str]) -> dict[str, bytes]:
+        """Read blob contents by sha; the all-zero sha of added or deleted files is skipped."""
+        return self.backend.read_blobs(_real_shas(shas))
+
+    def get_blob_sizes(self, shas: Iterable[str]) -> dict[str, int]:
+        return self.backend.blob_sizes(_real_shas(shas))
 
     def add_all(self) -> None:
-        result = self._run("git add -A")
+        result = self._run("add", "-A")
         if result.returncode != 0:
             raise RuntimeError(f"Git add failed: {result.stderr}")
 
     def commit(self, message: str) -> None:
-        result = self._run(["git", "commit", "-m", message], shell=False)
+        result = self._run("commit", "-m", message)
         if result.returncode != 0:
             raise RuntimeError(f"Git commit failed: {result.stderr}")
 
-    def get_commits_between(self, from_ref: str, to_ref: str = "HEAD") -> list[dict[str, str]]:
-        result = self._run(
-            ["git", "log", f"{from_ref}..{to_ref}", "--pretty=format:%H|%s"],
-            shell=False,
-        )
-        if result.returncode != 0 or not result.stdout.strip():
-            return []
+    def iter_commits(self, from_ref: str, to_ref: str = "HEAD") -> Iterator[CommitRecord]:
+        """
+        Stream the commits reachable from `to_ref` but not `from_ref`, newest first.
+
+        `git log -z` is read as it runs and each commit is yielded once its
+        record is complete, so a range of any length is walked in constant
+        memory. Git is stopped if the caller stops iterating early; an
+        unknown reference yields nothing.
+        """
+        yield from self.iter_history(f"{from_ref}..{to_ref}")
 
-        commits = []
-        for line in result.stdout.strip().split("\n"):
-            parts = line.split("|", 1)
-            if len(parts) == 2 and parts[0] and parts[1]:
-                commits.append({"hash": parts[0], "message": parts[1]})
-        return commits
+    def iter_history(self, *revisions: str) -> Iterator[CommitRecord]:
+        """Stream every commit `git log` reaches from `revisions`, children before parents."""
+        with self._stream("log", "-z", LOG_FORMAT, "--topo-order", *revisions, "--") as chunks:
+            yield from parse_commit_log(chunks)
 
     def get_latest_tag(self) -> str | None:
-        result = self._run("git describe --tags --abbrev=0")
+        result = self._run("describe", "--tags", "--abbrev=0")
         if result.returncode != 0 or not result.stdout.strip():
             return None
         return result.stdout.strip()
 
     def get_all_tags(self) -> list[str]:
-        result = self._run(
-            'git for-each-ref --sort=-committerdate --format="%(refname:short)" refs/tags'
-        )
-        if result.returncode != 0 or not result.stdout.strip():
+        return self.backend.list_tags()
+
+    def get_release_tags(self) -> list[ReleaseTag]:
+        """Every tag that points at a commit, oldest version first, read in one git call."""
+        result = self._run("for-each-ref", "--sort=v:refname", TAG_FORMAT, "refs/tags")
+        if result.returncode != 0:
             return []
-        return [t.strip('"') for t in result.stdout.strip().split("\n") if t.strip()]
+        return parse_release_tags(result.stdout)
 
     def get_first_commit_hash(self) -> str | None:
-        result = self._run("git rev-list --max-parents=0 HEAD")
+        result = self._run("rev-list", "--max-parents=0", "HEAD")
         if result.returncode != 0 or not result.stdout.strip():
             return None
         return result.stdout.strip().split("\n")[0]
 
+    def get_git_dir(self) -> str | None:
+        return self.backend.get_git_dir()
+
+    def get_index_path(self) -> str | None:
+        result = self._run("rev-parse", "--path-format=absolute", "--git-path", "index")
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        return result.stdout.strip()
+
+    def write_tree(self) -> str:
+        """Hash the staged content into a tree object and return its sha."""
+        result = self._run("write-tree")
+        if result.returncode != 0:
+            raise RuntimeError(f"Git write-tree failed: {result.stderr}")
+        return result.stdout.strip()
+
     def get_hooks_path(self) -> str:
-        result = self._run("git config core.hooksPath")
-        if result.returncode == 0 and result.stdout.strip():
-            hooks_path = result.stdout.strip()
+        if configured := self.backend.get_config("core.hooksPath"):
+            hooks_path = configured
         else:
             hooks_path = os.path.join(self.working_directory, ".git", "hooks")
 
         Path(hooks_path).mkdir(parents=True, exist_ok=True)
         return hooks_path
 
-    def _run(
-        self, command: str | list[str], shell: bool = True
-    ) -> subprocess.CompletedProcess[str]:
-        return subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            cwd=self.working_directory,
-            shell=shell,
-        )
+    def _run(self, *args: str) -> subprocess.CompletedProcess[str]:
+        return self.backend.run(list(args))
+
+    @contextmanager
+    def _stream(self, *args: str) -> Iterator[Iterator[bytes]]:
+        """Yield the stdout of a git command in chunks, killing git if the reader stops early."""
+        process = self.backend.open_stream(list(args))
+        # Popen with bufsize -1 wraps the pipe in a BufferedReader, which has read1
+        stdout = cast(BufferedReader, process.stdout)
+        assert stdout is not None
+
+        def chunks() -> Iterator[bytes]:
+            while chunk := stdout.read1(STREAM_CHUNK_SIZE):
+                yield chunk
+
+        try:
+            yield chunks()
+        finally:
+            if process.poll() is None:
+                process.kill()
+            stdout.close()
+            process.wait()
+
+
+def _real_shas(shas: Iterable[str]) -> list[str]:
+    return list(dict.fromkeys(sha for sha in shas if sha and sha.strip("0")))
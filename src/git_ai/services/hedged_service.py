@@ -0,0 +1,216 @@
+"""AI service that hedges a slow provider with the next one in a configured chain."""
+
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import Sequence
+from typing import Any
+
+from git_ai.agents.prompts import PromptParts
+from git_ai.services.ai_service import AiService, StreamCallback
+from git_ai.support.latency_history import LatencyHistory
+
+
+class _Superseded(Exception):
+    """Stops a streaming provider once another one has answered."""
+
+
+class HedgedAiService(AiService):
+    """
+    Sends each request along a chain of providers until one answers.
+
+    The first provider gets the request alone. Once it has taken longer than
+    its usual answer, the `hedge.percentile` of its recent latencies, or as
+    soon as it fails, the next provider gets the same request while the first
+    keeps going; the first valid response wins. Once every provider is
+    running, the last one gets the configured `timeout` before the request
+    fails. Every provider keeps its own response cache, and every call that
+    completes, a loser's included, feeds the history the deadlines come from.
+    """
+
+    provider = "hedged"
+
+    def __init__(
+        self, services: Sequence[AiService], history: LatencyHistory | None = None
+    ) -> None:
+        if not services:
+            raise ValueError("A hedged service needs at least one provider.")
+        super().__init__(services[0].config)
+        self.services = list(services)
+        self.history = history
+        self.last_provider: str | None = None
+
+    @property
+    def model(self) -> str:
+        return self.services[0].model
+
+    def delay(self, service: AiService) -> float:
+        """How long `service` may take before the next provider is asked as well."""
+        hedge = self.config.hedge
+        if self.history is None:
+            return hedge.initial_delay
+        if (usual := self.history.percentile(service.provider, hedge.percentile)) is None:
+            return hedge.initial_delay
+        return max(usual, hedge.min_delay)
+
+    def _call(self, prompt: PromptParts) -> str:
+        # Only whole generations are hedged; a raw call goes to the first provider
+        return self.services[0]._call(prompt)
+
+    def _generate(
+        self,
+        prompt: PromptParts,
+        required_keys: list[str],
+        fresh: bool,
+        on_update: StreamCallback | None = None,
+    ) -> dict[str, Any]:
+        self._reset()
+        results: queue.SimpleQueue[tuple[AiService, float, dict[str, Any] | Exception]] = (
+            queue.SimpleQueue()
+        )
+        decided = threading.Event()
+        streaming = threading.Event()
+
+        def relay(fields: dict[str, Any], partial: dict[str, str]) -> None:
+            # A provider that lost the race must not redraw the draft
+            if decided.is_set():
+                raise _Superseded
+            assert on_update is not None
+            on_update(fields, partial)
+
+        def attempt(service: AiService, stream: bool) -> None:
+            started = time.monotonic()
+            try:
+                data = service._generate(prompt, required_keys, fresh, relay if stream else None)
+            except Exception as e:
+                outcome: dict[str, Any] | Exception = e
+            else:
+                outcome = data
+            finally:
+                if stream:
+                    streaming.clear()
+            seconds = time.monotonic() - started
+            # A loser still answers, so its time counts; a superseded stream never completed
+            if not isinstance(outcome, Exception):
+                self._record(service, seconds)
+            results.put((service, seconds, outcome))
+
+        chain = iter(self.services)
+        running = 0
+        budget = 0.0
+
+        def launch() -> float | None:
+            nonlocal running, budget
+            if (service := next(chain, None)) is None:
+                return None
+            # One provider at a time streams the draft: the first, or the next after it failed
+            stream = on_update is not None and not streaming.is_set()
+            if stream:
+                streaming.set()
+            running += 1
+            # Daemon threads, so a loser still waiting on its provider never delays exit
+            threading.Thread(target=attempt, args=(service, stream), daemon=True).start()
+            budget = time.monotonic() + self.config.timeout
+            return time.monotonic() + self.delay(service)
+
+        errors: list[tuple[AiService, Exception]] = []
+        deadline = launch() or budget
+        try:
+            while running:
+                try:
+                    service, seconds, outcome = results.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    deadline = launch() or self._last_wait(deadline, budget)
+                    continue
+                running -= 1
+                if not isinstance(outcome, Exception):
+                    self._won(service)
+                    return outcome
+                errors.append((service, outcome))
+                deadline = launch() or deadline
+        finally:
+            decided.set()
+        raise self._failure(errors)
+
+    async def _agenerate(
+        self,
+        prompt: PromptParts,
+        required_keys: list[str],
+        fresh: bool,
+        temperature: float | None = None,
+    ) -> dict[str, Any]:
+        self._reset()
+        tasks: dict[asyncio.Task[dict[str, Any]], tuple[AiService, float]] = {}
+        chain = iter(self.services)
+        budget = 0.0
+
+        def launch() -> float | None:
+            nonlocal budget
+            if (service := next(chain, None)) is None:
+                return None
+            task = asyncio.create_task(
+                service._agenerate(prompt, required_keys, fresh, temperature)
+            )
+            tasks[task] = (service, time.monotonic())
+            budget = time.monotonic() + self.config.timeout
+            return time.monotonic() + self.delay(service)
+
+        errors: list[tuple[AiService, Exception]] = []
+        deadline = launch() or budget
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    deadline = launch() or self._last_wait(deadline, budget)
+                    continue
+                for task in done:
+                    service, started = tasks.pop(task)
+                    try:
+                        data = task.result()
+                    except Exception as e:
+                        errors.append((service, e))
+                        continue
+                    self._record(service, time.monotonic() - started)
+                    self._won(service)
+                    return data
+                deadline = launch() or deadline
+        finally:
+            # The losers' requests are cancelled rather than left running; a cancelled
+            # call never completed, so it says nothing about the provider's latency
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        raise self._failure(errors)
+
+    def _last_wait(self, deadline: float, budget: float) -> float:
+        """With every provider running, wait until `budget`; fail once it has passed."""
+        if deadline >= budget:
+            raise RuntimeError(f"No provider answered within {self.config.timeout:g} seconds.")
+        return budget
+
+    def _reset(self) -> None:
+        self.last_from_cache = False
+        self.last_usage = None
+        self.last_provider = None
+
+    def _won(self, service: AiService) -> None:
+        self.last_from_cache = service.last_from_cache
+        self.last_usage = service.last_usage
+        self.last_provider = service.provider
+
+    def _record(self, service: AiService, seconds: float) -> None:
+        if self.history is not None and not service.last_from_cache:
+            self.history.record(service.provider, seconds)
+
+    def _failure(self, errors: list[tuple[AiService, Exception]]) -> Exception:
+        if len(errors) == 1:
+            return errors[0][1]
+        reasons = "; ".join(f"{service.provider}: {error}" for service, error in errors)
+        return RuntimeError(f"All providers failed. {reasons}")
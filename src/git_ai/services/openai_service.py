@@ -1,70 +1,86 @@
 """AI service implementation using the OpenAI API."""
 
-import json
 import os
-import re
+from collections.abc import Generator
 from typing import Any
 
 import openai
+from openai.types import CompletionUsage
 
-from git_ai.agents.prompts import build_changelog_prompt, build_commit_prompt
+from git_ai.agents.prompts import PromptParts
 from git_ai.config import GitAiConfig
-from git_ai.services.ai_service import AiService
+from git_ai.services.ai_service import AiService, UsageStats
+from git_ai.services.factory import shared_async_client, shared_client
+from git_ai.support.response_cache import ResponseCache
 
 
 class OpenAiService(AiService):
     """Uses the OpenAI GPT API to generate commit messages and changelogs."""
 
-    def __init__(self, config: GitAiConfig) -> None:
-        self.config = config
+    provider = "openai"
+    default_model = "gpt-4o"
+
+    def __init__(self, config: GitAiConfig, cache: ResponseCache | None = None) -> None:
+        super().__init__(config, cache)
         api_key = os.environ.get("OPENAI_API_KEY", "")
         if not api_key:
             raise RuntimeError(
                 "OPENAI_API_KEY environment variable is not set. "
                 "Please set it or run 'git-ai setup' to configure."
             )
-        self.client = openai.OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self.client = shared_client(("openai", api_key), lambda: openai.OpenAI(api_key=api_key))
 
-    def generate_commit_message(self, diff: str) -> dict[str, Any]:
-        prompt = build_commit_prompt(
-            diff=diff,
-            language=self.config.language,
-            allowed_scopes=self.config.scopes,
-            allowed_types=self.config.types,
-            body_preference=self.config.commit.body,
-        )
-        response = self._call(prompt)
-        return self._parse_json(
-            response, ["type", "scope", "description", "body", "is_breaking_change"]
-        )
-
-    def generate_changelog(self, prompt: str) -> dict[str, Any]:
-        full_prompt = build_changelog_prompt(prompt, self.config.language)
-        response = self._call(full_prompt)
-        return self._parse_json(response, ["sections"])
+    def _call(self, prompt: PromptParts) -> str:
+        response = self.client.chat.completions.create(**self._request(prompt))
+        if response.usage:
+            self._record_usage(response.usage)
+        return response.choices[0].message.content or ""
 
-    def _call(self, prompt: str) -> str:
-        model = self.config.model or "gpt-4o"
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1024,
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        response = await self._async_client().chat.completions.create(
+            **self._request(prompt, temperature)
         )
+        if response.usage:
+            self._record_usage(response.usage)
         return response.choices[0].message.content or ""
 
-    def _parse_json(self, text: str, required_keys: list[str]) -> dict[str, Any]:
-        text = re.sub(r"^```(?:json)?\s*\n?", "", text, flags=re.MULTILINE)
-        text = re.sub(r"\n?```\s*$", "", text, flags=re.MULTILINE)
-        text = text.strip()
+    def _stream(self, prompt: PromptParts) -> Generator[str]:
+        chunks = self.client.chat.completions.create(
+            **self._request(prompt), stream=True, stream_options={"include_usage": True}
+        )
+        with chunks:
+            for chunk in chunks:
+                # The usage arrives in a last chunk without choices
+                if chunk.usage:
+                    self._record_usage(chunk.usage)
+                if chunk.choices and (text := chunk.choices[0].delta.content):
+                    yield text
 
-        try:
-            data = json.loads(text)
-        except json.JSONDecodeError as e:
-            raise RuntimeError(
-                f"Failed to parse AI response as JSON: {e}\nResponse: {text[:500]}"
-            ) from e
+    def _async_client(self) -> openai.AsyncOpenAI:
+        return shared_async_client(
+            ("openai", self.api_key), lambda: openai.AsyncOpenAI(api_key=self.api_key)
+        )
 
-        for key in required_keys:
-            if key not in data:
-                raise RuntimeError(f'AI response missing required key: "{key}".')
-        return data
+    def _request(self, prompt: PromptParts, temperature: float | None = None) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "model": self.model,
+            # OpenAI caches shared prompt prefixes on its own, so the static part goes first
+            "messages": [
+                {"role": "system", "content": prompt.prefix},
+                {"role": "user", "content": prompt.suffix},
+            ],
+            "max_tokens": self.config.max_output_tokens,
+            "timeout": self.config.timeout,
+        }
+        if temperature is not None:
+            request["temperature"] = temperature
+        return request
+
+    def _record_usage(self, usage: CompletionUsage) -> None:
+        details = usage.prompt_tokens_details
+        self.last_usage = UsageStats(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cache_read_tokens=(details.cached_tokens or 0) if details else 0,
+        )
@@ -1,5 +1,6 @@
 """Support classes for Git AI."""
 
 from git_ai.support.commit_template import CommitTemplate
+from git_ai.support.staged_snapshot import StagedFile, StagedSnapshot
 
-__all__ = ["CommitTemplate"]
+__all__ = ["CommitTemplate", "StagedFile", "StagedSnapshot"]
@@ -0,0 +1,27 @@
+"""Replacing a file so that readers never see it half written."""
+
+import os
+import tempfile
+from pathlib import Path
+
+TEMPORARY_SUFFIX = ".tmp"
+"""Suffix of the temporary file a write goes through, left behind only if the process dies."""
+
+
+def atomic_write(path: str | Path, data: str) -> None:
+    """
+    Write `data` to a temporary file next to `path` and rename it into place.
+
+    Missing parent directories are created. Raises OSError if the file
+    cannot be written; the temporary file is removed in that case.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, suffix=TEMPORARY_SUFFIX)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
@@ -0,0 +1,106 @@
+"""Splits a large commit range into changelog prompts and merges what comes back."""
+
+import re
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from git_ai.support.conventional_commit import ConventionalCommit
+from git_ai.support.token_estimator import TokenEstimator
+
+COMMITS_HEADER = "Generate a changelog from these grouped commits:\n\n"
+
+OUTPUT_TOKENS_PER_COMMIT = 40
+"""Room left in the response for each commit: one entry plus its JSON quoting."""
+
+_SPACES = re.compile(r"\s+")
+
+
+def changelog_line(subject: str, parsed: ConventionalCommit | None) -> str:
+    """
+    The line that lists a commit in a changelog prompt.
+
+    Footers carry what the title does not, so the breaking change and the
+    issues a commit refers to are appended to its subject.
+    """
+    if parsed is None:
+        return subject
+    line = subject
+    if note := parsed.breaking_note:
+        line += f" (BREAKING CHANGE: {' '.join(note.split())})"
+    if refs := parsed.footer("Refs"):
+        line += f" (Refs: {refs})"
+    return line
+
+
+def commits_prompt(grouped: dict[str, list[str]]) -> str:
+    """List the grouped commits under one heading per type."""
+    prompt = COMMITS_HEADER
+    for ctype, messages in grouped.items():
+        prompt += f"## {ctype}\n"
+        for msg in messages:
+            prompt += f"- {msg}\n"
+        prompt += "\n"
+    return prompt
+
+
+def batch_commits(
+    grouped: dict[str, list[str]],
+    estimator: TokenEstimator,
+    max_tokens: int | None,
+    max_output_tokens: int,
+) -> list[dict[str, list[str]]]:
+    """
+    Split the grouped commits into batches that each fit one prompt and one response.
+
+    `max_tokens` bounds the commit list of a batch in provider tokens; the
+    response bound allows OUTPUT_TOKENS_PER_COMMIT per commit, so a batch is
+    never large enough for its answer to be cut off mid-JSON. Commits keep
+    their order, and a type only spans batches when it does not fit in one.
+    """
+    max_units = None if max_tokens is None else estimator.units_for(max_tokens)
+    max_commits = max(1, max_output_tokens // OUTPUT_TOKENS_PER_COMMIT)
+
+    batches: list[dict[str, list[str]]] = []
+    batch: dict[str, list[str]] = {}
+    units = commits = 0
+    for ctype, messages in grouped.items():
+        for msg in messages:
+            entry = estimator.units(f"- {msg}") + 1
+            # A section heading is only paid for together with its first entry
+            heading = estimator.units(f"## {ctype}") + 2
+            cost = entry if ctype in batch else entry + heading
+            full = commits >= max_commits or (max_units is not None and units + cost > max_units)
+            if batch and full:
+                batches.append(batch)
+                batch = {}
+                units = commits = 0
+                cost = entry + heading
+            batch.setdefault(ctype, []).append(msg)
+            units += cost
+            commits += 1
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def merge_sections(responses: Iterable[Sequence[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """
+    Merge the sections of several changelog responses into one list.
+
+    Sections of the same type are joined in the order the types first
+    appear, and entries repeated across batches are kept once, comparing
+    them without regard to case, spacing or a trailing period.
+    """
+    merged: dict[str, list[str]] = {}
+    seen: dict[str, set[str]] = {}
+    for sections in responses:
+        for section in sections:
+            ctype = section.get("type", "other")
+            entries = merged.setdefault(ctype, [])
+            keys = seen.setdefault(ctype, set())
+            for entry in section.get("entries", []):
+                key = _SPACES.sub(" ", str(entry)).strip().rstrip(".").casefold()
+                if key and key not in keys:
+                    keys.add(key)
+                    entries.append(entry)
+    return [{"type": ctype, "entries": entries} for ctype, entries in merged.items()]
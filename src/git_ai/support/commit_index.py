@@ -0,0 +1,189 @@
+"""Per-commit changelog metadata, indexed by sha so a range is only parsed and summarized once."""
+
+import sqlite3
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import closing
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from typing import Self
+
+from git_ai.support.changelog_batches import changelog_line
+from git_ai.support.commit_log import CommitRecord
+from git_ai.support.conventional_commit import parse_commit_message
+
+INDEX_PATH = Path("git-ai") / "commits.sqlite"
+"""Where the index lives, relative to the repository's git directory."""
+
+SCHEMA_VERSION = 1
+
+ENTRY_ID_LENGTH = 12
+"""Shortest sha prefix that names a commit in an entries prompt."""
+
+LOOKUP_BATCH = 500
+"""Shas per query; well below SQLite's limit on bound parameters."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    scope TEXT,
+    breaking INTEGER NOT NULL,
+    line TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    sha TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (sha, fingerprint)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedCommit:
+    """What the changelog needs to know about one commit, parsed once."""
+
+    sha: str
+    type: str
+    line: str
+    """The subject, with its breaking change and references appended."""
+    scope: str | None = None
+    breaking: bool = False
+
+    @classmethod
+    def from_record(cls, record: CommitRecord) -> Self:
+        parsed = parse_commit_message(record.message)
+        if parsed is None:
+            return cls(record.hash, "other", changelog_line(record.subject, None))
+        return cls(
+            record.hash,
+            parsed.type.lower(),
+            changelog_line(record.subject, parsed),
+            parsed.scope,
+            parsed.breaking,
+        )
+
+
+def entry_ids(shas: Iterable[str]) -> dict[str, str]:
+    """Name each commit by the shortest sha prefix, from ENTRY_ID_LENGTH up, unique among them."""
+    shas = list(dict.fromkeys(shas))
+    length = ENTRY_ID_LENGTH
+    while len({sha[:length] for sha in shas}) < len(shas):
+        length += 4
+    return {sha[:length]: sha for sha in shas}
+
+
+class CommitIndex:
+    """
+    An append-only SQLite index of parsed commits and their changelog entries.
+
+    Commits are keyed by sha, which never changes meaning, so rows are only
+    ever added. Entries are also keyed by a fingerprint of the provider,
+    model, prompt and language that wrote them. The index is derived data:
+    if it cannot be read or written, every commit is simply treated as new.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    @classmethod
+    def for_git_dir(cls, git_dir: str | Path) -> Self:
+        return cls(Path(git_dir) / INDEX_PATH)
+
+    def index(self, records: Iterable[CommitRecord]) -> Iterator[IndexedCommit]:
+        """
+        Yield every record as an IndexedCommit, parsing only the ones not indexed yet.
+
+        Records are looked up and stored in batches as they stream in, over
+        one connection, so a range of any length costs one query per
+        LOOKUP_BATCH commits.
+        """
+        try:
+            db: sqlite3.Connection | None = self._connect()
+        except sqlite3.Error:
+            db = None
+        try:
+            for batch in batched(records, LOOKUP_BATCH):
+                known = self._lookup(db, [record.hash for record in batch]) if db else {}
+                commits = [known.get(r.hash) or IndexedCommit.from_record(r) for r in batch]
+                if db is not None:
+                    self._add(db, [commit for commit in commits if commit.sha not in known])
+                yield from commits
+        finally:
+            if db is not None:
+                db.close()
+
+    def entries(self, shas: Iterable[str], fingerprint: str) -> dict[str, str]:
+        """The changelog entries written under `fingerprint`, by sha."""
+        found: dict[str, str] = {}
+        try:
+            with closing(self._connect()) as db:
+                for batch in batched(shas, LOOKUP_BATCH):
+                    marks = ",".join("?" * len(batch))
+                    found.update(
+                        db.execute(
+                            f"SELECT sha, entry FROM entries "
+                            f"WHERE fingerprint = ? AND sha IN ({marks})",
+                            (fingerprint, *batch),
+                        ).fetchall()
+                    )
+        except sqlite3.Error:
+            return {}
+        return found
+
+    def add_entries(self, fingerprint: str, entries: Mapping[str, str]) -> None:
+        try:
+            with closing(self._connect()) as db, db:
+                db.executemany(
+                    "INSERT OR IGNORE INTO entries (sha, fingerprint, entry) VALUES (?, ?, ?)",
+                    [(sha, fingerprint, entry) for sha, entry in entries.items()],
+                )
+        except sqlite3.Error:
+            return
+
+    def _lookup(self, db: sqlite3.Connection, shas: list[str]) -> dict[str, IndexedCommit]:
+        marks = ",".join("?" * len(shas))
+        try:
+            rows = db.execute(
+                f"SELECT sha, type, line, scope, breaking FROM commits WHERE sha IN ({marks})",
+                shas,
+            ).fetchall()
+        except sqlite3.Error:
+            return {}
+        return {
+            sha: IndexedCommit(sha, ctype, line, scope, bool(breaking))
+            for sha, ctype, line, scope, breaking in rows
+        }
+
+    def _add(self, db: sqlite3.Connection, commits: list[IndexedCommit]) -> None:
+        if not commits:
+            return
+        try:
+            with db:
+                db.executemany(
+                    "INSERT OR IGNORE INTO commits (sha, type, scope, breaking, line) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(c.sha, c.type, c.scope, int(c.breaking), c.line) for c in commits],
+                )
+        except sqlite3.Error:
+            return
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index, rebuilding it first if another schema version wrote it."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise sqlite3.OperationalError(str(e)) from e
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Derived data: an index written by another version is rebuilt from scratch
+                db.executescript(
+                    "DROP TABLE IF EXISTS commits; DROP TABLE IF EXISTS entries;"
+                    f"{_SCHEMA} PRAGMA user_version = {SCHEMA_VERSION};"
+                )
+        except BaseException:
+            db.close()
+            raise
+        return db
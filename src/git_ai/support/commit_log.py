@@ -0,0 +1,75 @@
+"""Streaming parser for `git log -z` output, one compact record per commit."""
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+LOG_FORMAT = "--format=%H%x1f%P%x1f%at%x1f%(trailers:only,unfold)%x1f%s%x1f%b"
+"""Fields split by the unit separator; with `-z`, every record ends in a NUL."""
+
+_FIELDS = 6
+
+
+@dataclass(frozen=True, slots=True)
+class CommitRecord:
+    """One commit of a history walk, with only what history-walking commands read."""
+
+    hash: str
+    subject: str
+    body: str = ""
+    author_date: int = 0
+    """Unix timestamp of the author date."""
+    trailers: tuple[tuple[str, str], ...] = ()
+    parents: tuple[str, ...] = ()
+
+    @property
+    def message(self) -> str:
+        """The full message: subject, then the body after a blank line."""
+        return f"{self.subject}\n\n{self.body}" if self.body else self.subject
+
+    def trailer(self, key: str) -> str | None:
+        """The value of the first trailer named `key`, compared without regard to case."""
+        key = key.casefold()
+        return next((value for k, value in self.trailers if k.casefold() == key), None)
+
+
+def parse_commit_log(chunks: Iterable[bytes]) -> Iterator[CommitRecord]:
+    """
+    Parse `git log -z` run with LOG_FORMAT from a stream of byte chunks.
+
+    Records are yielded as soon as their terminating NUL arrives, so memory
+    stays flat however long the history is; only the record being read is
+    buffered.
+    """
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        if b"\0" not in chunk:
+            continue
+        *records, buffer = buffer.split(b"\0")
+        for raw in records:
+            if record := _parse_record(raw):
+                yield record
+    if record := _parse_record(buffer):
+        yield record
+
+
+def _parse_record(raw: bytes) -> CommitRecord | None:
+    fields = raw.decode(errors="replace").split("\x1f", _FIELDS - 1)
+    if len(fields) != _FIELDS or not fields[0] or not fields[4]:
+        return None
+    sha, parents, date, trailers, subject, body = fields
+    return CommitRecord(
+        hash=sha.strip(),
+        subject=subject,
+        body=body.strip(),
+        author_date=int(date) if date.isdigit() else 0,
+        trailers=tuple(_parse_trailers(trailers)),
+        parents=tuple(parents.split()),
+    )
+
+
+def _parse_trailers(text: str) -> Iterator[tuple[str, str]]:
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            yield key.strip(), value.strip()
@@ -0,0 +1,89 @@
+"""Parses commit messages into their Conventional Commits parts: header, body and footers."""
+
+import re
+from dataclasses import dataclass
+
+BREAKING_TOKENS = ("BREAKING CHANGE", "BREAKING-CHANGE")
+
+_HEADER = re.compile(
+    r"(?P<type>[A-Za-z]+)(?:\((?P<scope>[^()\r\n]+)\))?(?P<breaking>!)?:\s*(?P<description>\S.*)"
+)
+_GIT_REVERT = re.compile(r'Revert "(?P<title>.+)"')
+_REVERTS = re.compile(r"This reverts commit (?P<sha>[0-9a-f]{7,40})")
+_FOOTER = re.compile(r"(?P<token>BREAKING[ -]CHANGE|[\w-]+)(?::[ \t]|[ \t](?=#))(?P<value>.*)")
+
+
+@dataclass(frozen=True, slots=True)
+class ConventionalCommit:
+    """A commit message split into the parts of the Conventional Commits specification."""
+
+    type: str
+    description: str
+    scope: str | None = None
+    breaking: bool = False
+    body: str = ""
+    footers: tuple[tuple[str, str], ...] = ()
+    reverts: str | None = None
+    """The sha named by "This reverts commit <sha>", for reverts."""
+
+    def footer(self, token: str) -> str | None:
+        """The value of the first footer named `token`, compared without regard to case."""
+        token = token.casefold()
+        return next((value for t, value in self.footers if t.casefold() == token), None)
+
+    @property
+    def breaking_note(self) -> str | None:
+        """What the BREAKING CHANGE footer says, if there is one."""
+        return next((value for t, value in self.footers if t in BREAKING_TOKENS), None)
+
+
+def parse_commit_message(message: str) -> ConventionalCommit | None:
+    """
+    Parse a raw commit message, or return None if its title is not conventional.
+
+    A title written by `git revert` counts as a `revert` of the quoted title.
+    Footers are read from the last paragraph when it starts with one, and
+    a BREAKING CHANGE footer marks the commit as breaking just like a `!`.
+    """
+    title, _, rest = message.strip().partition("\n")
+    if match := _HEADER.fullmatch(title.rstrip()):
+        ctype, scope, description = match["type"], match["scope"], match["description"]
+        breaking = match["breaking"] is not None
+    elif match := _GIT_REVERT.fullmatch(title.rstrip()):
+        ctype, scope, description, breaking = "revert", None, match["title"], False
+    else:
+        return None
+
+    body, footers = _split_footers(rest.strip()) if rest else ("", ())
+    reverts = None
+    if ctype.lower() == "revert" and (sha := _REVERTS.search(body)):
+        reverts = sha["sha"]
+    return ConventionalCommit(
+        type=ctype,
+        description=description,
+        scope=scope,
+        breaking=breaking or any(token in BREAKING_TOKENS for token, _ in footers),
+        body=body,
+        footers=footers,
+        reverts=reverts,
+    )
+
+
+def _split_footers(text: str) -> tuple[str, tuple[tuple[str, str], ...]]:
+    """Split the text after the title into the body and the footers of its last paragraph."""
+    head, _, last = text.rpartition("\n\n")
+    lines = last.splitlines()
+    # Trailers as git reads them: every line is one, or the indented continuation of one
+    if not lines or not _FOOTER.fullmatch(lines[0]):
+        return text, ()
+    if not all(_FOOTER.fullmatch(line) or line[:1] in (" ", "\t") for line in lines):
+        return text, ()
+
+    footers: list[list[str]] = []
+    for line in lines:
+        if match := _FOOTER.fullmatch(line):
+            footers.append([match["token"], match["value"].strip()])
+        else:
+            # A footer's value may wrap onto the lines after it
+            footers[-1][1] += "\n" + line.strip()
+    return head.strip(), tuple((token, value) for token, value in footers)
@@ -0,0 +1,214 @@
+"""Splits the diff size budget across staged files."""
+
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import PurePosixPath
+
+from git_ai.support.staged_snapshot import Measure, StagedFile, StagedSnapshot
+
+GENERATED_FILE_PATTERNS = (
+    "*.lock",
+    "*-lock.json",
+    "*-lock.yaml",
+    "go.sum",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.snap",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.pb.go",
+    "*.generated.*",
+)
+
+GENERATED_DIRECTORIES = frozenset({"dist", "build", "vendor", "node_modules", "__snapshots__"})
+
+SOURCE_EXTENSIONS = frozenset(
+    {
+        ".py", ".pyi", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt",
+        ".swift", ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".rb", ".php", ".scala",
+        ".sh", ".sql", ".vue", ".svelte",
+    }
+)  # fmt: skip
+
+SOURCE_WEIGHT = 1.0
+OTHER_WEIGHT = 0.5
+GENERATED_WEIGHT = 0.1
+
+RETENTION_SLACK = 2
+"""How many times its proportional share a file may retain while streaming."""
+
+OMITTED_MARKER = "[... {} changed lines omitted ...]"
+
+DIFF_STRATEGIES = ("budget", "auto", "map-reduce")
+"""How a diff reaches the AI: cut to size, summarized only when over budget, or summarized."""
+
+
+def is_generated(path: str) -> bool:
+    parts = PurePosixPath(path).parts
+    if GENERATED_DIRECTORIES.intersection(parts[:-1]):
+        return True
+    return any(fnmatch(parts[-1], pattern) for pattern in GENERATED_FILE_PATTERNS)
+
+
+def file_weight(file: StagedFile) -> float:
+    """
+    Signal score of a file: source beats generated, larger changes beat smaller ones.
+
+    Lines changed are dampened logarithmically so that one huge file
+    cannot starve every other file of budget.
+    """
+    if file.binary or file.lines_changed == 0:
+        return 0.0
+    if is_generated(file.path):
+        kind = GENERATED_WEIGHT
+    elif PurePosixPath(file.path).suffix in SOURCE_EXTENSIONS:
+        kind = SOURCE_WEIGHT
+    else:
+        kind = OTHER_WEIGHT
+    return kind * math.log2(1 + file.lines_changed)
+
+
+@dataclass(frozen=True)
+class BudgetedDiff:
+    """The diff text sent to the AI, after per-file budgeting."""
+
+    text: str
+    truncated: bool = False
+    omitted_files: int = 0
+
+
+class DiffBudget:
+    """
+    Fits a staged diff into max_size units, measured by `measure`.
+
+    Every file first gets its header and hunk headers. The leftover budget is
+    water-filled across file bodies in proportion to file_weight, so small
+    files are shown in full and large ones get a fair share.
+    """
+
+    def __init__(self, max_size: int, measure: Measure = len) -> None:
+        self.max_size = max_size
+        self.measure = measure
+
+    @property
+    def retention_ceiling(self) -> int | None:
+        """Total units the snapshot may retain before it stops reading git."""
+        return (RETENTION_SLACK + 1) * self.max_size
+
+    def retention_limits(self, files: Sequence[StagedFile]) -> list[int]:
+        """Body units each file may retain while the patch is streamed."""
+        if not files:
+            return []
+        weights = [file_weight(f) for f in files]
+        total = sum(weights) or 1.0
+        minimum = self.max_size // len(files)
+        return [max(minimum, int(RETENTION_SLACK * self.max_size * w / total)) for w in weights]
+
+    def apply(self, snapshot: StagedSnapshot) -> BudgetedDiff:
+        files = snapshot.files
+        patches = snapshot.patches
+        measure = self.measure
+
+        floors = [p.render(body_limit=0, measure=measure)[0] for p in patches]
+        floor_sizes = [measure(text) + 1 for text in floors]
+
+        if sum(floor_sizes) > self.max_size:
+            return self._headers_only(files, floors, floor_sizes)
+
+        weights = [file_weight(f) for f in files]
+        body_sizes = [p.body_size for p in patches]
+        # Reduced files are measured by what their reducer kept, not by the original diff
+        changes = [
+            p.changed_lines if p.summary is not None and not p.truncated else f.lines_changed
+            for f, p in zip(files, patches, strict=True)
+        ]
+        markers = [measure(OMITTED_MARKER.format(n)) + 1 for n in changes]
+
+        # Reserve room for the "lines omitted" marker of every file that ends up cut
+        cut: set[int] = set()
+        while True:
+            reserved = sum(floor_sizes) + sum(markers[i] for i in cut)
+            allocation = _water_fill(max(0, self.max_size - reserved), weights, body_sizes)
+            now_cut = {
+                i
+                for i, patch in enumerate(patches)
+                if allocation[i] < body_sizes[i] or patch.truncated
+                if changes[i] > 0
+            }
+            if now_cut <= cut:
+                break
+            cut |= now_cut
+
+        sections = []
+        truncated = False
+        for patch, limit, total in zip(patches, allocation, changes, strict=True):
+            text, kept = patch.render(body_limit=limit, measure=measure)
+            omitted = total - kept
+            if omitted > 0:
+                truncated = True
+                text += "\n" + OMITTED_MARKER.format(omitted)
+            sections.append(text)
+
+        return BudgetedDiff(text="\n".join(sections), truncated=truncated)
+
+    def _headers_only(
+        self, files: Sequence[StagedFile], floors: list[str], floor_sizes: list[int]
+    ) -> BudgetedDiff:
+        """Fallback when even the headers do not fit: keep the highest-signal files."""
+        order = sorted(range(len(files)), key=lambda i: file_weight(files[i]), reverse=True)
+        chosen: dict[int, str] = {}
+        used = 0
+        for i in order:
+            first_line = floors[i].split("\n", 1)[0]
+            for candidate in (floors[i], first_line):
+                size = floor_sizes[i] if candidate is floors[i] else self.measure(candidate) + 1
+                if used + size <= self.max_size:
+                    chosen[i] = candidate
+                    used += size
+                    break
+
+        omitted = len(files) - len(chosen)
+        text = "\n".join(chosen[i] for i in sorted(chosen))
+        if omitted:
+            text += f"\n[... {omitted} more files omitted ...]"
+        return BudgetedDiff(text=text, truncated=True, omitted_files=omitted)
+
+
+class PerFileBudget(DiffBudget):
+    """
+    Retains up to max_size units of every file's body while the patch is streamed.
+
+    For summaries, where each file is sent in a call of its own: no file
+    needs more than one call can take, and a large file does not cost the
+    others their share.
+    """
+
+    @property
+    def retention_ceiling(self) -> int | None:
+        return None
+
+    def retention_limits(self, files: Sequence[StagedFile]) -> list[int]:
+        return [self.max_size] * len(files)
+
+
+def _water_fill(total: int, weights: Sequence[float], caps: Sequence[int]) -> list[int]:
+    """Split total across items in proportion to weights, never exceeding caps."""
+    allocation = [0] * len(caps)
+    active = {i for i, (w, c) in enumerate(zip(weights, caps, strict=True)) if w > 0 and c > 0}
+    remaining = total
+    while active and remaining > 0:
+        weight_sum = sum(weights[i] for i in active)
+        shares = {i: remaining * weights[i] / weight_sum for i in active}
+        saturated = [i for i in active if caps[i] - allocation[i] <= shares[i]]
+        if not saturated:
+            for i in active:
+                allocation[i] += int(shares[i])
+            break
+        for i in saturated:
+            remaining -= caps[i] - allocation[i]
+            allocation[i] = caps[i]
+            active.remove(i)
+    return allocation
@@ -0,0 +1,578 @@
+"""Replace the hunks of machine-written files with compact summaries."""
+
+import difflib
+import json
+import re
+import tomllib
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field, replace
+from fnmatch import fnmatch
+from pathlib import PurePosixPath
+from typing import Any, Protocol, Self
+
+from git_ai.support.python_summary import summarize_many
+from git_ai.support.staged_snapshot import FilePatch, Hunk, Measure, StagedFile, StagedSnapshot
+
+MINIFIED_LINE_LENGTH = 1000
+"""Any retained diff line longer than this marks a file as minified."""
+
+LOCKFILE_DETAIL_LIMIT = 10
+"""How many package changes a lockfile summary lists by name."""
+
+_SUMMARY_DROPPED_HEADERS = (
+    "index ",
+    "--- ",
+    "+++ ",
+    "Binary files ",
+    "GIT binary patch",
+    "similarity index ",
+    "dissimilarity index ",
+    "rename from ",
+    "rename to ",
+    "copy from ",
+    "copy to ",
+)
+
+PYTHON_SUMMARY_MODES = ("off", "alongside", "replace")
+
+_STATUS_VERBS = {"A": "added", "D": "deleted", "R": "renamed", "C": "copied"}
+
+
+class BlobSource(Protocol):
+    """Anything that can read staged blobs by sha, such as GitService."""
+
+    def read_blobs(self, shas: Iterable[str]) -> dict[str, bytes]: ...
+
+    def get_blob_sizes(self, shas: Iterable[str]) -> dict[str, int]: ...
+
+
+@dataclass(frozen=True)
+class Blobs:
+    """Blob contents and sizes fetched for the files being reduced."""
+
+    contents: dict[str, bytes] = field(default_factory=dict)
+    sizes: dict[str, int] = field(default_factory=dict)
+
+    def text(self, sha: str) -> str | None:
+        content = self.contents.get(sha)
+        return None if content is None else content.decode(errors="replace")
+
+    def texts(self, file: StagedFile) -> tuple[str, str] | None:
+        """Old and new content of a file, empty on the side that does not exist."""
+        old = "" if file.status == "A" else self.text(file.old_blob)
+        new = "" if file.status == "D" else self.text(file.new_blob)
+        if old is None or new is None:
+            return None
+        return old, new
+
+    def size(self, sha: str) -> int | None:
+        if sha in self.sizes:
+            return self.sizes[sha]
+        content = self.contents.get(sha)
+        return None if content is None else len(content)
+
+    def describe_change(self, file: StagedFile, verb: str = "changed") -> str:
+        """Describe a file change by its size, e.g. "changed (1.2 KB -> 1.4 KB)"."""
+        old, new = self.size(file.old_blob), self.size(file.new_blob)
+        verb = _STATUS_VERBS.get(file.status, verb)
+        if file.status == "A" and new is not None:
+            return f"{verb} ({_format_size(new)})"
+        if file.status == "D" and old is not None:
+            return f"{verb} ({_format_size(old)})"
+        if old is not None and new is not None:
+            return f"{verb} ({_format_size(old)} -> {_format_size(new)})"
+        return verb
+
+
+class DiffReducer(ABC):
+    """
+    Summarizes one kind of file instead of sending its hunks to the AI.
+
+    `patterns` are matched against both the full path and the file name.
+    Reducers that parse file contents set `reads_content`; the others only
+    receive blob sizes, unless they clear `reads_sizes` as well.
+    """
+
+    name = "abstract"
+    patterns: tuple[str, ...] = ()
+    reads_content = False
+    reads_sizes = True
+
+    def __init__(self, extra_patterns: Sequence[str] = ()) -> None:
+        self.extra_patterns = tuple(extra_patterns)
+
+    def matches(self, file: StagedFile, patch: FilePatch) -> bool:
+        return _matches(file.path, self.patterns + self.extra_patterns)
+
+    @abstractmethod
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        """Return the reduced patch, or None to keep the original."""
+        ...
+
+    def reduce_all(
+        self, items: Sequence[tuple[StagedFile, FilePatch]], blobs: Blobs
+    ) -> list[FilePatch | None]:
+        """Reduce every file routed to this reducer; override to batch the work."""
+        return [self.reduce(file, patch, blobs) for file, patch in items]
+
+
+class BinaryReducer(DiffReducer):
+    name = "binary"
+
+    def matches(self, file: StagedFile, patch: FilePatch) -> bool:
+        return file.binary or super().matches(file, patch)
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        return _summarized(patch, f"binary: {file.path} {blobs.describe_change(file)}")
+
+
+class SvgReducer(DiffReducer):
+    name = "svg"
+    patterns = ("*.svg",)
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        return _summarized(patch, f"svg: {file.path} {blobs.describe_change(file)}")
+
+
+class MinifiedReducer(DiffReducer):
+    name = "minified"
+    patterns = ("*.min.js", "*.min.mjs", "*.min.css", "*.bundle.js", "*.chunk.js", "*.chunk.css")
+
+    def matches(self, file: StagedFile, patch: FilePatch) -> bool:
+        if super().matches(file, patch):
+            return True
+        # Measured while streaming, so the long lines count even when the budget dropped them
+        return patch.longest_line > MINIFIED_LINE_LENGTH
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        change = blobs.describe_change(file, verb="rebuilt")
+        return _summarized(patch, f"minified: {file.path} {change}")
+
+
+class LockfileReducer(DiffReducer):
+    """Summarizes a lockfile by the package versions that changed between both blobs."""
+
+    name = "lockfile"
+    reads_content = True
+
+    def matches(self, file: StagedFile, patch: FilePatch) -> bool:
+        return PurePosixPath(file.path).name in LOCKFILE_PARSERS or super().matches(file, patch)
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        if (texts := blobs.texts(file)) is None:
+            return None
+        old_text, new_text = texts
+
+        parse = LOCKFILE_PARSERS.get(PurePosixPath(file.path).name, _parse_any_lockfile)
+        try:
+            old = parse(old_text) if old_text else {}
+            new = parse(new_text) if new_text else {}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # tomllib and json decode errors are both ValueErrors
+            return None
+
+        bumped = sorted(n for n in old.keys() & new.keys() if old[n] != new[n])
+        added = sorted(new.keys() - old.keys())
+        removed = sorted(old.keys() - new.keys())
+
+        counts = _counts("package", bumped=len(bumped), added=len(added), removed=len(removed))
+        if not counts:
+            return _summarized(patch, f"{file.path}: regenerated, no package versions changed")
+
+        details = (
+            [f"  bumped {n} {old[n]} -> {new[n]}" for n in bumped]
+            + [f"  added {n} {new[n]}" for n in added]
+            + [f"  removed {n} {old[n]}" for n in removed]
+        )
+        if len(details) > LOCKFILE_DETAIL_LIMIT:
+            rest = len(details) - LOCKFILE_DETAIL_LIMIT
+            details = details[:LOCKFILE_DETAIL_LIMIT] + [f"  ... and {rest} more"]
+        return _summarized(patch, "\n".join([f"{file.path}: {counts}", *details]))
+
+
+class NotebookReducer(DiffReducer):
+    """Diffs the cell sources of a Jupyter notebook, leaving outputs and metadata out."""
+
+    name = "notebook"
+    patterns = ("*.ipynb",)
+    reads_content = True
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        if (texts := blobs.texts(file)) is None:
+            return None
+        old_text, new_text = texts
+
+        try:
+            old_cells = _notebook_cells(old_text) if old_text else []
+            new_cells = _notebook_cells(new_text) if new_text else []
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+        edited = added = removed = 0
+        matcher = difflib.SequenceMatcher(None, old_cells, new_cells, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            edited += min(i2 - i1, j2 - j1)
+            added += max(0, (j2 - j1) - (i2 - i1))
+            removed += max(0, (i2 - i1) - (j2 - j1))
+
+        summary = _counts("cell", edited=edited, added=added, removed=removed)
+        hunks = _source_hunks(_cell_lines(old_cells), _cell_lines(new_cells))
+        summary = summary or "only outputs or metadata changed"
+        return _summarized(patch, f"notebook: {summary}, outputs stripped", hunks)
+
+
+class PythonReducer(DiffReducer):
+    """
+    Summarizes Python changes structurally: definitions added, removed or changed.
+
+    In "alongside" mode the summary is prepended to the original hunks, in
+    "replace" mode it stands in for them. Files that do not parse keep their hunks.
+    """
+
+    name = "python"
+    patterns = ("*.py", "*.pyi")
+    reads_content = True
+
+    def __init__(self, extra_patterns: Sequence[str] = (), mode: str = "alongside") -> None:
+        super().__init__(extra_patterns)
+        if mode not in PYTHON_SUMMARY_MODES:
+            raise ValueError(
+                f"Invalid python_summary: '{mode}'. Must be 'off', 'alongside', or 'replace'."
+            )
+        self.mode = mode
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        return self.reduce_all([(file, patch)], blobs)[0]
+
+    def reduce_all(
+        self, items: Sequence[tuple[StagedFile, FilePatch]], blobs: Blobs
+    ) -> list[FilePatch | None]:
+        texts = [blobs.texts(file) for file, _ in items]
+        parseable = [pair for pair in texts if pair is not None]
+        summaries = iter(summarize_many(parseable))
+
+        reduced: list[FilePatch | None] = []
+        for (file, patch), pair in zip(items, texts, strict=True):
+            changes = next(summaries) if pair is not None else None
+            if changes is None:
+                reduced.append(None)
+                continue
+            lines = [_move_line(file)] if file.old_path and file.old_path != file.path else []
+            if changes:
+                lines.append("python structure:")
+                lines.extend(f"  {change}" for change in changes)
+            else:
+                lines.append("python structure: unchanged (formatting or comments only)")
+            if self.mode == "replace":
+                reduced.append(_summarized(patch, "\n".join(lines)))
+            else:
+                summary = _summarized(patch, "\n".join(lines), patch.hunks)
+                reduced.append(replace(summary, dropped=patch.dropped, unread=patch.unread))
+        return reduced
+
+
+class RenameReducer(DiffReducer):
+    """Collapses the rename or copy headers into one line, keeping only the residual hunks."""
+
+    name = "rename"
+    reads_sizes = False
+
+    def matches(self, file: StagedFile, patch: FilePatch) -> bool:
+        return file.old_path is not None and file.old_path != file.path
+
+    def reduce(self, file: StagedFile, patch: FilePatch, blobs: Blobs) -> FilePatch | None:
+        reduced = _summarized(patch, _move_line(file), patch.hunks)
+        return replace(reduced, dropped=patch.dropped, unread=patch.unread)
+
+
+REDUCERS: dict[str, type[DiffReducer]] = {
+    reducer.name: reducer
+    for reducer in (
+        BinaryReducer,
+        LockfileReducer,
+        NotebookReducer,
+        SvgReducer,
+        MinifiedReducer,
+        RenameReducer,
+    )
+}
+
+
+class ReducerPipeline:
+    """
+    Runs the configured reducers over a snapshot before it is budgeted.
+
+    Each file goes to the first reducer that matches it. Blobs are fetched in
+    one batch for all reduced files, and files matching a `keep` pattern are
+    always sent as-is.
+    """
+
+    def __init__(self, reducers: Sequence[DiffReducer], keep: Sequence[str] = ()) -> None:
+        self.reducers = list(reducers)
+        self.keep = tuple(keep)
+
+    @classmethod
+    def from_config(cls, config: Any) -> Self:
+        """Build the pipeline from the `[git-ai.diff]` config section."""
+        diff = config.diff
+        # The python reducer is enabled through python_summary, but accepts rules too
+        for name in [*diff.reducers, *(r for r in diff.rules if r != PythonReducer.name)]:
+            if name not in REDUCERS:
+                raise ValueError(
+                    f"Unknown diff reducer: '{name}'. Available: {', '.join(REDUCERS)}"
+                )
+        reducers = [REDUCERS[name](diff.rules.get(name, ())) for name in diff.reducers]
+        if diff.python_summary != "off":
+            python = PythonReducer(diff.rules.get("python", ()), mode=diff.python_summary)
+            reducers.insert(0, python)
+        return cls(reducers, keep=diff.keep)
+
+    def apply(
+        self, snapshot: StagedSnapshot, source: BlobSource, measure: Measure = len
+    ) -> StagedSnapshot:
+        chosen: dict[int, DiffReducer] = {}
+        for index, (file, patch) in enumerate(zip(snapshot.files, snapshot.patches, strict=True)):
+            if _matches(file.path, self.keep):
+                continue
+            if reducer := next((r for r in self.reducers if r.matches(file, patch)), None):
+                chosen[index] = reducer
+        if not chosen:
+            return snapshot
+
+        content_shas: list[str] = []
+        size_shas: list[str] = []
+        for index, reducer in chosen.items():
+            file = snapshot.files[index]
+            if reducer.reads_content:
+                content_shas.extend((file.old_blob, file.new_blob))
+            elif reducer.reads_sizes:
+                size_shas.extend((file.old_blob, file.new_blob))
+        blobs = Blobs(
+            contents=source.read_blobs(content_shas) if content_shas else {},
+            sizes=source.get_blob_sizes(size_shas) if size_shas else {},
+        )
+
+        routed: dict[DiffReducer, list[int]] = {}
+        for index, reducer in chosen.items():
+            routed.setdefault(reducer, []).append(index)
+
+        patches = list(snapshot.patches)
+        for reducer, indices in routed.items():
+            items = [(snapshot.files[i], patches[i]) for i in indices]
+            for index, reduced in zip(indices, reducer.reduce_all(items, blobs), strict=True):
+                if reduced is not None:
+                    body_size = sum(measure(line) + 1 for h in reduced.hunks for line in h.lines)
+                    patches[index] = replace(reduced, body_size=body_size)
+        return replace(snapshot, patches=tuple(patches))
+
+
+def _move_line(file: StagedFile) -> str:
+    verb = "copied" if file.status == "C" else "renamed"
+    similarity = f" ({file.similarity}% similar)" if file.similarity is not None else ""
+    return f"{verb} {file.old_path} -> {file.path}{similarity}"
+
+
+def _matches(path: str, patterns: Sequence[str]) -> bool:
+    name = PurePosixPath(path).name
+    return any(fnmatch(path, pattern) or fnmatch(name, pattern) for pattern in patterns)
+
+
+def _summarized(patch: FilePatch, summary: str, hunks: Sequence[Hunk] = ()) -> FilePatch:
+    """A patch that keeps the file header and replaces the hunks with a summary."""
+    header = [line for line in patch.header if not line.startswith(_SUMMARY_DROPPED_HEADERS)]
+    return FilePatch(header=header or patch.header[:1], hunks=list(hunks), summary=summary)
+
+
+def _counts(noun: str, **counts: int) -> str:
+    """Join non-zero counts, naming the noun once: "3 packages bumped, 1 added"."""
+    parts = [f"{count} {verb}" for verb, count in counts.items() if count]
+    if parts:
+        first = next(count for count in counts.values() if count)
+        count, verb = parts[0].split(" ", 1)
+        parts[0] = f"{count} {noun}{'s' if first != 1 else ''} {verb}"
+    return ", ".join(parts)
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+# ---------------------------------------------------------------------------
+# lockfile parsers: text -> {package name: version(s)}
+# ---------------------------------------------------------------------------
+
+
+class _Packages:
+    def __init__(self) -> None:
+        self.versions: dict[str, set[str]] = {}
+
+    def add(self, name: Any, version: Any) -> None:
+        if name:
+            self.versions.setdefault(str(name), set()).add(str(version or "?"))
+
+    def result(self) -> dict[str, str]:
+        return {name: ", ".join(sorted(v)) for name, v in self.versions.items()}
+
+
+def _parse_toml_lock(text: str) -> dict[str, str]:
+    """uv.lock, poetry.lock, pdm.lock and Cargo.lock."""
+    packages = _Packages()
+    for package in tomllib.loads(text).get("package", []):
+        packages.add(package.get("name"), package.get("version"))
+    return packages.result()
+
+
+def _parse_npm_lock(text: str) -> dict[str, str]:
+    data = json.loads(text)
+    packages = _Packages()
+    if entries := data.get("packages"):
+        for key, info in entries.items():
+            if key:
+                name = info.get("name") or key.rsplit("node_modules/", 1)[-1]
+                packages.add(name, info.get("version"))
+    else:
+        for name, info in data.get("dependencies", {}).items():
+            packages.add(name, info.get("version"))
+    return packages.result()
+
+
+def _parse_pipfile_lock(text: str) -> dict[str, str]:
+    data = json.loads(text)
+    packages = _Packages()
+    for section in ("default", "develop"):
+        for name, info in data.get(section, {}).items():
+            packages.add(name, str(info.get("version", "")).lstrip("="))
+    return packages.result()
+
+
+def _parse_composer_lock(text: str) -> dict[str, str]:
+    data = json.loads(text)
+    packages = _Packages()
+    for package in [*data.get("packages", []), *data.get("packages-dev", [])]:
+        packages.add(package.get("name"), package.get("version"))
+    return packages.result()
+
+
+_YARN_VERSION = re.compile(r'^\s+version:?\s+"?([^"\s]+)"?')
+
+
+def _parse_yarn_lock(text: str) -> dict[str, str]:
+    packages = _Packages()
+    current: str | None = None
+    for line in text.splitlines():
+        if line and not line[0].isspace() and not line.startswith("#"):
+            spec = line.rstrip().rstrip(":").split(",")[0].strip().strip('"')
+            # Scoped packages start with "@", so look for the version "@" after it
+            at = spec.find("@", 1)
+            current = spec[:at] if at > 0 else None
+        elif current and (m := _YARN_VERSION.match(line)):
+            packages.add(current, m.group(1))
+            current = None
+    return packages.result()
+
+
+_PNPM_KEY = re.compile(r"^  ['\"]?/?(?P<key>[^'\":\s]+)['\"]?:\s*$")
+
+
+def _parse_pnpm_lock(text: str) -> dict[str, str]:
+    packages = _Packages()
+    in_packages = False
+    for line in text.splitlines():
+        if line and not line[0].isspace():
+            in_packages = line.rstrip() == "packages:"
+            continue
+        if in_packages and (m := _PNPM_KEY.match(line)):
+            key = m.group("key").split("(")[0]
+            separator = "@" if "@" in key[1:] else "/"
+            name, _, version = key.rpartition(separator)
+            packages.add(name, version)
+    return packages.result()
+
+
+_GEMFILE_SPEC = re.compile(r"^    (\S+) \(([^)]+)\)$")
+
+
+def _parse_gemfile_lock(text: str) -> dict[str, str]:
+    packages = _Packages()
+    for line in text.splitlines():
+        if m := _GEMFILE_SPEC.match(line):
+            packages.add(m.group(1), m.group(2))
+    return packages.result()
+
+
+def _parse_go_sum(text: str) -> dict[str, str]:
+    packages = _Packages()
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) == 3:
+            packages.add(parts[0], parts[1].removesuffix("/go.mod"))
+    return packages.result()
+
+
+def _parse_any_lockfile(text: str) -> dict[str, str]:
+    """Lockfiles matched by a custom rule: try each format until one finds packages."""
+    for parse in (_parse_toml_lock, _parse_npm_lock, _parse_yarn_lock, _parse_gemfile_lock):
+        try:
+            if packages := parse(text):
+                return packages
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+    raise ValueError("Unrecognized lockfile format")
+
+
+LOCKFILE_PARSERS: dict[str, Callable[[str], dict[str, str]]] = {
+    "uv.lock": _parse_toml_lock,
+    "poetry.lock": _parse_toml_lock,
+    "pdm.lock": _parse_toml_lock,
+    "Cargo.lock": _parse_toml_lock,
+    "package-lock.json": _parse_npm_lock,
+    "npm-shrinkwrap.json": _parse_npm_lock,
+    "Pipfile.lock": _parse_pipfile_lock,
+    "composer.lock": _parse_composer_lock,
+    "yarn.lock": _parse_yarn_lock,
+    "pnpm-lock.yaml": _parse_pnpm_lock,
+    "Gemfile.lock": _parse_gemfile_lock,
+    "go.sum": _parse_go_sum,
+}
+
+
+# ---------------------------------------------------------------------------
+# notebooks
+# ---------------------------------------------------------------------------
+
+
+def _notebook_cells(text: str) -> list[tuple[str, str]]:
+    cells = []
+    for cell in json.loads(text).get("cells", []):
+        source = cell.get("source", "")
+        if isinstance(source, list):
+            source = "".join(source)
+        cells.append((cell.get("cell_type", "code"), source))
+    return cells
+
+
+def _cell_lines(cells: list[tuple[str, str]]) -> list[str]:
+    lines = []
+    for cell_type, source in cells:
+        lines.append(f"# %% [{cell_type}]")
+        lines.extend(source.splitlines())
+    return lines
+
+
+def _source_hunks(old: list[str], new: list[str]) -> list[Hunk]:
+    hunks: list[Hunk] = []
+    for line in difflib.unified_diff(old, new, lineterm=""):
+        if line.startswith(("--- ", "+++ ")) and not hunks:
+            continue
+        if line.startswith("@@"):
+            hunks.append(Hunk(header=line))
+        elif hunks:
+            hunks[-1].lines.append(line)
+    return hunks
@@ -0,0 +1,142 @@
+"""Notification of changes to the git index, through inotify or mtime polling."""
+
+import os
+import select
+import struct
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Self
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class IndexWatcher:
+    """
+    Yields once per settled change to the index file.
+
+    Git rewrites the index by renaming `index.lock` over it, so on Linux the
+    watcher follows the parent directory through inotify and filters events
+    by name; elsewhere, or when inotify is unavailable, it polls the file's
+    mtime, size and inode. A change only counts once no further change has
+    followed for `debounce` seconds, so one `git add -A` is one change.
+    """
+
+    def __init__(
+        self,
+        index_path: str | Path,
+        debounce: float = 1.0,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        self.index_path = Path(index_path)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._inotify_fd: int | None = None
+        if use_inotify:
+            self._inotify_fd = _inotify_watch(self.index_path.parent)
+        self._signature = self._stat_signature()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify_fd is not None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def changes(self) -> Iterator[None]:
+        while True:
+            self._wait(None)
+            # Keep absorbing changes until the index has been quiet for a while
+            while self._wait(self.debounce):
+                pass
+            yield
+
+    def close(self) -> None:
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def _wait(self, timeout: float | None) -> bool:
+        """Block until the index changes or `timeout` seconds pass; return whether it changed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._inotify_fd is not None:
+                changed = self._read_events(self._inotify_fd, remaining)
+            else:
+                changed = self._poll(remaining)
+            if changed:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def _read_events(self, fd: int, timeout: float | None) -> bool:
+        readable, _, _ = select.select([fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(fd, _READ_SIZE)
+        except BlockingIOError:
+            return False
+
+        name = self.index_path.name.encode()
+        changed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            start = offset + _EVENT_HEADER.size
+            if data[start : start + length].rstrip(b"\0") == name:
+                changed = True
+            offset = start + length
+        return changed
+
+    def _poll(self, timeout: float | None) -> bool:
+        time.sleep(self.poll_interval if timeout is None else min(self.poll_interval, timeout))
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def _stat_signature(self) -> tuple[int, int, int] | None:
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def _inotify_watch(directory: Path) -> int | None:
+    """An inotify descriptor watching directory, or None where inotify is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    import ctypes
+    import ctypes.util
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd: int = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+
+    mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
@@ -0,0 +1,151 @@
+"""Incremental parsing of a JSON object that arrives in chunks."""
+
+import json
+import re
+from typing import Any
+
+_CUT_ESCAPE = re.compile(r"(\\+)(u[0-9a-fA-F]{0,3})?$")
+_HIGH_SURROGATE = re.compile(r"\\u[dD][89abAB][0-9a-fA-F]{2}$")
+
+
+class JsonStreamParser:
+    """
+    Reads the top-level fields of a streamed JSON object as they complete.
+
+    `fields` holds every value whose closing character has arrived, and
+    `partial` the decoded text of a string value still being streamed.
+    Anything before the opening brace, such as a code fence, is skipped.
+    Malformed input stops the parser quietly: the complete response is
+    parsed strictly once it has arrived.
+    """
+
+    def __init__(self) -> None:
+        self.fields: dict[str, Any] = {}
+        self.partial: dict[str, str] = {}
+        self._state = "before-object"
+        self._buffer: list[str] = []
+        self._key = ""
+        self._escaped = False
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return whether `fields` or `partial` changed."""
+        before = (len(self.fields), dict(self.partial))
+        for char in chunk:
+            if self._state == "done":
+                break
+            self._step(char)
+
+        self.partial = {}
+        if self._state == "string":
+            self.partial[self._key] = _decode_partial("".join(self._buffer))
+        return before != (len(self.fields), self.partial)
+
+    def _step(self, char: str) -> None:
+        match self._state:
+            case "before-object":
+                if char == "{":
+                    self._state = "before-key"
+            case "before-key":
+                if char == '"':
+                    self._start("key")
+                elif char == "}" or not (char.isspace() or char == ","):
+                    self._state = "done"
+            case "key" | "string":
+                self._read_string(char)
+            case "colon":
+                if char == ":":
+                    self._state = "before-value"
+                elif not char.isspace():
+                    self._state = "done"
+            case "before-value":
+                if char == '"':
+                    self._start("string")
+                elif char in "{[":
+                    self._start("container")
+                    self._buffer.append(char)
+                    self._depth = 1
+                elif not char.isspace():
+                    self._start("scalar")
+                    self._buffer.append(char)
+            case "scalar":
+                if char in ",}" or char.isspace():
+                    self._finish("".join(self._buffer))
+                    self._step(char)
+                else:
+                    self._buffer.append(char)
+            case "container":
+                self._read_container(char)
+            case "after-value":
+                if char == ",":
+                    self._state = "before-key"
+                elif char == "}" or not char.isspace():
+                    self._state = "done"
+
+    def _start(self, state: str) -> None:
+        self._state = state
+        self._buffer = []
+        self._escaped = False
+
+    def _read_string(self, char: str) -> None:
+        if self._escaped:
+            self._escaped = False
+        elif char == "\\":
+            self._escaped = True
+        elif char == '"':
+            raw = f'"{"".join(self._buffer)}"'
+            if self._state == "key":
+                try:
+                    self._key = json.loads(raw)
+                except ValueError:
+                    self._state = "done"
+                    return
+                self._state = "colon"
+            else:
+                self._finish(raw)
+            return
+        self._buffer.append(char)
+
+    def _read_container(self, char: str) -> None:
+        self._buffer.append(char)
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+        elif char == '"':
+            self._in_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish("".join(self._buffer))
+
+    def _finish(self, raw: str) -> None:
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except ValueError:
+            self._state = "done"
+            return
+        self._state = "after-value"
+
+
+def _decode_partial(raw: str) -> str:
+    """Decode a string cut off mid-stream, leaving out an escape the chunk split."""
+    if (cut := _CUT_ESCAPE.search(raw)) and len(cut.group(1)) % 2:
+        raw = raw[: cut.start()] + cut.group(1)[:-1]
+    # A high surrogate only decodes together with the low one that follows it
+    raw = _HIGH_SURROGATE.sub("", raw)
+    try:
+        decoded: str = json.loads(f'"{raw}"')
+    except ValueError:
+        return ""
+    return decoded
@@ -0,0 +1,66 @@
+"""Recent response times of each AI provider, kept per repository."""
+
+import json
+import math
+from pathlib import Path
+from typing import Self
+
+from git_ai.support.atomic_write import atomic_write
+
+HISTORY_FILE = Path("git-ai") / "latency.json"
+"""Where the history lives, relative to the repository's git directory."""
+
+MAX_SAMPLES = 50
+"""Samples kept per provider; older ones age out so the history follows the provider."""
+
+MIN_SAMPLES = 5
+"""Below this, a percentile says more about luck than about the provider."""
+
+
+class LatencyHistory:
+    """
+    A rolling window of how long each provider took to answer.
+
+    Only uncached answers that completed are recorded; a request cancelled
+    for a faster provider says nothing about its latency. Concurrent git-ai
+    processes may each drop the other's latest sample, which a rolling
+    window tolerates; the file itself is replaced atomically.
+    """
+
+    def __init__(self, path: str | Path, max_samples: int = MAX_SAMPLES) -> None:
+        self.path = Path(path)
+        self.max_samples = max_samples
+
+    @classmethod
+    def for_git_dir(cls, git_dir: str | Path) -> Self:
+        return cls(Path(git_dir) / HISTORY_FILE)
+
+    def samples(self, provider: str) -> list[float]:
+        samples = self._load().get(provider, [])
+        return [float(s) for s in samples if isinstance(s, int | float)]
+
+    def percentile(self, provider: str, q: float) -> float | None:
+        """The q-th quantile (0-1) of the provider's recent latencies, if there are enough."""
+        samples = sorted(self.samples(provider))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)]
+
+    def record(self, provider: str, seconds: float) -> None:
+        history = self._load()
+        samples = history.get(provider)
+        if not isinstance(samples, list):
+            samples = []
+        history[provider] = [*samples, round(seconds, 3)][-self.max_samples :]
+        try:
+            atomic_write(self.path, json.dumps(history))
+        except OSError:
+            return
+
+    def _load(self) -> dict[str, list]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return history if isinstance(history, dict) else {}
@@ -0,0 +1,65 @@
+"""Deterministic changelog sections built straight from the commits, without an AI round trip."""
+
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from git_ai.enums import CommitType
+from git_ai.support.changelog_batches import merge_sections
+from git_ai.support.commit_log import CommitRecord
+from git_ai.support.conventional_commit import ConventionalCommit, parse_commit_message
+
+CHANGELOG_ENGINES = ("ai", "local")
+"""Who writes the entries: the AI, or `local_entry` straight from the commit messages."""
+
+SKIPPED_PREFIXES = ("Merge ", "fixup! ", "squash! ")
+"""Titles that say nothing about the change itself."""
+
+_ORDER = {ctype: position for position, ctype in enumerate(CommitType.values())}
+
+
+def local_entry(subject: str, parsed: ConventionalCommit | None) -> str:
+    """
+    The changelog entry of one commit: its description without the type prefix.
+
+    A scope is kept as a prefix in parentheses, the first letter is
+    capitalized, and a breaking change is called out with its note.
+    """
+    if parsed is None:
+        return subject
+    entry = parsed.description[:1].upper() + parsed.description[1:]
+    if parsed.scope:
+        entry = f"({parsed.scope}) {entry}"
+    if parsed.breaking:
+        note = parsed.breaking_note
+        entry = f"**BREAKING** {entry}" + (f" ({' '.join(note.split())})" if note else "")
+    return entry
+
+
+def local_commit_entry(commit: CommitRecord) -> tuple[str, str] | None:
+    """The section type and entry of one commit, or None if it is not worth listing."""
+    if commit.subject.startswith(SKIPPED_PREFIXES):
+        return None
+    parsed = parse_commit_message(commit.message)
+    ctype = "other" if parsed is None else parsed.type.lower()
+    return ctype, local_entry(commit.subject, parsed)
+
+
+def local_entries(commits: Iterable[CommitRecord]) -> Iterator[tuple[str, str]]:
+    """Yield the section type and entry of every commit worth listing, as they stream in."""
+    for commit in commits:
+        if (entry := local_commit_entry(commit)) is not None:
+            yield entry
+
+
+def local_sections(entries: Iterable[tuple[str, str]]) -> list[dict[str, Any]]:
+    """
+    Group the entries into sections, in the order the commit types are declared.
+
+    Types outside CommitType follow in the order they first appear, with
+    `other` last, and repeated entries are listed once.
+    """
+    grouped: dict[str, list[str]] = {}
+    for ctype, entry in entries:
+        grouped.setdefault(ctype, []).append(entry)
+    order = sorted(grouped, key=lambda t: (t == "other", _ORDER.get(t, len(_ORDER))))
+    return merge_sections([[{"type": t, "entries": grouped[t]} for t in order]])
@@ -0,0 +1,64 @@
+"""Commit messages generated ahead of time, keyed by the staged tree."""
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Self
+
+from git_ai.support.atomic_write import atomic_write
+
+STORE_DIRECTORY = Path("git-ai") / "pregenerated"
+"""Where the store lives, relative to the repository's git directory."""
+
+MAX_ENTRIES = 20
+"""Older entries are pruned; only recently staged trees are worth keeping."""
+
+
+class PregeneratedStore:
+    """
+    Holds the AI response for a staged tree until `git-ai commit` asks for it.
+
+    Entries are keyed by the `git write-tree` hash, which changes whenever
+    the staged content does, together with a fingerprint of the settings
+    that shaped the prompt, so a config change never serves a stale message.
+    """
+
+    def __init__(self, directory: str | Path, max_entries: int = MAX_ENTRIES) -> None:
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+
+    @classmethod
+    def for_git_dir(cls, git_dir: str | Path) -> Self:
+        return cls(Path(git_dir) / STORE_DIRECTORY)
+
+    def get(self, tree: str, fingerprint: str) -> dict[str, Any] | None:
+        try:
+            with open(self._path(tree), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+            return None
+        response = entry.get("response")
+        return response if isinstance(response, dict) else None
+
+    def put(self, tree: str, fingerprint: str, response: dict[str, Any]) -> None:
+        entry = {"fingerprint": fingerprint, "created": time.time(), "response": response}
+        try:
+            atomic_write(self._path(tree), json.dumps(entry))
+        except OSError:
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        for _, path in sorted(entries, reverse=True)[self.max_entries :]:
+            path.unlink(missing_ok=True)
+
+    def _path(self, tree: str) -> Path:
+        return self.directory / f"{tree}.json"
@@ -0,0 +1,211 @@
+"""Structural summaries of Python source changes, built from the AST."""
+
+import ast
+import os
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+SUMMARY_LINE_LIMIT = 30
+"""Changes listed per file before the rest are counted."""
+
+PROCESS_POOL_MIN_FILES = 4
+"""Below this many files, parsing in-process beats starting a pool."""
+
+
+@dataclass(frozen=True)
+class Definition:
+    """A function or class, with what the summary compares between versions."""
+
+    kind: str
+    signature: str
+    decorators: tuple[str, ...]
+    body: str
+
+
+def summarize_python_change(old_source: str, new_source: str) -> list[str] | None:
+    """
+    Describe what changed structurally between two versions of a module.
+
+    Returns None when either side does not parse, so callers can fall back
+    to the raw hunks.
+    """
+    try:
+        old_tree = ast.parse(old_source)
+        new_tree = ast.parse(new_source)
+    except (SyntaxError, ValueError):
+        return None
+
+    old_defs, new_defs = _definitions(old_tree), _definitions(new_tree)
+    added_names = [n for n in new_defs if n not in old_defs]
+    removed_names = [n for n in old_defs if n not in new_defs]
+
+    # Most telling first, so the line limit cuts the least useful changes
+    removed = [f"removed {old_defs[n].kind} `{n}`" for n in _outermost(removed_names)]
+    changed: list[str] = []
+    modified: list[str] = []
+    for name, definition in new_defs.items():
+        before = old_defs.get(name)
+        if before is None:
+            continue
+        if before.kind != definition.kind:
+            changed.append(f"turned {before.kind} `{name}` into a {definition.kind}")
+        elif before.signature != definition.signature:
+            what = "bases" if definition.kind == "class" else "signature"
+            changed.append(
+                f"changed {what} of `{name}`: {before.signature or '()'} -> "
+                f"{definition.signature or '()'}"
+            )
+        elif before.decorators != definition.decorators:
+            changed.append(f"changed decorators of `{name}`")
+        elif before.body != definition.body:
+            modified.append(f"modified {definition.kind} `{name}`")
+    added = [
+        f"added {new_defs[n].kind} `{n}{new_defs[n].signature}`" + _members_note(n, new_defs)
+        for n in _outermost(added_names)
+    ]
+    changes = [*removed, *changed, *added, *modified]
+
+    old_imports, new_imports = _imports(old_tree), _imports(new_tree)
+    parts = []
+    if imported := sorted(new_imports - old_imports):
+        parts.append(f"added {', '.join(imported)}")
+    if dropped := sorted(old_imports - new_imports):
+        parts.append(f"removed {', '.join(dropped)}")
+    if parts:
+        changes.append("imports: " + "; ".join(parts))
+
+    old_constants, new_constants = _constants(old_tree), _constants(new_tree)
+    for name, value in new_constants.items():
+        if name not in old_constants:
+            changes.append(f"added constant `{name}`")
+        elif old_constants[name] != value:
+            changes.append(f"changed constant `{name}`")
+    changes.extend(f"removed constant `{n}`" for n in old_constants if n not in new_constants)
+
+    if not changes and _module_body(old_tree) != _module_body(new_tree):
+        changes.append("modified module-level code")
+
+    if len(changes) > SUMMARY_LINE_LIMIT:
+        rest = len(changes) - SUMMARY_LINE_LIMIT
+        changes = changes[:SUMMARY_LINE_LIMIT] + [f"... and {rest} more changes"]
+    return changes
+
+
+def summarize_many(
+    pairs: Sequence[tuple[str, str]], processes: int | None = None
+) -> list[list[str] | None]:
+    """
+    Summarize several (old, new) source pairs, parsing them in a process pool.
+
+    Parsing is CPU-bound and holds the GIL, so large Python changes are
+    spread across processes; a handful of files is parsed in-process.
+    """
+    workers = min(len(pairs), processes or os.cpu_count() or 1)
+    if len(pairs) < PROCESS_POOL_MIN_FILES or workers < 2:
+        return [summarize_python_change(old, new) for old, new in pairs]
+
+    olds, news = zip(*pairs, strict=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(summarize_python_change, olds, news))
+
+
+def _definitions(tree: ast.Module) -> dict[str, Definition]:
+    """Every function and class, keyed by its dotted path inside the module."""
+    found: dict[str, Definition] = {}
+
+    def visit(body: list[ast.stmt], prefix: str, in_class: bool) -> None:
+        for node in body:
+            if isinstance(node, ast.FunctionDef | ast.AsyncFunctionDef):
+                kind = "method" if in_class else "function"
+                found[prefix + node.name] = Definition(
+                    kind=kind,
+                    signature=_signature(node),
+                    decorators=tuple(ast.unparse(d) for d in node.decorator_list),
+                    body=ast.dump(ast.Module(body=node.body, type_ignores=[])),
+                )
+            elif isinstance(node, ast.ClassDef):
+                bases = [ast.unparse(b) for b in [*node.bases, *node.keywords]]
+                # Methods are compared on their own, so only the class's other statements count
+                own_body = [
+                    s
+                    for s in node.body
+                    if not isinstance(s, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef)
+                ]
+                found[prefix + node.name] = Definition(
+                    kind="class",
+                    signature=f"({', '.join(bases)})" if bases else "",
+                    decorators=tuple(ast.unparse(d) for d in node.decorator_list),
+                    body=ast.dump(ast.Module(body=own_body, type_ignores=[])),
+                )
+                visit(node.body, f"{prefix}{node.name}.", in_class=True)
+
+    visit(tree.body, "", in_class=False)
+    return found
+
+
+def _outermost(names: list[str]) -> list[str]:
+    """Drop names nested in a class that is itself in the list."""
+    listed = set(names)
+    return [n for n in names if not any(p in listed for p in _parents(n))]
+
+
+def _parents(name: str) -> list[str]:
+    parts = name.split(".")
+    return [".".join(parts[:i]) for i in range(1, len(parts))]
+
+
+def _members_note(name: str, definitions: dict[str, Definition]) -> str:
+    if definitions[name].kind != "class":
+        return ""
+    methods = sum(
+        1
+        for other, d in definitions.items()
+        if d.kind == "method" and other.rpartition(".")[0] == name
+    )
+    return f" with {methods} method{'s' if methods != 1 else ''}" if methods else ""
+
+
+def _signature(node: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
+    signature = f"({ast.unparse(node.args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return signature
+
+
+def _imports(tree: ast.Module) -> set[str]:
+    names: set[str] = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            names.update(f"{module}.{alias.name}" for alias in node.names)
+    return names
+
+
+def _constants(tree: ast.Module) -> dict[str, str]:
+    """Module-level UPPER_CASE assignments and the dump of their values."""
+    constants: dict[str, str] = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id.isupper():
+                constants[target.id] = ast.dump(value)
+    return constants
+
+
+def _module_body(tree: ast.Module) -> str:
+    statements = [
+        s
+        for s in tree.body
+        if not isinstance(
+            s, ast.FunctionDef | ast.AsyncFunctionDef | ast.ClassDef | ast.Import | ast.ImportFrom
+        )
+    ]
+    return ast.dump(ast.Module(body=statements, type_ignores=[]))
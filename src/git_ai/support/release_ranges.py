@@ -0,0 +1,74 @@
+"""Splits the history into the commits each tagged release introduced."""
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from git_ai.support.commit_log import CommitRecord
+
+TAG_FORMAT = (
+    "--format=%(refname:short) %(objecttype) %(objectname) %(*objecttype) %(*objectname) "
+    "%(creatordate:short)"
+)
+"""Space separated, which ref names cannot contain; `*` fields peel annotated tags."""
+
+
+@dataclass(frozen=True, slots=True)
+class ReleaseTag:
+    """A tag that points at a commit, with the date it was created."""
+
+    name: str
+    sha: str
+    """The commit the tag points at, through any annotated tag object."""
+    date: str
+    """ISO date the tag, or for a lightweight tag its commit, was created."""
+
+
+def parse_release_tags(output: str) -> list[ReleaseTag]:
+    """Parse `git for-each-ref` run with TAG_FORMAT; tags of trees or blobs are skipped."""
+    tags = []
+    for line in output.splitlines():
+        fields = line.split(" ")
+        if len(fields) != 6:
+            continue
+        name, kind, sha, peeled_kind, peeled_sha, date = fields
+        if peeled_sha:
+            kind, sha = peeled_kind, peeled_sha
+        if kind == "commit":
+            tags.append(ReleaseTag(name, sha, date))
+    return tags
+
+
+def split_releases[T](
+    tags: list[ReleaseTag],
+    commits: Iterable[CommitRecord],
+    prepare: Callable[[CommitRecord], T],
+) -> list[list[T]]:
+    """
+    Give every tag the commits it introduced: those no earlier tag contains.
+
+    `tags` must be in version order and `commits` the history of all of
+    them, as one `git log` of every tag yields it. Each commit is prepared
+    once and kept only in that form, so a release's list holds whatever
+    `prepare` returns, newest first.
+    """
+    parents: dict[str, tuple[str, ...]] = {}
+    prepared: dict[str, T] = {}
+    for commit in commits:
+        parents[commit.hash] = commit.parents
+        prepared[commit.hash] = prepare(commit)
+
+    release_of: dict[str, int] = {}
+    for position, tag in enumerate(tags):
+        pending = [tag.sha]
+        while pending:
+            sha = pending.pop()
+            if sha in release_of or sha not in parents:
+                continue
+            release_of[sha] = position
+            pending.extend(parents[sha])
+
+    releases: list[list[T]] = [[] for _ in tags]
+    for sha, item in prepared.items():
+        if (release := release_of.get(sha)) is not None:
+            releases[release].append(item)
+    return releases
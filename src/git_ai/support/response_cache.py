@@ -0,0 +1,129 @@
+"""Content-addressed on-disk cache of AI responses."""
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Self
+
+from git_ai.support.atomic_write import TEMPORARY_SUFFIX, atomic_write
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+CACHE_DIRECTORY = Path("git-ai") / "cache"
+"""Where the cache lives, relative to the repository's git directory."""
+
+ENTRY_SUFFIX = ".json"
+
+STALE_TEMPORARY_SECONDS = 3600
+"""Temporary files this old were left behind by a process that died mid-write."""
+
+
+class ResponseCache:
+    """
+    Stores raw AI responses under a hash of everything that shaped them.
+
+    Entries are written to a temporary file and renamed into place, so
+    concurrent git-ai processes never read a partial entry. Each hit bumps the
+    entry's mtime, which makes eviction least-recently-used: entries unused
+    for max_age_seconds go first, then the oldest until the cache fits
+    max_bytes. Only one process evicts at a time.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int, max_age_seconds: float) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    @classmethod
+    def for_git_dir(cls, git_dir: str | Path, max_bytes: int, max_age_seconds: float) -> Self:
+        return cls(Path(git_dir) / CACHE_DIRECTORY, max_bytes, max_age_seconds)
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """Hash the provider, model, prompt version and prompt into an entry key."""
+        return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age_seconds:
+                return None
+            with open(path, encoding="utf-8") as f:
+                response = json.load(f)["response"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return response if isinstance(response, str) else None
+
+    def put(self, key: str, response: str) -> None:
+        entry = {"created": time.time(), "response": response}
+        try:
+            atomic_write(self._path(key), json.dumps(entry))
+        except OSError:
+            # A cache that cannot be written must never fail the command
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        with self._eviction_lock() as acquired:
+            if not acquired:
+                return
+
+            entries: list[tuple[float, int, Path]] = []
+            now = time.time()
+            for path in self.directory.glob(f"*/*{ENTRY_SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    path.unlink(missing_ok=True)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            for path in self.directory.glob(f"*/*{TEMPORARY_SUFFIX}"):
+                try:
+                    if now - path.stat().st_mtime > STALE_TEMPORARY_SECONDS:
+                        path.unlink(missing_ok=True)
+                except FileNotFoundError:
+                    continue
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key[2:]}{ENTRY_SUFFIX}"
+
+    @contextmanager
+    def _eviction_lock(self) -> Iterator[bool]:
+        """Yield whether this process may evict; another one may already be at it."""
+        if fcntl is None:
+            yield True
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            lock = open(self.directory / ".lock", "w")
+        except OSError:
+            yield False
+            return
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
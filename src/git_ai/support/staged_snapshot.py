@@ -0,0 +1,432 @@
+"""Value objects describing the staged changes of a repository."""
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from itertools import chain
+from typing import TYPE_CHECKING, Self
+
+if TYPE_CHECKING:
+    from git_ai.support.diff_budget import DiffBudget
+
+Measure = Callable[[str], int]
+
+RAW_FLAGS = ("--no-abbrev", "--raw", "--numstat", "--patch", "-z")
+"""Flags that make `git diff` print raw, numstat and patch output in one pass."""
+
+STAT_GRAPH_WIDTH = 40
+
+MAX_BYTES_PER_UNIT = 8
+"""
+Most bytes any measure counts as one unit: four per UTF-8 character for
+`len`, eight per run of spaces for the token estimator. A line longer than
+this many times a file's remaining budget cannot fit, however it is measured.
+"""
+
+_SECTION_PREFIXES = (b"diff --git ", b"@@")
+"""Lines that open a file or hunk; patch body lines never start with these."""
+
+
+@dataclass(frozen=True)
+class MoveDetection:
+    """
+    Rename and copy detection for `git diff`.
+
+    Git applies one similarity threshold to both, in percent. A threshold of 0
+    turns detection off; copies are only looked for among the changed files.
+    """
+
+    threshold: int = 50
+    copies: bool = True
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.threshold <= 100:
+            raise ValueError(
+                f"Invalid rename threshold: {self.threshold}. Must be between 0 and 100."
+            )
+
+    @property
+    def flags(self) -> tuple[str, ...]:
+        if self.threshold == 0:
+            return ("--no-renames",)
+        # -C after -M keeps rename detection and adds copies, at the same threshold
+        flags = [f"-M{self.threshold}%"]
+        if self.copies:
+            flags.append(f"-C{self.threshold}%")
+        return tuple(flags)
+
+
+@dataclass(frozen=True)
+class StagedFile:
+    """One staged path, combining its `--raw` and `--numstat` records."""
+
+    path: str
+    status: str
+    additions: int = 0
+    deletions: int = 0
+    old_path: str | None = None
+    old_blob: str = ""
+    new_blob: str = ""
+    binary: bool = False
+    similarity: int | None = None
+
+    @property
+    def display_path(self) -> str:
+        if self.old_path and self.old_path != self.path:
+            return f"{self.old_path} => {self.path}"
+        return self.path
+
+    @property
+    def lines_changed(self) -> int:
+        return self.additions + self.deletions
+
+
+@dataclass
+class Hunk:
+    """One `@@` hunk of a file patch, with the body lines that were retained."""
+
+    header: str
+    lines: list[str] = field(default_factory=list)
+
+
+@dataclass
+class FilePatch:
+    """
+    The patch section of one staged file.
+
+    Body lines past the retention limit are dropped while streaming; `unread`
+    marks a file whose section was cut short because git was stopped early.
+    A `summary` is set when a diff reducer replaced the original hunks.
+    """
+
+    header: list[str]
+    hunks: list[Hunk] = field(default_factory=list)
+    body_size: int = 0
+    longest_line: int = 0
+    """Bytes in the longest body line read, whether it was retained or not."""
+    dropped: bool = False
+    unread: bool = False
+    summary: str | None = None
+
+    @classmethod
+    def placeholder(cls, file: StagedFile) -> Self:
+        """Stand-in for a file whose patch section was never read."""
+        old_path = file.old_path or file.path
+        return cls(header=[f"diff --git a/{old_path} b/{file.path}"], unread=True)
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped or self.unread
+
+    @property
+    def changed_lines(self) -> int:
+        """Changed (+/-) lines among the retained hunk lines."""
+        return sum(1 for h in self.hunks for line in h.lines if line[:1] in ("+", "-"))
+
+    def render(self, body_limit: int | None = None, measure: Measure = len) -> tuple[str, int]:
+        """
+        Render header, every hunk header and body lines up to body_limit.
+
+        Returns the text and the number of changed (+/-) lines it contains.
+        """
+        out = list(self.header)
+        if self.summary is not None:
+            out.append(self.summary)
+        used = 0
+        changes = 0
+        full = False
+        for hunk in self.hunks:
+            out.append(hunk.header)
+            for line in hunk.lines:
+                if full:
+                    break
+                cost = measure(line) + 1
+                if body_limit is not None and used + cost > body_limit:
+                    full = True
+                    break
+                out.append(line)
+                used += cost
+                if line[:1] in ("+", "-"):
+                    changes += 1
+        return "\n".join(out), changes
+
+
+@dataclass(frozen=True)
+class StagedSnapshot:
+    """
+    Everything the commit command needs to know about the index, collected once.
+
+    Built from a single `git diff --cached --raw --numstat --patch -z` run and
+    shared by every stage of the commit command.
+    """
+
+    files: tuple[StagedFile, ...] = field(default_factory=tuple)
+    patches: tuple[FilePatch, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def empty(cls) -> Self:
+        return cls()
+
+    @classmethod
+    def from_diff_output(cls, output: str, budget: "DiffBudget | None" = None) -> Self:
+        """Parse the output of `git diff` run with RAW_FLAGS."""
+        return cls.from_stream([output.encode()], budget)
+
+    @classmethod
+    def from_stream(cls, chunks: Iterable[bytes], budget: "DiffBudget | None" = None) -> Self:
+        """
+        Parse `git diff` output run with RAW_FLAGS from a stream of byte chunks.
+
+        The header is always read in full. Patch lines are decoded incrementally
+        and, when a budget is given, each file only retains its share of it;
+        the rest of a full file is skipped without being decoded. Reading
+        stops once the last file is full or the budget's retention ceiling is
+        reached, so callers can terminate git early.
+        """
+        iterator = iter(chunks)
+        buffer = bytearray()
+        for chunk in iterator:
+            search_from = max(0, len(buffer) - 1)
+            buffer += chunk
+            end = buffer.find(b"\0\0", search_from)
+            if end != -1:
+                header = bytes(buffer[:end]).decode(errors="replace")
+                rest = bytes(buffer[end + 2 :])
+                break
+        else:
+            return cls(files=tuple(_parse_header(buffer.decode(errors="replace"))))
+
+        del buffer
+        files = tuple(_parse_header(header))
+        patches = _collect_patches(chain([rest], iterator), files, budget)
+        return cls(files=files, patches=tuple(patches))
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.files
+
+    @property
+    def patch(self) -> str:
+        """Every retained patch line, without any further budgeting."""
+        return "\n".join(p.render()[0] for p in self.patches)
+
+    @property
+    def truncated(self) -> bool:
+        return any(p.truncated for p in self.patches)
+
+    @property
+    def additions(self) -> int:
+        return sum(f.additions for f in self.files)
+
+    @property
+    def deletions(self) -> int:
+        return sum(f.deletions for f in self.files)
+
+    @property
+    def stat(self) -> str:
+        """Render a `git diff --stat` style summary without running git again."""
+        if self.is_empty:
+            return ""
+
+        width = max(len(f.display_path) for f in self.files)
+        digits = max(len(str(f.lines_changed)) for f in self.files)
+        largest = max(f.lines_changed for f in self.files)
+        scale = min(1.0, STAT_GRAPH_WIDTH / largest) if largest else 1.0
+
+        lines = []
+        for f in self.files:
+            if f.binary:
+                lines.append(f" {f.display_path:<{width}} | Bin")
+                continue
+            plus = round(f.additions * scale) or (1 if f.additions else 0)
+            minus = round(f.deletions * scale) or (1 if f.deletions else 0)
+            graph = "+" * plus + "-" * minus
+            lines.append(f" {f.display_path:<{width}} | {f.lines_changed:>{digits}} {graph}")
+
+        lines.append(_summary_line(len(self.files), self.additions, self.deletions))
+        return "\n".join(lines)
+
+
+def _parse_header(header: str) -> list[StagedFile]:
+    """Merge the NUL-delimited `--raw` and `--numstat` records into StagedFiles."""
+    tokens = header.split("\0")
+    raw: list[dict[str, str]] = []
+    numstat: list[tuple[str, str]] = []
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.startswith(":"):
+            _, _, old_blob, new_blob, status = token[1:].split(" ")
+            entry = {"status": status, "old_blob": old_blob, "new_blob": new_blob}
+            if status[0] in ("R", "C"):
+                entry["old_path"], entry["path"] = tokens[i + 1], tokens[i + 2]
+                i += 3
+            else:
+                entry["path"] = tokens[i + 1]
+                i += 2
+            raw.append(entry)
+        elif token:
+            added, deleted, path = token.split("\t", 2)
+            # Renames and copies put both paths in the following tokens
+            i += 3 if path == "" else 1
+            numstat.append((added, deleted))
+        else:
+            i += 1
+
+    files = []
+    for index, entry in enumerate(raw):
+        added, deleted = numstat[index] if index < len(numstat) else ("0", "0")
+        binary = added == "-"
+        files.append(
+            StagedFile(
+                path=entry["path"],
+                status=entry["status"][0],
+                additions=0 if binary else int(added),
+                deletions=0 if binary else int(deleted),
+                old_path=entry.get("old_path"),
+                old_blob=entry["old_blob"],
+                new_blob=entry["new_blob"],
+                binary=binary,
+                similarity=int(entry["status"][1:]) if entry.get("old_path") else None,
+            )
+        )
+    return files
+
+
+def _collect_patches(
+    chunks: Iterable[bytes], files: tuple[StagedFile, ...], budget: "DiffBudget | None"
+) -> list[FilePatch]:
+    """Split the patch into per-file sections, retaining body lines up to each file's limit."""
+    measure = budget.measure if budget else len
+    limits = budget.retention_limits(files) if budget else [None] * len(files)
+    ceiling = budget.retention_ceiling if budget else None
+
+    patches: list[FilePatch] = []
+    retained = 0
+    reader = _LineReader(chunks)
+    while True:
+        current = patches[-1] if patches else None
+        limit = limits[len(patches) - 1] if 0 < len(patches) <= len(limits) else None
+        cap = None
+        if current and current.hunks and limit is not None and not reader.at(_SECTION_PREFIXES):
+            # A body line is only buffered as far as it could still fit the file's share
+            cap = max(0, limit - current.body_size) * MAX_BYTES_PER_UNIT
+        if (read := reader.readline(cap)) is None:
+            break
+        line, length = read
+
+        if line.startswith("diff --git "):
+            patches.append(FilePatch(header=[line]))
+            retained += measure(line) + 1
+            continue
+        if current is None:
+            continue
+
+        if line.startswith("@@"):
+            current.hunks.append(Hunk(header=line))
+            retained += measure(line) + 1
+        elif not current.hunks:
+            current.header.append(line)
+            retained += measure(line) + 1
+        elif not current.dropped:
+            current.longest_line = max(current.longest_line, length)
+            cost = measure(line) + 1
+            too_long = cap is not None and length > cap
+            if too_long or (limit is not None and current.body_size + cost > limit):
+                current.dropped = True
+            else:
+                current.hunks[-1].lines.append(line)
+                current.body_size += cost
+                retained += cost
+
+        last_file_full = current.dropped and len(patches) >= len(files)
+        if last_file_full or (ceiling is not None and retained > ceiling):
+            current.unread = True
+            break
+        if current.dropped:
+            # Nothing more of this file is kept but its hunk headers
+            skipped = reader.skip_lines(_SECTION_PREFIXES)
+            current.longest_line = max(current.longest_line, skipped)
+
+    patches.extend(FilePatch.placeholder(f) for f in files[len(patches) :])
+    return patches
+
+
+class _LineReader:
+    """
+    Splits a byte stream into lines, searching every chunk for newlines once.
+
+    Lines are decoded one at a time; UTF-8 never encodes another character
+    with a newline byte, so a line is always whole. A line read with a cap
+    keeps only its first `cap` bytes and the rest is counted and discarded,
+    so a single huge line costs no more memory than the cap.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._chunk = b""
+        self._start = 0
+
+    def readline(self, cap: int | None = None) -> tuple[str, int] | None:
+        """The next line, cut to `cap` bytes, and its full length in bytes; None at the end."""
+        parts: list[bytes] = []
+        kept = 0
+        length = 0
+        while True:
+            if self._start >= len(self._chunk) and not self._next_chunk():
+                if not length:
+                    return None
+                break
+            end = self._chunk.find(b"\n", self._start)
+            stop = len(self._chunk) if end == -1 else end
+            take = stop - self._start if cap is None else min(stop - self._start, cap - kept)
+            if take > 0:
+                parts.append(self._chunk[self._start : self._start + take])
+                kept += take
+            length += stop - self._start
+            if end == -1:
+                self._start = stop
+                continue
+            self._start = end + 1
+            break
+        return b"".join(parts).decode(errors="replace"), length
+
+    def at(self, prefixes: tuple[bytes, ...]) -> bool:
+        """Whether the next line starts with one of `prefixes`."""
+        self._fill(max(map(len, prefixes)))
+        return self._chunk.startswith(prefixes, self._start)
+
+    def skip_lines(self, until: tuple[bytes, ...]) -> int:
+        """
+        Discard lines, without decoding them, up to the next that starts with `until`.
+
+        Returns the length in bytes of the longest line discarded.
+        """
+        longest = 0
+        while not self.at(until) and (read := self.readline(cap=0)) is not None:
+            longest = max(longest, read[1])
+        return longest
+
+    def _fill(self, size: int) -> None:
+        """Join chunks until `size` bytes past the current position are buffered, if they come."""
+        while len(self._chunk) - self._start < size:
+            if (chunk := next(self._chunks, None)) is None:
+                return
+            self._chunk = self._chunk[self._start :] + chunk
+            self._start = 0
+
+    def _next_chunk(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self._chunk, self._start = chunk, 0
+                return True
+        return False
+
+
+def _summary_line(files: int, additions: int, deletions: int) -> str:
+    parts = [f" {files} file{'s' if files != 1 else ''} changed"]
+    if additions:
+        parts.append(f"{additions} insertion{'s' if additions != 1 else ''}(+)")
+    if deletions:
+        parts.append(f"{deletions} deletion{'s' if deletions != 1 else ''}(-)")
+    return ", ".join(parts)
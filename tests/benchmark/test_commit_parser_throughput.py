@@ -0,0 +1,32 @@
+"""Benchmark: commit messages parsed per minute.
+
+Run with `pytest tests/benchmark -s` to print the rate.
+"""
+
+import time
+
+from git_ai.support.conventional_commit import parse_commit_message
+
+MESSAGES = [
+    "feat(api): add pagination to the list endpoints",
+    "fix: handle empty responses\n\nThe client crashed on 204.\n\nRefs: #120",
+    "refactor(core)!: rename the settings\n\nBREAKING CHANGE: `timeout` is now `request_timeout`",
+    'Revert "feat: add login"\n\nThis reverts commit 0123456789abcdef0123456789abcdef01234567.',
+    "Update README",
+]
+
+MIN_PER_MINUTE = 1_000_000
+
+
+class TestCommitParserThroughput:
+    def test_parses_millions_of_messages_per_minute(self) -> None:
+        messages = MESSAGES * 40_000
+
+        started = time.perf_counter()
+        for message in messages:
+            parse_commit_message(message)
+        elapsed = time.perf_counter() - started
+
+        per_minute = len(messages) / elapsed * 60
+        print(f"\nparsed {len(messages)} messages in {elapsed:.2f}s: {per_minute:,.0f}/minute")
+        assert per_minute > MIN_PER_MINUTE
@@ -0,0 +1,133 @@
+"""Benchmark: process spawns per command for each Git backend.
+
+Run with `pytest tests/benchmark -s` to print the spawn table.
+"""
+
+import json
+import subprocess
+import sys
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from git_ai.services.git_backend import BACKEND_NAMES
+from git_ai.services.git_service import GitService
+
+
+class SpawnCounter:
+    def __init__(self) -> None:
+        self.commands: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.commands)
+
+
+@pytest.fixture
+def spawn_counter(monkeypatch: pytest.MonkeyPatch) -> Iterator[SpawnCounter]:
+    """Count every subprocess.Popen, including the ones GitPython starts."""
+    counter = SpawnCounter()
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self: subprocess.Popen[Any], args: Any, *a: Any, **kw: Any) -> None:
+        counter.commands.append(" ".join(args) if isinstance(args, list) else str(args))
+        original_init(self, args, *a, **kw)
+
+    monkeypatch.setattr(subprocess.Popen, "__init__", counting_init)
+    yield counter
+
+
+def _commit_command(git: GitService) -> None:
+    git.is_git_repository()
+    git.get_staged_snapshot()
+
+
+def _changelog_command(git: GitService) -> None:
+    git.is_git_repository()
+    git.get_latest_tag()
+    git.get_first_commit_hash()
+    git.get_all_tags()
+    list(git.iter_commits("v1.0.0", "HEAD"))
+
+
+def _setup_command(git: GitService) -> None:
+    git.is_git_repository()
+    git.get_hooks_path()
+
+
+COMMANDS: dict[str, Callable[[GitService], None]] = {
+    "commit": _commit_command,
+    "changelog": _changelog_command,
+    "setup": _setup_command,
+}
+
+
+@pytest.fixture
+def staged_repo(tmp_git_repo: Path) -> Path:
+    subprocess.run(["git", "tag", "v1.0.0"], cwd=tmp_git_repo, capture_output=True)
+    for i in range(3):
+        (tmp_git_repo / f"file_{i}.txt").write_text(f"content {i}\n")
+    subprocess.run(["git", "add", "."], cwd=tmp_git_repo, capture_output=True)
+    return tmp_git_repo
+
+
+def _measure(repo: Path, backend: str, counter: SpawnCounter) -> dict[str, int]:
+    spawns: dict[str, int] = {}
+    for name, command in COMMANDS.items():
+        before = counter.count
+        with GitService(working_directory=str(repo), backend=backend) as git:
+            command(git)
+        spawns[name] = counter.count - before
+    return spawns
+
+
+_FRESH_MEASURE = """
+import json, subprocess, sys
+from tests.benchmark import test_git_process_spawns as bench
+
+counter = bench.SpawnCounter()
+original_init = subprocess.Popen.__init__
+
+def counting_init(self, args, *a, **kw):
+    counter.commands.append(" ".join(args) if isinstance(args, list) else str(args))
+    original_init(self, args, *a, **kw)
+
+subprocess.Popen.__init__ = counting_init
+print(json.dumps(bench._measure(bench.Path(sys.argv[1]), sys.argv[2], counter)))
+"""
+
+
+def _measure_fresh(repo: Path, backend: str) -> dict[str, int]:
+    """Spawns per command in a new interpreter, counting what importing the backend starts."""
+    result = subprocess.run(
+        [sys.executable, "-c", _FRESH_MEASURE, str(repo), backend],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[2],
+    )
+    spawns: dict[str, int] = json.loads(result.stdout)
+    return spawns
+
+
+class TestGitProcessSpawns:
+    def test_auto_backend_spawns_no_more_than_subprocess(self, staged_repo: Path) -> None:
+        # GitPython probes `git version` when imported, so each backend starts cold
+        spawns = {name: _measure_fresh(staged_repo, name) for name in BACKEND_NAMES}
+
+        print("\ncommand     " + "  ".join(f"{name:>10}" for name in BACKEND_NAMES))
+        for command in COMMANDS:
+            print(f"{command:<11} " + "  ".join(f"{spawns[n][command]:>10}" for n in BACKEND_NAMES))
+
+        for command in COMMANDS:
+            assert spawns["auto"][command] <= spawns["subprocess"][command]
+
+    def test_gitpython_reads_config_in_process(
+        self, staged_repo: Path, spawn_counter: SpawnCounter
+    ) -> None:
+        # Imported up front: only the queries themselves are counted here
+        import git  # noqa: F401
+
+        assert _measure(staged_repo, "gitpython", spawn_counter)["setup"] == 0
@@ -1,6 +1,7 @@
 """Shared fixtures for Git AI tests."""
 
 import subprocess
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
@@ -41,7 +42,9 @@ def tmp_git_repo(tmp_path: Path) -> Path:
     return tmp_path
 
 
-@pytest.fixture
-def git_service(tmp_git_repo: Path) -> GitService:
-    """GitService backed by a temporary repository."""
-    return GitService(working_directory=str(tmp_git_repo))
+@pytest.fixture(params=["gitpython", "subprocess"])
+def git_service(request: pytest.FixtureRequest, tmp_git_repo: Path) -> Iterator[GitService]:
+    """GitService backed by a temporary repository, once per Git backend."""
+    service = GitService(working_directory=str(tmp_git_repo), backend=request.param)
+    yield service
+    service.close()
@@ -1,17 +1,22 @@
 """Feature tests for the changelog command."""
 
-from unittest.mock import patch
+import re
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 from typer.testing import CliRunner
 
 from git_ai.cli import app
+from git_ai.config import ChangelogConfig, GitAiConfig
+from git_ai.support.commit_log import CommitRecord
+from git_ai.support.release_ranges import ReleaseTag
 
 runner = CliRunner()
 
 
 class TestChangelogCommand:
     def test_fails_when_not_git_repository(self) -> None:
-        with patch("git_ai.cli.GitService") as mock_git:
+        with patch("git_ai.services.git_service.GitService") as mock_git:
             mock_git.return_value.is_git_repository.return_value = False
             result = runner.invoke(app, ["changelog"])
             assert result.exit_code != 0
@@ -19,8 +24,8 @@ class TestChangelogCommand:
 
     def test_fails_when_no_starting_point(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config"),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config"),
         ):
             instance = mock_git.return_value
             instance.is_git_repository.return_value = True
@@ -32,27 +37,300 @@ class TestChangelogCommand:
 
     def test_warns_when_no_commits_found(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config"),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config"),
         ):
             instance = mock_git.return_value
             instance.is_git_repository.return_value = True
             instance.get_latest_tag.return_value = None
             instance.get_first_commit_hash.return_value = "abc123"
-            instance.get_commits_between.return_value = []
+            instance.iter_commits.return_value = iter([])
+            instance.get_git_dir.return_value = None
             result = runner.invoke(app, ["changelog", "--from", "abc123"])
             assert "No commits found" in result.output
 
     def test_uses_from_option(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config"),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config"),
         ):
             instance = mock_git.return_value
             instance.is_git_repository.return_value = True
-            instance.get_commits_between.return_value = []
+            instance.iter_commits.return_value = iter([])
+            instance.get_git_dir.return_value = None
             runner.invoke(app, ["changelog", "--from", "v1.0.0"])
-            instance.get_commits_between.assert_called_once_with("v1.0.0", "HEAD")
+            instance.iter_commits.assert_called_once_with("v1.0.0", "HEAD")
+
+    def test_groups_by_the_parsed_message(self) -> None:
+        commits = [
+            CommitRecord("a" * 40, "feat(api): add paging", "BREAKING CHANGE: lists are paged"),
+            CommitRecord("b" * 40, "fix: handle timeouts", "Refs: #12"),
+            CommitRecord("c" * 40, 'Revert "feat: add login"', "This reverts commit abc1234."),
+            CommitRecord("d" * 40, "Update README"),
+        ]
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.iter_commits.return_value = iter(commits)
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.last_from_cache = False
+            ai.last_usage = None
+            ai.generate_changelog.return_value = {"sections": []}
+            result = runner.invoke(
+                app, ["changelog", "--from", "v1.0.0", "--tag", "v1.1.0", "--dry-run"]
+            )
+            assert result.exit_code == 0, result.output
+            prompt = ai.generate_changelog.call_args.args[0]
+            assert "## feat\n- feat(api): add paging (BREAKING CHANGE: lists are paged)\n" in prompt
+            assert "## fix\n- fix: handle timeouts (Refs: #12)\n" in prompt
+            assert '## revert\n- Revert "feat: add login"\n' in prompt
+            assert "## other\n- Update README\n" in prompt
+
+    def test_local_engine_needs_no_ai(self) -> None:
+        commits = [
+            CommitRecord("a" * 40, "feat(api): add paging"),
+            CommitRecord("b" * 40, "fix: handle timeouts"),
+            CommitRecord("c" * 40, "fix: handle timeouts"),
+        ]
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.iter_commits.return_value = iter(commits)
+            result = runner.invoke(
+                app,
+                ["changelog", "--from", "v1.0.0", "--tag", "v1.1.0", "--engine", "local"],
+                input="n\n",
+            )
+            assert result.exit_code == 0, result.output
+            mock_resolve.assert_not_called()
+            assert "Found 3 commits" in result.output
+            assert "- (api) Add paging" in result.output
+            assert result.output.count("- Handle timeouts") == 1
+            assert "Features" in result.output
+            assert "Bug Fixes" in result.output
+
+    def test_fails_with_invalid_engine(self) -> None:
+        result = runner.invoke(app, ["changelog", "--engine", "gpt"])
+        assert result.exit_code == 1
+        assert "Invalid engine" in result.output
+
+    def test_incremental_runs_only_summarize_new_commits(self, tmp_path: Path) -> None:
+        config = GitAiConfig(changelog=ChangelogConfig(incremental=True))
+        commits = [CommitRecord(f"{i:040x}", f"feat: add feature {i}") for i in range(3)]
+        prompts: list[str] = []
+
+        async def rewrite(prompt: str) -> dict:
+            prompts.append(prompt)
+            found = re.findall(r"\[(\w+)\] feat: add (feature \d+)", prompt)
+            return {"entries": [{"id": id_, "entry": f"Adds {name}"} for id_, name in found]}
+
+        def run(commits: list[CommitRecord]) -> str:
+            with (
+                patch("git_ai.services.git_service.GitService") as mock_git,
+                patch("git_ai.config.load_config", return_value=config),
+                patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            ):
+                instance = mock_git.return_value
+                instance.is_git_repository.return_value = True
+                instance.iter_commits.return_value = iter(commits)
+                instance.get_git_dir.return_value = str(tmp_path)
+                ai = mock_resolve.return_value
+                ai.provider = "anthropic"
+                ai.model = "claude"
+                ai.agenerate_changelog_entries = AsyncMock(side_effect=rewrite)
+                result = runner.invoke(
+                    app, ["changelog", "--from", "v1.0.0", "--tag", "v1.1.0", "--dry-run"]
+                )
+                assert result.exit_code == 0, result.output
+                ai.generate_changelog.assert_not_called()
+                return result.output
+
+        output = run(commits)
+        assert len(prompts) == 1
+        assert "Adds feature 2" in output
+
+        # One more commit lands; only it reaches the AI
+        output = run([CommitRecord(f"{3:040x}", "feat: add feature 3"), *commits])
+        assert len(prompts) == 2
+        assert "feature 3" in prompts[1]
+        assert "feature 0" not in prompts[1]
+        assert "1 new commits in 1 batches; 3 come from the index" in output
+        assert all(f"Adds feature {i}" in output for i in range(4))
+
+        run(commits)
+        assert len(prompts) == 2
+        assert (tmp_path / "git-ai" / "commits.sqlite").is_file()
+
+    def test_splits_large_ranges_into_batches(self) -> None:
+        commits = [
+            CommitRecord(f"{i:040x}", f"feat: add feature number {i} to the api")
+            for i in range(500)
+        ]
+        prompts: list[str] = []
+
+        async def summarize(prompt: str) -> dict:
+            prompts.append(prompt)
+            first = prompt.split("- feat: add ")[1].split("\n")[0]
+            return {
+                "sections": [
+                    {"type": "feat", "entries": [f"Add {first}", "Improve the api"]},
+                ]
+            }
+
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig(max_prompt_tokens=1000)),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.iter_commits.return_value = iter(commits)
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.agenerate_changelog = AsyncMock(side_effect=summarize)
+            result = runner.invoke(
+                app, ["changelog", "--from", "v1.0.0", "--tag", "v1.1.0", "--dry-run"]
+            )
+            assert result.exit_code == 0, result.output
+            assert len(prompts) > 1
+            assert "Summarizing 500 commits in" in result.output
+            ai.generate_changelog.assert_not_called()
+            # Every commit is in exactly one batch
+            sent = [line for prompt in prompts for line in prompt.splitlines() if line[:2] == "- "]
+            assert len(sent) == 500
+            assert "omitted" not in "".join(prompts)
+            # Entries repeated across batches are merged
+            assert result.output.count("Improve the api") == 1
+            assert "Add feature number 0 to the api" in result.output
+
+
+class TestChangelogAllTags:
+    tags = [
+        ReleaseTag("v1.0.0", "b" * 40, "2024-01-02"),
+        ReleaseTag("v2.0.0", "d" * 40, "2024-03-04"),
+    ]
+    history = [
+        CommitRecord("d" * 40, "fix: handle timeouts", parents=("c" * 40,)),
+        CommitRecord("c" * 40, "Merge branch 'paging'", parents=("b" * 40,)),
+        CommitRecord("b" * 40, "feat(api): add paging", parents=("a" * 40,)),
+        CommitRecord("a" * 40, "chore: initial commit"),
+    ]
+
+    def test_local_engine_rewrites_every_release(self, tmp_path: Path) -> None:
+        path = tmp_path / "CHANGELOG.md"
+        path.write_text("# Changelog\n\n## [v0.1.0] - 2023-01-01\n\n- Old entry\n")
+        config = GitAiConfig(changelog=ChangelogConfig(path=str(path)))
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_release_tags.return_value = self.tags
+            instance.iter_history.return_value = iter(self.history)
+            result = runner.invoke(
+                app, ["changelog", "--all-tags", "--engine", "local"], input="y\n"
+            )
+            assert result.exit_code == 0, result.output
+            mock_resolve.assert_not_called()
+            instance.iter_history.assert_called_once_with("b" * 40, "d" * 40)
+            assert "Found 3 commits across 2 releases" in result.output
+            assert "Discarding 1 sections that match no tagged release: v0.1.0" in result.output
+
+        written = path.read_text()
+        assert "Old entry" not in written
+        assert written.index("## [v2.0.0] - 2024-03-04") < written.index("## [v1.0.0] - 2024-01-02")
+        v2, v1 = written.split("## [v1.0.0]")
+        assert "- Handle timeouts" in v2
+        assert "Merge branch" not in written
+        assert "- (api) Add paging" in v1
+        assert "- Initial commit" in v1
+
+    def test_keeps_sections_newer_than_the_latest_tag(self, tmp_path: Path) -> None:
+        path = tmp_path / "CHANGELOG.md"
+        path.write_text(
+            "# Changelog\n\n"
+            "## [v2.1.0] - 2024-05-06\n\n- Not tagged yet\n\n"
+            "## [v2.0.0] - 2024-03-04\n\n- Hand edit\n"
+        )
+        config = GitAiConfig(changelog=ChangelogConfig(path=str(path)))
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_release_tags.return_value = self.tags
+            instance.iter_history.return_value = iter(self.history)
+            result = runner.invoke(
+                app, ["changelog", "--all-tags", "--engine", "local"], input="y\n"
+            )
+            assert result.exit_code == 0, result.output
+            assert "Keeping 1 sections newer than v2.0.0: v2.1.0" in result.output
+            assert "Discarding" not in result.output
+
+        written = path.read_text()
+        assert written.startswith("# Changelog\n\nAll notable changes")
+        assert written.index("## [v2.1.0]") < written.index("## [v2.0.0]")
+        assert "- Not tagged yet" in written
+        assert "- Hand edit" not in written
+        assert written.count("## [") == 3
+
+    def test_ai_engine_summarizes_all_releases_in_one_run(self) -> None:
+        prompts: list[str] = []
+
+        async def summarize(prompt: str) -> dict:
+            prompts.append(prompt)
+            line = prompt.split("- ")[1].split("\n")[0]
+            return {"sections": [{"type": "feat", "entries": [f"Wrote {line}"]}]}
+
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_git_dir.return_value = None
+            instance.get_release_tags.return_value = self.tags
+            instance.iter_history.return_value = iter(self.history)
+            ai = mock_resolve.return_value
+            ai.agenerate_changelog = AsyncMock(side_effect=summarize)
+            result = runner.invoke(app, ["changelog", "--all-tags", "--dry-run"])
+            assert result.exit_code == 0, result.output
+            assert len(prompts) == 2
+            assert "Summarizing 2 releases in 2 batches" in result.output
+            assert "Wrote fix: handle timeouts" in result.output
+            assert result.output.index("[v2.0.0]") < result.output.index("[v1.0.0]")
+            assert "Dry run complete" in result.output
+
+    def test_warns_when_there_are_no_tags(self) -> None:
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_release_tags.return_value = []
+            result = runner.invoke(app, ["changelog", "--all-tags"])
+            assert result.exit_code == 0
+            assert "No tags found" in result.output
+            instance.iter_history.assert_not_called()
+
+    def test_fails_when_combined_with_a_range(self) -> None:
+        result = runner.invoke(app, ["changelog", "--all-tags", "--from", "v1.0.0"])
+        assert result.exit_code == 1
+        assert "--all-tags cannot be combined" in result.output
 
 
 class TestChangelogCommandHelp:
@@ -63,3 +341,5 @@ class TestChangelogCommandHelp:
         assert "--to" in result.output
         assert "--tag" in result.output
         assert "--dry-run" in result.output
+        assert "--engine" in result.output
+        assert "--all-tags" in result.output
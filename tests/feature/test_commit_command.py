@@ -1,46 +1,53 @@
 """Feature tests for the commit command."""
 
-from unittest.mock import patch
+import asyncio
+import re
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 from typer.testing import CliRunner
 
-from git_ai.cli import app
-from git_ai.config import GitAiConfig
+from git_ai.cli import _pregeneration_fingerprint, app
+from git_ai.config import CacheConfig, GitAiConfig
+from git_ai.services.ai_service import UsageStats
+from git_ai.support.pregenerated_store import PregeneratedStore
+from git_ai.support.staged_snapshot import StagedSnapshot
 
 runner = CliRunner()
 
 
 class TestCommitCommand:
     def test_fails_when_not_git_repository(self, tmp_path: str) -> None:
-        with patch("git_ai.cli.GitService") as mock_git:
+        with patch("git_ai.services.git_service.GitService") as mock_git:
             mock_git.return_value.is_git_repository.return_value = False
             result = runner.invoke(app, ["commit"])
             assert result.exit_code != 0
             assert "not a Git repository" in result.output
 
     def test_warns_when_no_staged_changes(self) -> None:
-        with patch("git_ai.cli.GitService") as mock_git:
+        with patch("git_ai.services.git_service.GitService") as mock_git:
             mock_git.return_value.is_git_repository.return_value = True
-            mock_git.return_value.has_staged_changes.return_value = False
+            mock_git.return_value.get_staged_snapshot.return_value = StagedSnapshot.empty()
             result = runner.invoke(app, ["commit"])
             assert result.exit_code != 0
             assert "No staged changes" in result.output
 
     def test_stages_all_when_all_flag(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
         ):
             instance = mock_git.return_value
             instance.is_git_repository.return_value = True
-            instance.has_staged_changes.return_value = False
+            instance.get_staged_snapshot.return_value = StagedSnapshot.empty()
             runner.invoke(app, ["commit", "--all"])
             instance.add_all.assert_called_once()
 
     def test_fails_with_invalid_template(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
         ):
             mock_git.return_value.is_git_repository.return_value = True
             result = runner.invoke(app, ["commit", "--template", "nonexistent"])
@@ -49,26 +56,391 @@ class TestCommitCommand:
 
     def test_accepts_minimal_template(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
         ):
             instance = mock_git.return_value
             instance.is_git_repository.return_value = True
-            instance.has_staged_changes.return_value = False
+            instance.get_staged_snapshot.return_value = StagedSnapshot.empty()
             result = runner.invoke(app, ["commit", "--template", "minimal"])
             assert "Unknown commit template" not in result.output
 
     def test_accepts_no_body_flag(self) -> None:
         with (
-            patch("git_ai.cli.GitService") as mock_git,
-            patch("git_ai.cli.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
         ):
             instance = mock_git.return_value
             instance.is_git_repository.return_value = True
-            instance.has_staged_changes.return_value = False
+            instance.get_staged_snapshot.return_value = StagedSnapshot.empty()
             result = runner.invoke(app, ["commit", "--no-body"])
             assert "Unknown" not in result.output
 
+    def test_reuses_one_snapshot_across_regenerate(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(
+            f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+            "1\t1\tapp.py\0\0"
+            "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+        )
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", side_effect=["regenerate", "cancel"]),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = snapshot
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.last_from_cache = False
+            ai.last_usage = None
+            ai.generate_commit_message.return_value = {
+                "type": "fix",
+                "scope": "",
+                "description": "use new value",
+                "body": "",
+                "is_breaking_change": False,
+            }
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0
+            assert "app.py | 2 +-" in result.output
+            instance.get_staged_snapshot.assert_called_once()
+            instance.get_staged_diff.assert_not_called()
+            assert ai.generate_commit_message.call_count == 2
+            for call in ai.generate_commit_message.call_args_list:
+                assert call.args[0] == snapshot.patch
+            first, second = ai.generate_commit_message.call_args_list
+            assert first.kwargs["fresh"] is False
+            assert second.kwargs["fresh"] is True
+
+    def test_passes_the_repository_cache_to_the_service(self, tmp_path: Path) -> None:
+        snapshot = StagedSnapshot.from_diff_output(
+            f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+            "1\t1\tapp.py\0\0"
+            "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+        )
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", return_value="cancel"),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = snapshot
+            instance.get_git_dir.return_value = str(tmp_path)
+            ai = mock_resolve.return_value
+            ai.last_from_cache = True
+            ai.last_usage = None
+            ai.generate_commit_message.return_value = {
+                "type": "fix",
+                "description": "use new value",
+            }
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0
+            assert "Reusing the cached response" in result.output
+            cache = mock_resolve.call_args.kwargs["cache"]
+            assert cache.directory == tmp_path / "git-ai" / "cache"
+
+    def test_skips_the_cache_when_disabled(self) -> None:
+        config = GitAiConfig(cache=CacheConfig(enabled=False))
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", return_value="cancel"),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            mock_resolve.return_value.last_from_cache = False
+            mock_resolve.return_value.last_usage = None
+            mock_resolve.return_value.generate_commit_message.return_value = {
+                "type": "fix",
+                "description": "use new value",
+            }
+            runner.invoke(app, ["commit"])
+            assert mock_resolve.call_args.kwargs["cache"] is None
+
+    def test_map_reduce_sends_file_summaries_instead_of_the_diff(self) -> None:
+        config = GitAiConfig()
+        config.diff.strategy = "map-reduce"
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", return_value="cancel"),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.last_from_cache = False
+            ai.last_usage = None
+            ai.agenerate_file_summaries = AsyncMock(
+                return_value={"files": [{"path": "app.py", "summary": "Uses the new value."}]}
+            )
+            ai.generate_commit_message.return_value = {
+                "type": "fix",
+                "description": "use new value",
+            }
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0
+            assert "-old" in ai.agenerate_file_summaries.call_args.args[0]
+            diff = ai.generate_commit_message.call_args.args[0]
+            assert "- app.py (M, +1 -1): Uses the new value." in diff
+            assert "-old" not in diff
+
+    def test_fails_with_invalid_diff_strategy(self) -> None:
+        config = GitAiConfig()
+        config.diff.strategy = "everything"
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+        ):
+            mock_git.return_value.is_git_repository.return_value = True
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 1
+            assert "Invalid diff strategy" in result.output
+
+    def test_reports_estimated_prompt_tokens(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(
+            f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+            "1\t1\tapp.py\0\0"
+            "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+        )
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig(max_prompt_tokens=4000)),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", return_value="cancel"),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = snapshot
+            instance.get_git_dir.return_value = None
+            mock_resolve.return_value.last_from_cache = False
+            mock_resolve.return_value.last_usage = UsageStats(
+                input_tokens=940, output_tokens=30, cache_read_tokens=900, seconds=0.8
+            )
+            mock_resolve.return_value.generate_commit_message.return_value = {
+                "type": "fix",
+                "description": "use new value",
+            }
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0
+            assert "Provider tokens: 940 in (900 from prompt cache), 30 out" in result.output
+            assert "Estimated prompt tokens: ~" in result.output
+            assert "of 4000" in result.output
+            budget = instance.get_staged_snapshot.call_args.kwargs["budget"]
+            assert 0 < budget.max_size < 4000
+
+    def test_rejects_a_prompt_budget_smaller_than_the_instructions(self) -> None:
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig(max_prompt_tokens=100)),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_git_dir.return_value = None
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 1
+            assert "max_prompt_tokens (100) is too small" in result.output
+            instance.get_staged_snapshot.assert_not_called()
+            mock_resolve.assert_not_called()
+
+    def test_ctrl_c_keeps_a_complete_title(self) -> None:
+        def stream_then_interrupt(diff: str, fresh: bool, on_update) -> dict:
+            on_update(
+                {"type": "feat", "scope": "api", "description": "add search"}, {"body": "Half"}
+            )
+            raise KeyboardInterrupt
+
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", return_value="accept"),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.last_from_cache = False
+            ai.last_usage = None
+            ai.generate_commit_message.side_effect = stream_then_interrupt
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0
+            assert "Stopped early" in result.output
+            instance.commit.assert_called_once_with("feat(api): add search")
+
+    def test_ctrl_c_before_the_title_aborts(self) -> None:
+        def interrupt(diff: str, fresh: bool, on_update) -> dict:
+            on_update({"type": "feat"}, {"description": "add"})
+            raise KeyboardInterrupt
+
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = None
+            mock_resolve.return_value.generate_commit_message.side_effect = interrupt
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code != 0
+            instance.commit.assert_not_called()
+
+    def test_candidates_are_listed_and_served_on_regenerate(self) -> None:
+        descriptions = iter(["first idea", "second idea", "third idea", "fourth idea"])
+
+        async def generate(diff: str, fresh: bool = False, temperature=None) -> dict:
+            return {"type": "feat", "scope": "", "description": next(descriptions)}
+
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", side_effect=["2", "regenerate", "accept"]),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.agenerate_commit_message = generate
+            result = runner.invoke(app, ["commit", "--candidates", "3"])
+            assert result.exit_code == 0
+            assert "1. feat: " in result.output
+            assert "3. feat: " in result.output
+            ai.generate_commit_message.assert_not_called()
+            listed = re.findall(r"^\s+\d\. (feat: .+)$", result.output, flags=re.MULTILINE)
+            assert len(listed) == 3
+            # Regenerate moved past the picked candidate without another round trip
+            committed = instance.commit.call_args.args[0]
+            assert committed in listed
+            assert committed != listed[1]
+
+    def test_candidates_do_not_wait_for_the_slowest(self) -> None:
+        async def generate(diff: str, fresh: bool = False, temperature=None) -> dict:
+            # The default-temperature request is the slow one
+            await asyncio.sleep(0.01 if fresh else 30)
+            return {"type": "feat", "scope": "", "description": f"idea at {temperature}"}
+
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("git_ai.services.candidate_pool.FOLLOWER_WAIT", 0.2),
+            patch("rich.prompt.Prompt.ask", side_effect=["1", "accept"]),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = None
+            ai = mock_resolve.return_value
+            ai.agenerate_commit_message = generate
+            started = time.monotonic()
+            result = runner.invoke(app, ["commit", "--candidates", "3"])
+            assert result.exit_code == 0, result.output
+            assert time.monotonic() - started < 10
+            listed = re.findall(r"^\s+\d\. (feat: .+)$", result.output, flags=re.MULTILINE)
+            assert listed == ["feat: idea at 0.4", "feat: idea at 0.7"]
+
+    def test_uses_the_message_pregenerated_for_the_staged_tree(self, tmp_path: Path) -> None:
+        config = GitAiConfig()
+        PregeneratedStore.for_git_dir(tmp_path).put(
+            "tree123",
+            _pregeneration_fingerprint(config),
+            {"type": "feat", "scope": "auth", "description": "add login"},
+        )
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", return_value="accept"),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = str(tmp_path)
+            instance.write_tree.return_value = "tree123"
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0
+            assert "pregenerated" in result.output
+            mock_resolve.assert_not_called()
+            assert instance.commit.call_args.args[0].startswith("feat(auth): add login")
+
+    def test_regenerating_a_pregenerated_message_asks_the_ai(self, tmp_path: Path) -> None:
+        config = GitAiConfig()
+        PregeneratedStore.for_git_dir(tmp_path).put(
+            "tree123",
+            _pregeneration_fingerprint(config),
+            {"type": "feat", "scope": "auth", "description": "add login"},
+        )
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("rich.prompt.Prompt.ask", side_effect=["regenerate", "accept"]),
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_staged_snapshot.return_value = StagedSnapshot.from_diff_output(
+                f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+                "1\t1\tapp.py\0\0"
+                "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+            )
+            instance.get_git_dir.return_value = str(tmp_path)
+            instance.write_tree.return_value = "tree123"
+            mock_resolve.return_value.last_from_cache = False
+            mock_resolve.return_value.last_usage = None
+            mock_resolve.return_value.generate_commit_message.return_value = {
+                "type": "fix",
+                "scope": "",
+                "description": "fix login",
+                "body": "",
+                "is_breaking_change": False,
+            }
+            result = runner.invoke(app, ["commit"])
+            assert result.exit_code == 0, result.output
+            mock_resolve.assert_called_once()
+            assert instance.commit.call_args.args[0].startswith("fix: fix login")
+
 
 class TestCommitCommandHelp:
     def test_shows_help(self) -> None:
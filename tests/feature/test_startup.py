@@ -0,0 +1,69 @@
+"""Import-time budget for the paths every invocation or commit goes through."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROVIDERS = ("anthropic", "openai", "httpx", "asyncio")
+"""Only needed once a command actually talks to an AI provider."""
+
+VERSION_BUDGET_US = 200_000
+COMMIT_BUDGET_US = 800_000
+"""Generous for slow machines, yet well below loading every dependency eagerly."""
+
+
+def import_profile(*args: str, cwd: Path, returncode: int = 0) -> dict[str, int]:
+    """
+    Run git-ai in a fresh interpreter and time what it imports.
+
+    Returns the cumulative import time, in microseconds, of every top-level
+    module imported after interpreter startup.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from git_ai.client import main; main()", *args],
+        cwd=cwd,
+        env={**os.environ, "GIT_AI_NO_DAEMON": "1"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == returncode, result.stderr
+
+    profile: dict[str, int] = {}
+    started = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if name.strip() == "site":
+            started = True
+        elif started and not name.startswith("  "):
+            profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def imported(profile: dict[str, int], package: str) -> bool:
+    return any(name == package or name.startswith(f"{package}.") for name in profile)
+
+
+class TestStartup:
+    def test_version_stays_within_budget(self, tmp_path: Path) -> None:
+        profile = import_profile("--version", cwd=tmp_path)
+        lazy = (
+            *PROVIDERS,
+            "rich",
+            "git",
+            "pydantic",
+            "git_ai.config",
+            "git_ai.services.git_service",
+        )
+        for package in lazy:
+            assert not imported(profile, package), f"--version imports {package}"
+        assert sum(profile.values()) < VERSION_BUDGET_US
+
+    def test_commit_loads_no_provider_before_it_needs_one(self, tmp_path: Path) -> None:
+        # Outside a repository, commit stops after loading the config and checking git
+        profile = import_profile("commit", cwd=tmp_path, returncode=1)
+        for package in PROVIDERS:
+            assert not imported(profile, package), f"commit imports {package} before the AI"
+        assert sum(profile.values()) < COMMIT_BUDGET_US
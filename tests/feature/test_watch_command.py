@@ -0,0 +1,88 @@
+"""Feature tests for the watch command."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from git_ai.cli import _pregeneration_fingerprint, app
+from git_ai.config import GitAiConfig
+from git_ai.support.pregenerated_store import PregeneratedStore
+from git_ai.support.staged_snapshot import StagedSnapshot
+
+runner = CliRunner()
+
+SNAPSHOT = StagedSnapshot.from_diff_output(
+    f":100644 100644 {'a' * 40} {'b' * 40} M\0app.py\0"
+    "1\t1\tapp.py\0\0"
+    "diff --git a/app.py b/app.py\n@@ -1 +1 @@\n-old\n+new\n"
+)
+
+
+class TestWatchCommand:
+    def test_fails_when_not_git_repository(self) -> None:
+        with patch("git_ai.services.git_service.GitService") as mock_git:
+            mock_git.return_value.is_git_repository.return_value = False
+            result = runner.invoke(app, ["watch"])
+            assert result.exit_code != 0
+            assert "not a Git repository" in result.output
+
+    def test_pregenerates_once_per_staged_tree(self, tmp_path: Path) -> None:
+        config = GitAiConfig()
+        trees = iter(["tree1", "tree1", "tree1", "tree2", "tree2"])
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=config),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("git_ai.support.index_watcher.IndexWatcher") as mock_watcher,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_git_dir.return_value = str(tmp_path)
+            instance.get_index_path.return_value = str(tmp_path / "index")
+            instance.write_tree.side_effect = lambda: next(trees)
+            instance.get_staged_snapshot.return_value = SNAPSHOT
+            watcher = mock_watcher.return_value.__enter__.return_value
+            # The second event leaves the tree unchanged, e.g. after `git status`
+            watcher.changes.return_value = iter([None, None])
+            ai = mock_resolve.return_value
+            ai.generate_commit_message.side_effect = [
+                {"type": "feat", "description": "first"},
+                {"type": "fix", "description": "second"},
+            ]
+            result = runner.invoke(app, ["watch"])
+
+            assert result.exit_code == 0
+            assert "Ready" in result.output
+            assert "fix: second" in result.output
+            assert ai.generate_commit_message.call_count == 2
+            store = PregeneratedStore.for_git_dir(tmp_path)
+            fingerprint = _pregeneration_fingerprint(config)
+            assert store.get("tree1", fingerprint) == {"type": "feat", "description": "first"}
+            assert store.get("tree2", fingerprint) == {"type": "fix", "description": "second"}
+
+    def test_keeps_watching_after_a_failure(self, tmp_path: Path) -> None:
+        with (
+            patch("git_ai.services.git_service.GitService") as mock_git,
+            patch("git_ai.config.load_config", return_value=GitAiConfig()),
+            patch("git_ai.services.factory.resolve_ai_service") as mock_resolve,
+            patch("git_ai.support.index_watcher.IndexWatcher") as mock_watcher,
+        ):
+            instance = mock_git.return_value
+            instance.is_git_repository.return_value = True
+            instance.get_git_dir.return_value = str(tmp_path)
+            instance.get_index_path.return_value = str(tmp_path / "index")
+            instance.write_tree.return_value = "tree1"
+            instance.get_staged_snapshot.return_value = SNAPSHOT
+            watcher = mock_watcher.return_value.__enter__.return_value
+            watcher.changes.return_value = iter([None])
+            ai = mock_resolve.return_value
+            ai.generate_commit_message.side_effect = [
+                RuntimeError("rate limited"),
+                {"type": "feat", "description": "retry"},
+            ]
+            result = runner.invoke(app, ["watch"])
+
+            assert result.exit_code == 0
+            assert "rate limited" in result.output
+            assert "feat: retry" in result.output
@@ -1,10 +1,61 @@
 """Tests for AI service factory and contracts."""
 
+import asyncio
+from collections.abc import Iterator
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
 
+from git_ai.agents.prompts import PromptParts
 from git_ai.config import GitAiConfig
-from git_ai.services.ai_service import AiService
-from git_ai.services.factory import resolve_ai_service
+from git_ai.services.ai_service import AiService, UsageStats
+from git_ai.services.factory import (
+    aclose_shared_clients,
+    close_shared_clients,
+    resolve_ai_service,
+    shared_async_client,
+    shared_client,
+)
+from git_ai.support.response_cache import ResponseCache
+
+COMMIT_RESPONSE = (
+    '{"type": "fix", "scope": "", "description": "handle empty diff", '
+    '"body": "", "is_breaking_change": false}'
+)
+
+
+class FakeAiService(AiService):
+    provider = "fake"
+    default_model = "fake-model"
+
+    def __init__(self, responses: list[str], cache: ResponseCache | None = None) -> None:
+        super().__init__(GitAiConfig(), cache)
+        self.responses = responses
+        self.prompts: list[PromptParts] = []
+
+    def _call(self, prompt: PromptParts) -> str:
+        self.prompts.append(prompt)
+        self.last_usage = UsageStats(input_tokens=100, output_tokens=20, cache_read_tokens=80)
+        return self.responses.pop(0)
+
+
+class StreamingFakeAiService(FakeAiService):
+    def _stream(self, prompt: PromptParts) -> Iterator[str]:
+        text = self._call(prompt)
+        for start in range(0, len(text), 5):
+            yield text[start : start + 5]
+
+
+class AsyncFakeAiService(FakeAiService):
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        await asyncio.sleep(0.01)
+        return self._call(prompt)
+
+
+def make_cache(tmp_path: Path) -> ResponseCache:
+    return ResponseCache(tmp_path, max_bytes=1024 * 1024, max_age_seconds=86400)
 
 
 class TestAiServiceContract:
@@ -15,6 +66,269 @@ class TestAiServiceContract:
         assert hasattr(AiService, "generate_changelog")
 
 
+class TestAiServiceCache:
+    def test_reuses_cached_response_for_same_diff(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        FakeAiService([COMMIT_RESPONSE], cache).generate_commit_message("diff")
+        service = FakeAiService([], cache)
+        result = service.generate_commit_message("diff")
+        assert result["description"] == "handle empty diff"
+        assert service.prompts == []
+        assert service.last_from_cache is True
+
+    def test_different_diff_misses(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        FakeAiService([COMMIT_RESPONSE], cache).generate_commit_message("diff")
+        service = FakeAiService([COMMIT_RESPONSE], cache)
+        service.generate_commit_message("other diff")
+        assert len(service.prompts) == 1
+        assert service.last_from_cache is False
+
+    def test_fresh_bypasses_and_replaces_cache(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        service = FakeAiService(
+            [COMMIT_RESPONSE, COMMIT_RESPONSE.replace("handle empty diff", "retry")], cache
+        )
+        service.generate_commit_message("diff")
+        result = service.generate_commit_message("diff", fresh=True)
+        assert result["description"] == "retry"
+        assert service.last_from_cache is False
+        replay = FakeAiService([], cache).generate_commit_message("diff")
+        assert replay["description"] == "retry"
+
+    def test_does_not_cache_invalid_responses(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        with pytest.raises(RuntimeError):
+            FakeAiService(["not json"], cache).generate_commit_message("diff")
+        service = FakeAiService([COMMIT_RESPONSE], cache)
+        service.generate_commit_message("diff")
+        assert len(service.prompts) == 1
+
+    def test_works_without_cache(self) -> None:
+        service = FakeAiService([COMMIT_RESPONSE, COMMIT_RESPONSE])
+        service.generate_commit_message("diff")
+        service.generate_commit_message("diff")
+        assert len(service.prompts) == 2
+
+
+class TestAiServicePromptCaching:
+    def test_sends_instructions_as_prefix_and_diff_as_suffix(self) -> None:
+        service = FakeAiService([COMMIT_RESPONSE])
+        service.generate_commit_message("my-diff-content")
+        (prompt,) = service.prompts
+        assert "my-diff-content" not in prompt.prefix
+        assert "my-diff-content" in prompt.suffix
+        assert "Conventional Commits" in prompt.prefix
+
+    def test_records_usage_with_elapsed_time(self) -> None:
+        service = FakeAiService([COMMIT_RESPONSE])
+        service.generate_commit_message("diff")
+        assert service.last_usage is not None
+        assert service.last_usage.cache_hit_ratio == 0.8
+        assert service.last_usage.seconds >= 0
+
+    def test_cached_response_has_no_usage(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        FakeAiService([COMMIT_RESPONSE], cache).generate_commit_message("diff")
+        service = FakeAiService([], cache)
+        service.generate_commit_message("diff")
+        assert service.last_usage is None
+
+    def test_anthropic_marks_prefix_for_caching(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        from git_ai.services.anthropic_service import AnthropicAiService
+
+        service = AnthropicAiService(GitAiConfig())
+        service.client = MagicMock()
+        service.client.messages.create.return_value = SimpleNamespace(
+            content=[SimpleNamespace(text=COMMIT_RESPONSE)],
+            usage=SimpleNamespace(
+                input_tokens=40,
+                output_tokens=30,
+                cache_read_input_tokens=900,
+                cache_creation_input_tokens=None,
+            ),
+        )
+        service.generate_commit_message("my-diff-content")
+        kwargs = service.client.messages.create.call_args.kwargs
+        (system,) = kwargs["system"]
+        assert system["cache_control"] == {"type": "ephemeral"}
+        assert "my-diff-content" not in system["text"]
+        assert "my-diff-content" in kwargs["messages"][0]["content"]
+        assert service.last_usage == UsageStats(
+            input_tokens=940,
+            output_tokens=30,
+            cache_read_tokens=900,
+            seconds=service.last_usage.seconds,
+        )
+
+    def test_openai_sends_static_prefix_first(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        from git_ai.services.openai_service import OpenAiService
+
+        service = OpenAiService(GitAiConfig(provider="openai"))
+        service.client = MagicMock()
+        service.client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=COMMIT_RESPONSE))],
+            usage=SimpleNamespace(
+                prompt_tokens=1200,
+                completion_tokens=30,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+            ),
+        )
+        service.generate_commit_message("my-diff-content")
+        system, user = service.client.chat.completions.create.call_args.kwargs["messages"]
+        assert system["role"] == "system"
+        assert "my-diff-content" not in system["content"]
+        assert "my-diff-content" in user["content"]
+        assert service.last_usage is not None
+        assert service.last_usage.cache_read_tokens == 1024
+        assert service.last_usage.input_tokens == 1200
+
+
+class TestAiServiceStreaming:
+    def test_reports_fields_as_they_complete(self) -> None:
+        updates: list[tuple[dict, dict]] = []
+        response = COMMIT_RESPONSE.replace('"body": ""', '"body": "Explain why it was empty."')
+        service = StreamingFakeAiService([response])
+        result = service.generate_commit_message(
+            "diff", on_update=lambda fields, partial: updates.append((dict(fields), partial))
+        )
+        assert result["description"] == "handle empty diff"
+        # The title is complete while the body is still arriving
+        assert any("description" in fields and "body" in partial for fields, partial in updates)
+        assert updates[-1][0] == result
+
+    def test_records_time_to_first_token(self) -> None:
+        service = StreamingFakeAiService([COMMIT_RESPONSE])
+        service.generate_commit_message("diff", on_update=lambda fields, partial: None)
+        assert service.last_usage is not None
+        assert service.last_usage.first_token_seconds is not None
+
+    def test_caches_streamed_response(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        StreamingFakeAiService([COMMIT_RESPONSE], cache).generate_commit_message(
+            "diff", on_update=lambda fields, partial: None
+        )
+        service = FakeAiService([], cache)
+        assert service.generate_commit_message("diff")["type"] == "fix"
+        assert service.last_from_cache
+
+    def test_providers_without_streaming_yield_once(self) -> None:
+        updates: list[dict] = []
+        service = FakeAiService([COMMIT_RESPONSE])
+        service.generate_commit_message(
+            "diff", on_update=lambda fields, partial: updates.append(dict(fields))
+        )
+        assert len(updates) == 1
+        assert updates[0]["type"] == "fix"
+
+
+class TestAiServiceAsync:
+    def test_falls_back_to_call_in_a_thread(self) -> None:
+        service = FakeAiService([COMMIT_RESPONSE])
+        result = asyncio.run(service.agenerate_commit_message("diff"))
+        assert result["type"] == "fix"
+        assert len(service.prompts) == 1
+
+    def test_runs_generations_concurrently(self) -> None:
+        service = AsyncFakeAiService([COMMIT_RESPONSE] * 20)
+
+        async def generate_all() -> list[dict]:
+            return await asyncio.gather(
+                *(service.agenerate_commit_message(f"diff {i}") for i in range(20))
+            )
+
+        results = asyncio.run(generate_all())
+        assert len(results) == 20
+        assert len(service.prompts) == 20
+
+    def test_shares_the_response_cache(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        FakeAiService([COMMIT_RESPONSE], cache).generate_commit_message("diff")
+        service = AsyncFakeAiService([], cache)
+        result = asyncio.run(service.agenerate_commit_message("diff"))
+        assert result["type"] == "fix"
+        assert service.last_from_cache
+
+    def test_temperature_is_part_of_the_cache_key(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        asyncio.run(AsyncFakeAiService([COMMIT_RESPONSE], cache).agenerate_commit_message("diff"))
+        service = AsyncFakeAiService([COMMIT_RESPONSE], cache)
+        asyncio.run(service.agenerate_commit_message("diff", temperature=0.7))
+        assert not service.last_from_cache
+        assert len(service.prompts) == 1
+
+    def test_generates_changelog(self) -> None:
+        service = AsyncFakeAiService(['{"sections": []}'])
+        result = asyncio.run(service.agenerate_changelog("- feat: add x"))
+        assert result == {"sections": []}
+        assert "feat: add x" in service.prompts[0].suffix
+
+    def test_anthropic_uses_async_client(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        from git_ai.services.anthropic_service import AnthropicAiService
+
+        service = AnthropicAiService(GitAiConfig())
+        client = MagicMock()
+        client.messages.create = AsyncMock(
+            return_value=SimpleNamespace(
+                content=[SimpleNamespace(text=COMMIT_RESPONSE)],
+                usage=SimpleNamespace(
+                    input_tokens=10,
+                    output_tokens=5,
+                    cache_read_input_tokens=0,
+                    cache_creation_input_tokens=0,
+                ),
+            )
+        )
+        monkeypatch.setattr(service, "_async_client", lambda: client)
+        result = asyncio.run(service.agenerate_commit_message("diff"))
+        assert result["type"] == "fix"
+        assert client.messages.create.await_count == 1
+        assert service.last_usage is not None
+
+
+class TestClientRegistry:
+    def test_reuses_client_for_same_key(self) -> None:
+        first = shared_client(("test", "registry-a"), object)
+        assert shared_client(("test", "registry-a"), object) is first
+        assert shared_client(("test", "registry-b"), object) is not first
+
+    def test_services_share_one_client(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        first = resolve_ai_service(GitAiConfig(provider="anthropic"))
+        second = resolve_ai_service(GitAiConfig(provider="anthropic"))
+        assert first.client is second.client
+
+    def test_closes_every_shared_client(self) -> None:
+        client = MagicMock()
+        shared_client(("test", "closing"), lambda: client)
+        close_shared_clients()
+        client.close.assert_called_once_with()
+        assert shared_client(("test", "closing"), object) is not client
+
+    def test_async_clients_belong_to_their_loop(self) -> None:
+        async def get() -> object:
+            first = shared_async_client(("test", "async"), object)
+            assert shared_async_client(("test", "async"), object) is first
+            return first
+
+        assert asyncio.run(get()) is not asyncio.run(get())
+
+    def test_closes_async_clients_of_the_loop(self) -> None:
+        client = MagicMock()
+        client.close = AsyncMock()
+
+        async def use_and_close() -> None:
+            shared_async_client(("test", "closing"), lambda: client)
+            await aclose_shared_clients()
+            assert shared_async_client(("test", "closing"), object) is not client
+
+        asyncio.run(use_and_close())
+        client.close.assert_awaited_once()
+
+
 class TestResolveAiService:
     def test_resolves_anthropic_by_default(self, monkeypatch: pytest.MonkeyPatch) -> None:
         monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
@@ -50,3 +364,35 @@ class TestResolveAiService:
         config = GitAiConfig(provider="openai")
         with pytest.raises(RuntimeError, match="OPENAI_API_KEY"):
             resolve_ai_service(config)
+
+    def test_hedges_a_provider_chain(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        from git_ai.services.claude_code_service import ClaudeCodeAiService
+        from git_ai.services.hedged_service import HedgedAiService
+
+        config = GitAiConfig(
+            provider="anthropic", providers=["anthropic", "claude-code"], model="claude-x"
+        )
+        service = resolve_ai_service(config)
+        assert isinstance(service, HedgedAiService)
+        assert [s.provider for s in service.services] == ["anthropic", "claude-code"]
+        assert service.model == "claude-x"
+        # The model belongs to the first provider
+        assert isinstance(service.services[1], ClaudeCodeAiService)
+        assert service.services[1].config.model is None
+
+    def test_chain_skips_providers_without_credentials(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        from git_ai.services.claude_code_service import ClaudeCodeAiService
+
+        config = GitAiConfig(provider="openai", providers=["openai", "claude-code"])
+        assert isinstance(resolve_ai_service(config), ClaudeCodeAiService)
+
+    def test_chain_raises_when_no_provider_is_usable(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        config = GitAiConfig(provider="anthropic", providers=["anthropic", "openai"])
+        with pytest.raises(RuntimeError, match="ANTHROPIC_API_KEY"):
+            resolve_ai_service(config)
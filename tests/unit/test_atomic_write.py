@@ -0,0 +1,33 @@
+"""Tests for writing files atomically."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from git_ai.support.atomic_write import atomic_write
+
+
+class TestAtomicWrite:
+    def test_creates_the_file_and_its_directories(self, tmp_path: Path) -> None:
+        path = tmp_path / "a" / "b" / "entry.json"
+        atomic_write(path, "{}")
+        assert path.read_text() == "{}"
+
+    def test_replaces_an_existing_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "entry.json"
+        path.write_text("old")
+        atomic_write(path, "new")
+        assert path.read_text() == "new"
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_failed_write_keeps_the_old_file_and_no_temporary(self, tmp_path: Path) -> None:
+        path = tmp_path / "entry.json"
+        path.write_text("old")
+        with (
+            patch("git_ai.support.atomic_write.os.replace", side_effect=OSError("full")),
+            pytest.raises(OSError),
+        ):
+            atomic_write(path, "new")
+        assert path.read_text() == "old"
+        assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,110 @@
+"""Tests for concurrent commit message candidates."""
+
+import asyncio
+import time
+from typing import Any
+
+import pytest
+
+from git_ai.agents.prompts import PromptParts
+from git_ai.config import GitAiConfig
+from git_ai.services.ai_service import AiService
+from git_ai.services.candidate_pool import CANDIDATE_TEMPERATURES, CandidatePool
+
+
+class FakeAiService(AiService):
+    provider = "fake"
+
+    def __init__(self, descriptions: list[str], delay: float = 0.01, fail: bool = False) -> None:
+        super().__init__(GitAiConfig())
+        self.descriptions = descriptions
+        self.delay = delay
+        self.fail = fail
+        self.calls: list[tuple[bool, float | None]] = []
+        self.active = 0
+        self.peak = 0
+
+    def _call(self, prompt: PromptParts) -> str:
+        raise NotImplementedError
+
+    async def agenerate_commit_message(
+        self, diff: str, fresh: bool = False, temperature: float | None = None
+    ) -> dict[str, Any]:
+        self.calls.append((fresh, temperature))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if self.fail:
+            raise RuntimeError("provider down")
+        description = self.descriptions.pop(0) if self.descriptions else "same"
+        return {"type": "fix", "scope": "", "description": description}
+
+
+class TestCandidatePool:
+    def test_sends_initial_candidates_concurrently(self) -> None:
+        ai = FakeAiService(["one", "two", "three"], delay=0.05)
+        with CandidatePool(ai, "diff", 3) as pool:
+            ready = pool.wait(3)
+        assert {r["description"] for r in ready} == {"one", "two", "three"}
+        assert ai.peak == 3
+
+    def test_first_candidate_may_come_from_cache(self) -> None:
+        ai = FakeAiService(["one", "two", "three"])
+        with CandidatePool(ai, "diff", 3) as pool:
+            pool.wait(3)
+        assert ai.calls[0] == (False, None)
+        assert ai.calls[1:] == [(True, t) for t in CANDIDATE_TEMPERATURES[:2]]
+
+    def test_taking_a_candidate_prefetches_another(self) -> None:
+        ai = FakeAiService(["one", "two", "three"])
+        with CandidatePool(ai, "diff", 2) as pool:
+            first = pool.next()
+            pool.wait(2)
+            assert len(ai.calls) == 3
+            started = time.monotonic()
+            second = pool.next()
+            assert time.monotonic() - started < 0.05
+        assert first["description"] != second["description"]
+
+    def test_wait_returns_what_is_ready_after_the_timeout(self) -> None:
+        ai = FakeAiService(["one", "two", "three"], delay=0.05)
+        with CandidatePool(ai, "diff", 2) as pool:
+            first = pool.wait(1)
+            started = time.monotonic()
+            ai.delay = 30
+            pool.take(first[0])
+            ready = pool.wait(2, timeout=0.2)
+            assert time.monotonic() - started < 1
+        assert len(ready) == 1
+
+    def test_drops_and_retries_repeated_titles(self) -> None:
+        ai = FakeAiService(["one", "one", "two"])
+        with CandidatePool(ai, "diff", 2) as pool:
+            ready = pool.wait(2)
+        assert [r["description"] for r in ready] == ["one", "two"]
+
+    def test_reports_when_only_repeats_come_back(self) -> None:
+        ai = FakeAiService([])
+        with CandidatePool(ai, "diff", 1) as pool:
+            pool.next()
+            with pytest.raises(RuntimeError, match="already shown"):
+                pool.next()
+
+    def test_raises_when_every_generation_fails(self) -> None:
+        ai = FakeAiService([], fail=True)
+        with CandidatePool(ai, "diff", 2) as pool, pytest.raises(RuntimeError, match="down"):
+            pool.wait(2)
+
+    def test_close_cancels_requests_in_flight(self) -> None:
+        ai = FakeAiService([], delay=30)
+        started = time.monotonic()
+        with CandidatePool(ai, "diff", 3):
+            pass
+        assert time.monotonic() - started < 5
+
+    def test_rejects_empty_pool(self) -> None:
+        with pytest.raises(ValueError, match="Invalid candidate count"):
+            CandidatePool(FakeAiService([]), "diff", 0)
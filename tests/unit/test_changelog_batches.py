@@ -0,0 +1,77 @@
+"""Tests for splitting commits into changelog batches and merging the results."""
+
+from git_ai.support.changelog_batches import (
+    COMMITS_HEADER,
+    OUTPUT_TOKENS_PER_COMMIT,
+    batch_commits,
+    commits_prompt,
+    merge_sections,
+)
+from git_ai.support.token_estimator import TokenEstimator
+
+GROUPED = {
+    "feat": [f"feat: add feature number {i}" for i in range(30)],
+    "fix": [f"fix: repair bug number {i}" for i in range(30)],
+}
+
+
+class TestCommitsPrompt:
+    def test_lists_commits_under_their_type(self) -> None:
+        prompt = commits_prompt({"feat": ["feat: add login"], "fix": ["fix: typo"]})
+        assert prompt == COMMITS_HEADER + "## feat\n- feat: add login\n\n## fix\n- fix: typo\n\n"
+
+
+class TestBatchCommits:
+    def test_small_range_is_one_batch(self) -> None:
+        batches = batch_commits(GROUPED, TokenEstimator(), None, 4096)
+        assert batches == [GROUPED]
+
+    def test_respects_the_prompt_budget(self) -> None:
+        estimator = TokenEstimator()
+        batches = batch_commits(GROUPED, estimator, 100, 4096)
+
+        assert len(batches) > 1
+        for batch in batches:
+            assert estimator.count(commits_prompt(batch)) - estimator.count(COMMITS_HEADER) <= 100
+        # Order is kept and nothing is lost
+        assert [m for batch in batches for ms in batch.values() for m in ms] == [
+            *GROUPED["feat"],
+            *GROUPED["fix"],
+        ]
+
+    def test_leaves_room_for_the_response(self) -> None:
+        batches = batch_commits(GROUPED, TokenEstimator(), None, 10 * OUTPUT_TOKENS_PER_COMMIT)
+        assert [sum(len(ms) for ms in batch.values()) for batch in batches] == [10] * 6
+
+    def test_oversized_commit_gets_its_own_batch(self) -> None:
+        grouped = {"feat": ["feat: small", "feat: " + "word " * 500, "feat: small too"]}
+        batches = batch_commits(grouped, TokenEstimator(), 50, 4096)
+        assert [batch["feat"] for batch in batches] == [
+            ["feat: small"],
+            ["feat: " + "word " * 500],
+            ["feat: small too"],
+        ]
+
+
+class TestMergeSections:
+    def test_joins_sections_of_the_same_type(self) -> None:
+        merged = merge_sections(
+            [
+                [{"type": "feat", "entries": ["Add login"]}, {"type": "fix", "entries": ["Typo"]}],
+                [{"type": "feat", "entries": ["Add signup"]}, {"type": "docs", "entries": ["Doc"]}],
+            ]
+        )
+        assert merged == [
+            {"type": "feat", "entries": ["Add login", "Add signup"]},
+            {"type": "fix", "entries": ["Typo"]},
+            {"type": "docs", "entries": ["Doc"]},
+        ]
+
+    def test_drops_repeated_entries(self) -> None:
+        merged = merge_sections(
+            [
+                [{"type": "feat", "entries": ["Add login page.", "Add login page"]}],
+                [{"type": "feat", "entries": ["add  login page", "Add signup"]}],
+            ]
+        )
+        assert merged == [{"type": "feat", "entries": ["Add login page.", "Add signup"]}]
@@ -0,0 +1,110 @@
+"""Tests for map-reduce changelog generation."""
+
+import asyncio
+
+import pytest
+
+from git_ai.agents.prompts import PromptParts
+from git_ai.config import GitAiConfig
+from git_ai.services.ai_service import AiService
+from git_ai.services.changelog_pipeline import (
+    generate_changelog_entries,
+    generate_changelog_sections,
+    generate_release_sections,
+)
+
+
+class BatchAiService(AiService):
+    """Answers every batch with one entry naming it, tracking how many run at once."""
+
+    def __init__(self, fail_on: str | None = None) -> None:
+        super().__init__(GitAiConfig())
+        self.fail_on = fail_on
+        self.running = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    def _call(self, prompt: PromptParts) -> str:
+        raise AssertionError("batches are generated asynchronously")
+
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.5 if prompt.suffix == "slow" else 0.01)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+        if prompt.suffix == self.fail_on:
+            raise RuntimeError(f"failed on {prompt.suffix}")
+        if "entries" in prompt.prefix and "sections" not in prompt.prefix:
+            return (
+                f'{{"entries": [{{"id": "{prompt.suffix}", "entry": "Entry {prompt.suffix}"}}, '
+                '{"id": "", "entry": "no id"}, "junk"]}'
+            )
+        return f'{{"sections": [{{"type": "feat", "entries": ["{prompt.suffix}", "shared"]}}]}}'
+
+
+class TestGenerateChangelogSections:
+    def test_merges_batches_in_order(self) -> None:
+        ai = BatchAiService()
+        done: list[int] = []
+
+        sections = generate_changelog_sections(ai, ["a", "b", "c"], 2, on_done=done.append)
+
+        assert sections == [{"type": "feat", "entries": ["a", "shared", "b", "c"]}]
+        assert sorted(done) == [0, 1, 2]
+
+    def test_bounds_concurrency(self) -> None:
+        ai = BatchAiService()
+        generate_changelog_sections(ai, [str(i) for i in range(10)], 3)
+        assert ai.peak == 3
+
+    def test_failed_batch_stops_the_rest(self) -> None:
+        ai = BatchAiService(fail_on="bad")
+        with pytest.raises(RuntimeError, match="failed on bad"):
+            generate_changelog_sections(ai, ["bad", "slow"], 2)
+        assert ai.cancelled == 1
+
+    def test_rejects_invalid_concurrency(self) -> None:
+        with pytest.raises(ValueError, match="concurrency"):
+            generate_changelog_sections(BatchAiService(), ["a"], 0)
+
+
+class TestGenerateReleaseSections:
+    def test_merges_the_batches_of_each_release(self) -> None:
+        ai = BatchAiService()
+        done: list[int] = []
+
+        sections = generate_release_sections(
+            ai, [["a", "b"], ["c"], ["d", "e"]], 2, on_done=done.append
+        )
+
+        assert sections == [
+            [{"type": "feat", "entries": ["a", "shared", "b"]}],
+            [{"type": "feat", "entries": ["c", "shared"]}],
+            [{"type": "feat", "entries": ["d", "shared", "e"]}],
+        ]
+        assert sorted(done) == [0, 1, 2, 3, 4]
+
+    def test_releases_share_one_pool(self) -> None:
+        ai = BatchAiService()
+        generate_release_sections(ai, [[str(i) for i in range(4)], ["x", "y"]], 3)
+        assert ai.peak == 3
+
+
+class TestGenerateChangelogEntries:
+    def test_collects_entries_by_id(self) -> None:
+        ai = BatchAiService()
+        done: list[int] = []
+
+        entries = generate_changelog_entries(ai, ["a", "b"], 2, on_done=done.append)
+
+        assert entries == {"a": "Entry a", "b": "Entry b"}
+        assert sorted(done) == [0, 1]
+
+    def test_failed_batch_fails_the_entries(self) -> None:
+        with pytest.raises(RuntimeError, match="failed on bad"):
+            generate_changelog_entries(BatchAiService(fail_on="bad"), ["bad", "ok"], 2)
@@ -1,13 +1,79 @@
 """Tests for ClaudeCodeAiService."""
 
+import asyncio
 import json
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
 
 import pytest
 
+from git_ai.agents.prompts import PromptParts
 from git_ai.config import GitAiConfig
 from git_ai.services.claude_code_service import ClaudeCodeAiService
 
 
+def install_fake_claude(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    lines: list[dict],
+    exit_code: int = 0,
+    startup: float = 0.0,
+    thinking: float = 0.0,
+) -> None:
+    """
+    Put a `claude` executable on PATH that answers a stream-json prompt with `lines`.
+
+    Each launch is logged to `launches.jsonl` and each prompt, with the
+    system prompt of the CLI that got it, to `prompts.jsonl`. A non-zero
+    `exit_code` makes it fail before reading any prompt; `startup` and
+    `thinking` delay it before reading and before answering. Like the real
+    CLI, a second prompt would continue the conversation, so it fails instead.
+    """
+    script = tmp_path / "claude"
+    output = "".join(json.dumps(line) + "\n" for line in lines)
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import json, sys, time\n"
+        "system = sys.argv[sys.argv.index('--append-system-prompt') + 1]\n"
+        f"time.sleep({startup})\n"
+        f"with open({str(tmp_path / 'launches.jsonl')!r}, 'a') as f:\n"
+        "    f.write(json.dumps(sys.argv[1:]) + '\\n')\n"
+        "sys.stderr.write('boom')\n"
+        f"if {exit_code}:\n"
+        f"    sys.exit({exit_code})\n"
+        "for turn, line in enumerate(sys.stdin):\n"
+        "    if turn:\n"
+        "        sys.stderr.write('prompt sent after an earlier conversation')\n"
+        "        sys.exit(1)\n"
+        f"    time.sleep({thinking})\n"
+        f"    with open({str(tmp_path / 'prompts.jsonl')!r}, 'a') as f:\n"
+        "        f.write(json.dumps({'system': system, 'message': json.loads(line)}) + '\\n')\n"
+        f"    sys.stdout.write({output!r})\n"
+        "    sys.stdout.flush()\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path), prepend=":")
+
+
+def read_log(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+
+@pytest.fixture(autouse=True)
+def close_sessions() -> Iterator[None]:
+    yield
+    ClaudeCodeAiService(GitAiConfig(provider="claude-code")).sessions.close()
+
+
+def text_delta(text: str) -> dict:
+    return {
+        "type": "stream_event",
+        "event": {"type": "content_block_delta", "delta": {"type": "text_delta", "text": text}},
+    }
+
+
 class TestClaudeCodeAiService:
     def test_can_be_instantiated(self) -> None:
         config = GitAiConfig(provider="claude-code")
@@ -59,3 +125,229 @@ class TestClaudeCodeAiService:
         result = service._parse_json(text, ["sections"])
         assert len(result["sections"]) == 1
         assert result["sections"][0]["type"] == "feat"
+
+    def test_sends_prompt_over_stdin(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        install_fake_claude(
+            tmp_path,
+            monkeypatch,
+            [
+                {
+                    "type": "result",
+                    "result": "{}",
+                    "usage": {
+                        "input_tokens": 10,
+                        "cache_read_input_tokens": 500,
+                        "cache_creation_input_tokens": 50,
+                        "output_tokens": 20,
+                    },
+                }
+            ],
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        # Larger than the kernel's limit for a single command-line argument
+        diff = "+" * 200_000
+        assert service._call(PromptParts("instructions", diff)) == "{}"
+
+        assert all(diff not in argv for argv in read_log(tmp_path / "launches.jsonl"))
+        [prompt] = read_log(tmp_path / "prompts.jsonl")
+        assert prompt == {
+            "system": "instructions",
+            "message": {"type": "user", "message": {"role": "user", "content": diff}},
+        }
+        assert service.last_usage is not None
+        assert service.last_usage.input_tokens == 560
+        assert service.last_usage.cache_read_tokens == 500
+        assert service.last_usage.cache_write_tokens == 50
+
+    def test_starts_the_next_session_ahead(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        startup = thinking = 0.3
+        install_fake_claude(
+            tmp_path,
+            monkeypatch,
+            [{"type": "result", "result": "{}"}],
+            startup=startup,
+            thinking=thinking,
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        timings = []
+        for index in range(4):
+            started = time.perf_counter()
+            service._call(PromptParts("instructions", f"diff {index}"))
+            timings.append(time.perf_counter() - started)
+
+        assert len(read_log(tmp_path / "prompts.jsonl")) == 4
+        # From the second call on, each CLI starts while the one before it thinks
+        assert min(timings[:2]) >= startup + thinking
+        assert max(timings[2:]) < startup + thinking
+
+    def test_a_single_prompt_launches_one_cli(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(tmp_path, monkeypatch, [{"type": "result", "result": "{}"}])
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        service._call(PromptParts("instructions", "the diff"))
+        service._call(PromptParts("other instructions", "the commits"))
+        assert not any(service.sessions._idle.values())
+
+    def test_closing_terminates_idle_sessions(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # Like a CLI still starting up, the fake one ignores its closed input for a while
+        install_fake_claude(
+            tmp_path, monkeypatch, [{"type": "result", "result": "{}"}], startup=3.0
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        command = service._command(PromptParts("instructions", ""))
+        taken = [service.sessions.acquire(command) for _ in range(2)]
+        assert any(service.sessions._idle.values())
+        started = time.perf_counter()
+        for session in taken:
+            service.sessions.release(session)
+        service.sessions.close()
+        assert time.perf_counter() - started < 1.0
+
+    def test_every_prompt_starts_a_new_conversation(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # The fake CLI fails if a prompt reaches it after another one
+        install_fake_claude(tmp_path, monkeypatch, [{"type": "result", "result": "{}"}])
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        for index in range(3):
+            assert service._call(PromptParts("instructions", f"diff {index}")) == "{}"
+        prompts = read_log(tmp_path / "prompts.jsonl")
+        assert [prompt["message"]["message"]["content"] for prompt in prompts] == [
+            "diff 0",
+            "diff 1",
+            "diff 2",
+        ]
+
+    def test_separate_sessions_per_system_prompt(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(tmp_path, monkeypatch, [{"type": "result", "result": "{}"}])
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        service._call(PromptParts("commit instructions", "the diff"))
+        service._call(PromptParts("changelog instructions", "the commits"))
+        service._call(PromptParts("commit instructions", "another diff"))
+        prompts = read_log(tmp_path / "prompts.jsonl")
+        assert [
+            (prompt["system"], prompt["message"]["message"]["content"]) for prompt in prompts
+        ] == [
+            ("commit instructions", "the diff"),
+            ("changelog instructions", "the commits"),
+            ("commit instructions", "another diff"),
+        ]
+
+    def test_raises_on_error_result(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        install_fake_claude(
+            tmp_path,
+            monkeypatch,
+            [{"type": "result", "subtype": "error_max_turns", "is_error": True}],
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        with pytest.raises(RuntimeError, match="error_max_turns"):
+            service._call(PromptParts("instructions", "the diff"))
+
+    def test_streams_partial_messages(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(
+            tmp_path,
+            monkeypatch,
+            [
+                {"type": "system", "subtype": "init"},
+                text_delta('{"type": "fix", '),
+                text_delta('"description": "x"}'),
+                {
+                    "type": "result",
+                    "result": '{"type": "fix", "description": "x"}',
+                    "usage": {"input_tokens": 5, "output_tokens": 7},
+                },
+            ],
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        chunks = list(service._stream(PromptParts("instructions", "the diff")))
+        assert chunks == ['{"type": "fix", ', '"description": "x"}']
+        assert service.last_usage is not None
+        assert service.last_usage.output_tokens == 7
+
+    def test_stream_falls_back_to_final_result(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(tmp_path, monkeypatch, [{"type": "result", "result": "{}"}])
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        assert list(service._stream(PromptParts("instructions", "the diff"))) == ["{}"]
+
+    def test_stream_raises_on_failure(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(tmp_path, monkeypatch, [], exit_code=2)
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        with pytest.raises(RuntimeError, match="exit code 2"):
+            list(service._stream(PromptParts("instructions", "the diff")))
+
+    def test_times_out_a_silent_cli(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        install_fake_claude(tmp_path, monkeypatch, [])
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code", timeout=0.3))
+        with pytest.raises(RuntimeError, match="did not answer within 0.3 seconds"):
+            service._call(PromptParts("instructions", "the diff"))
+
+    def test_abandoned_stream_stops_session(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(
+            tmp_path,
+            monkeypatch,
+            [text_delta("{"), text_delta("}"), {"type": "result", "result": "{}"}],
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        stream = service._stream(PromptParts("instructions", "the diff"))
+        assert next(stream) == "{"
+        stream.close()
+        # The interrupted CLI is gone, and the next prompt gets a new one
+        assert list(service._stream(PromptParts("instructions", "the diff"))) == ["{", "}"]
+
+    def test_async_call_parses_result(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(
+            tmp_path,
+            monkeypatch,
+            [
+                {
+                    "type": "result",
+                    "result": '{"type": "fix"}',
+                    "usage": {"input_tokens": 3, "output_tokens": 4},
+                }
+            ],
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        text = asyncio.run(service._acall(PromptParts("instructions", "the diff")))
+        assert text == '{"type": "fix"}'
+        assert service.last_usage is not None
+        assert service.last_usage.output_tokens == 4
+
+    def test_async_call_raises_on_failure(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(tmp_path, monkeypatch, [], exit_code=3)
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+        with pytest.raises(RuntimeError, match="exit code 3"):
+            asyncio.run(service._acall(PromptParts("instructions", "the diff")))
+
+    def test_concurrent_async_calls_use_separate_sessions(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        install_fake_claude(
+            tmp_path, monkeypatch, [{"type": "result", "result": "{}"}], startup=0.2
+        )
+        service = ClaudeCodeAiService(GitAiConfig(provider="claude-code"))
+
+        async def generate() -> list[str]:
+            prompt = PromptParts("instructions", "the diff")
+            return await asyncio.gather(*(service._acall(prompt) for _ in range(3)))
+
+        assert asyncio.run(generate()) == ["{}"] * 3
+        assert len(read_log(tmp_path / "prompts.jsonl")) == 3
@@ -0,0 +1,85 @@
+"""Tests for the thin client entry point."""
+
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from git_ai import client
+
+
+class TestSocketPath:
+    def test_honours_the_environment_override(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("GIT_AI_DAEMON_SOCKET", "/tmp/custom.sock")
+        assert client.socket_path() == "/tmp/custom.sock"
+
+    def test_prefers_the_runtime_directory(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("GIT_AI_DAEMON_SOCKET", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+        assert client.socket_path() == "/run/user/1000/git-ai/daemon.sock"
+
+    def test_falls_back_to_a_per_user_temporary_path(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("GIT_AI_DAEMON_SOCKET", raising=False)
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        assert client.socket_path() == f"/tmp/git-ai-{os.getuid()}/daemon.sock"
+
+
+class TestForward:
+    def test_declines_without_a_daemon(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("GIT_AI_DAEMON_SOCKET", str(tmp_path / "missing.sock"))
+        assert client.forward(["--version"]) is None
+
+    def test_declines_when_disabled(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("GIT_AI_NO_DAEMON", "1")
+        assert client.forward(["--version"]) is None
+
+    def test_never_forwards_the_daemon_command(self) -> None:
+        assert client.forward(["daemon"]) is None
+
+    def test_declines_a_directory_others_can_enter(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        # Nobody accepts, so a forwarded command would wait for a reply forever
+        tmp_path.chmod(0o755)
+        path = tmp_path / "daemon.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(str(path))
+            server.listen()
+            monkeypatch.setenv("GIT_AI_DAEMON_SOCKET", str(path))
+            assert client.forward(["--version"]) is None
+
+    def test_sends_the_whole_environment(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        tmp_path.chmod(0o700)
+        path = tmp_path / "daemon.sock"
+        monkeypatch.setenv("GIT_AI_DAEMON_SOCKET", str(path))
+        monkeypatch.setenv("SSH_AUTH_SOCK", "/run/agent.sock")
+        received: dict = {}
+
+        def decline(server: socket.socket) -> None:
+            connection, _ = server.accept()
+            with connection:
+                data, fds, _, _ = socket.recv_fds(connection, 64 * 1024, 3)
+                for fd in fds:
+                    os.close(fd)
+                (size,) = client.HEADER.unpack(data[: client.HEADER.size])
+                while len(data) < client.HEADER.size + size:
+                    data += connection.recv(64 * 1024)
+                received.update(json.loads(data[client.HEADER.size :]))
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+            server.bind(str(path))
+            server.listen()
+            thread = threading.Thread(target=decline, args=(server,))
+            thread.start()
+            assert client.forward(["--version"]) is None
+            thread.join()
+
+        # Hooks, signing and finding the CLIs depend on PATH, HOME, SSH_AUTH_SOCK and the like
+        assert received["env"] == dict(os.environ)
@@ -0,0 +1,113 @@
+"""Tests for the per-commit changelog index."""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from git_ai.support.commit_index import CommitIndex, IndexedCommit, entry_ids
+from git_ai.support.commit_log import CommitRecord
+
+
+def records(count: int, start: int = 0) -> list[CommitRecord]:
+    return [CommitRecord(f"{i:040x}", f"feat(api): change {i}") for i in range(start, count)]
+
+
+class TestIndexedCommit:
+    def test_keeps_what_the_changelog_needs(self) -> None:
+        commit = IndexedCommit.from_record(
+            CommitRecord("a" * 40, "fix(api): handle timeouts", "BREAKING CHANGE: seconds now")
+        )
+        assert commit == IndexedCommit(
+            sha="a" * 40,
+            type="fix",
+            line="fix(api): handle timeouts (BREAKING CHANGE: seconds now)",
+            scope="api",
+            breaking=True,
+        )
+
+    def test_free_form_commits_are_other(self) -> None:
+        commit = IndexedCommit.from_record(CommitRecord("a" * 40, "Update README"))
+        assert (commit.type, commit.line) == ("other", "Update README")
+
+
+class TestCommitIndex:
+    def test_lives_under_the_git_directory(self, tmp_path: Path) -> None:
+        index = CommitIndex.for_git_dir(tmp_path)
+        assert index.path == tmp_path / "git-ai" / "commits.sqlite"
+
+    def test_parses_only_commits_not_indexed(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        index = CommitIndex(tmp_path / "commits.sqlite")
+        first = list(index.index(records(600)))
+        assert [c.sha for c in first] == [r.hash for r in records(600)]
+
+        parsed: list[str] = []
+        original = IndexedCommit.from_record.__func__  # type: ignore[attr-defined]
+
+        def counting(cls: type[IndexedCommit], record: CommitRecord) -> IndexedCommit:
+            parsed.append(record.hash)
+            return original(cls, record)
+
+        monkeypatch.setattr(IndexedCommit, "from_record", classmethod(counting))
+        again = list(index.index(records(601)))
+
+        assert parsed == [f"{600:040x}"]
+        assert again[:600] == first
+
+    def test_opens_one_connection_per_range(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        index = CommitIndex(tmp_path / "commits.sqlite")
+        connections: list[str] = []
+        connect = sqlite3.connect
+
+        def counting(*args: object, **kwargs: object) -> sqlite3.Connection:
+            connections.append(str(args[0]))
+            return connect(*args, **kwargs)  # type: ignore[arg-type]
+
+        monkeypatch.setattr(sqlite3, "connect", counting)
+        # Three lookup batches, each storing what it parsed
+        assert len(list(index.index(records(1200)))) == 1200
+        index.entries([r.hash for r in records(1200)], "en")
+        assert len(connections) == 2
+
+    def test_entries_are_kept_per_fingerprint(self, tmp_path: Path) -> None:
+        index = CommitIndex(tmp_path / "commits.sqlite")
+        index.add_entries("en", {"a" * 40: "Add paging", "b" * 40: "Fix timeouts"})
+        index.add_entries("en", {"a" * 40: "Ignored: rows are append-only"})
+
+        assert index.entries(["a" * 40, "c" * 40], "en") == {"a" * 40: "Add paging"}
+        assert index.entries(["a" * 40], "pt-BR") == {}
+
+    def test_an_unusable_index_treats_every_commit_as_new(self, tmp_path: Path) -> None:
+        blocked = tmp_path / "file"
+        blocked.write_text("")
+        index = CommitIndex(blocked / "commits.sqlite")
+
+        assert len(list(index.index(records(3)))) == 3
+        index.add_entries("en", {"a" * 40: "Add paging"})
+        assert index.entries(["a" * 40], "en") == {}
+
+    def test_rebuilds_an_index_from_another_version(self, tmp_path: Path) -> None:
+        path = tmp_path / "commits.sqlite"
+        with sqlite3.connect(path) as db:
+            db.execute("CREATE TABLE commits (sha TEXT)")
+            db.execute("PRAGMA user_version = 99")
+        db.close()
+
+        commits = list(CommitIndex(path).index(records(2)))
+        assert [c.type for c in commits] == ["feat", "feat"]
+        assert list(CommitIndex(path).index(records(2))) == commits
+
+
+class TestEntryIds:
+    def test_short_prefixes_name_distinct_commits(self) -> None:
+        assert entry_ids(["a" * 40, "b" * 40]) == {"a" * 12: "a" * 40, "b" * 12: "b" * 40}
+
+    def test_prefixes_grow_until_unique(self) -> None:
+        shas = [f"{i:040x}" for i in range(3)]
+        ids = entry_ids(shas)
+        assert sorted(ids.values()) == shas
+        assert all(len(id_) == 40 for id_ in ids)
@@ -0,0 +1,80 @@
+"""Tests for the streaming `git log -z` parser."""
+
+import tracemalloc
+from collections.abc import Iterator
+
+from git_ai.support.commit_log import CommitRecord, parse_commit_log
+
+
+def record(
+    sha: str,
+    subject: str,
+    body: str = "",
+    trailers: str = "",
+    date: str = "1700000000",
+    parents: str = "",
+) -> bytes:
+    return f"{sha}\x1f{parents}\x1f{date}\x1f{trailers}\x1f{subject}\x1f{body}\0".encode()
+
+
+class TestParseCommitLog:
+    def test_parses_every_field(self) -> None:
+        raw = record(
+            "a" * 40,
+            "fix(api): handle | in titles",
+            "Why.\n\nRefs: #1\n",
+            "Refs: #1\n",
+            parents=f"{'b' * 40} {'c' * 40}",
+        )
+
+        (commit,) = parse_commit_log([raw])
+
+        assert commit == CommitRecord(
+            hash="a" * 40,
+            subject="fix(api): handle | in titles",
+            body="Why.\n\nRefs: #1",
+            author_date=1700000000,
+            trailers=(("Refs", "#1"),),
+            parents=("b" * 40, "c" * 40),
+        )
+        assert commit.message == "fix(api): handle | in titles\n\nWhy.\n\nRefs: #1"
+        assert commit.trailer("refs") == "#1"
+        assert commit.trailer("Signed-off-by") is None
+
+    def test_records_split_across_chunks(self) -> None:
+        raw = record("a" * 40, "feat: one") + record("b" * 40, "feat: two", "Body.")
+        chunks = [raw[i : i + 7] for i in range(0, len(raw), 7)]
+
+        commits = list(parse_commit_log(chunks))
+
+        assert [c.subject for c in commits] == ["feat: one", "feat: two"]
+        assert commits[1].body == "Body."
+
+    def test_body_may_contain_the_field_separator(self) -> None:
+        (commit,) = parse_commit_log([record("a" * 40, "feat: x", "odd\x1fbody")])
+        assert commit.body == "odd\x1fbody"
+
+    def test_skips_malformed_records(self) -> None:
+        assert list(parse_commit_log([b"garbage\0", b""])) == []
+
+    def test_is_lazy(self) -> None:
+        def chunks() -> Iterator[bytes]:
+            yield record("a" * 40, "feat: one")
+            raise AssertionError("read past the first commit")
+
+        assert next(parse_commit_log(chunks())).subject == "feat: one"
+
+    def test_memory_stays_flat_for_long_histories(self) -> None:
+        def chunks(count: int) -> Iterator[bytes]:
+            for i in range(count):
+                yield record(f"{i:040x}", f"feat: change number {i}", "A body line.\n" * 5)
+
+        tracemalloc.start()
+        try:
+            seen = sum(1 for _ in parse_commit_log(chunks(50_000)))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert seen == 50_000
+        assert peak < 256 * 1024
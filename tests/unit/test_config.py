@@ -16,6 +16,9 @@ class TestGitAiConfig:
         assert config.scopes == []
         assert config.types == []
         assert config.max_diff_size == 15000
+        assert config.max_prompt_tokens is None
+        assert config.max_output_tokens == 4096
+        assert config.git_backend == "auto"
 
     def test_default_commit_config(self) -> None:
         config = GitAiConfig()
@@ -24,16 +27,50 @@ class TestGitAiConfig:
         assert config.commit.footer.co_authored_by is False
         assert config.commit.footer.lines == []
 
+    def test_default_diff_config(self) -> None:
+        config = GitAiConfig()
+        assert config.diff.reducers == [
+            "binary",
+            "lockfile",
+            "notebook",
+            "svg",
+            "minified",
+            "rename",
+        ]
+        assert config.diff.rules == {}
+        assert config.diff.keep == []
+        assert config.diff.rename_threshold == 50
+        assert config.diff.find_copies is True
+        assert config.diff.python_summary == "off"
+        assert config.diff.strategy == "budget"
+        assert config.diff.concurrency == 4
+
     def test_default_changelog_config(self) -> None:
         config = GitAiConfig()
         assert config.changelog.path == "CHANGELOG.md"
         assert config.changelog.with_emojis is True
+        assert config.changelog.concurrency == 4
+        assert config.changelog.incremental is False
+
+    def test_default_cache_config(self) -> None:
+        config = GitAiConfig()
+        assert config.cache.enabled is True
+        assert config.cache.max_size_mb == 50
+        assert config.cache.max_age_days == 30
 
     def test_default_hook_config(self) -> None:
         config = GitAiConfig()
         assert config.hook.enabled is False
         assert config.hook.strict is True
 
+    def test_default_hedge_config(self) -> None:
+        config = GitAiConfig()
+        assert config.providers == []
+        assert config.timeout == 120.0
+        assert config.hedge.percentile == 0.95
+        assert config.hedge.initial_delay == 10.0
+        assert config.hedge.min_delay == 1.0
+
 
 class TestFindConfigFile:
     def test_finds_config_in_current_dir(self, tmp_path: Path) -> None:
@@ -76,6 +113,25 @@ class TestLoadConfig:
         config = load_config(str(tmp_path))
         assert config.language == "es"
 
+    def test_env_override_git_backend(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("GIT_AI_GIT_BACKEND", "subprocess")
+        config = load_config(str(tmp_path))
+        assert config.git_backend == "subprocess"
+
+    def test_env_override_max_prompt_tokens(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("GIT_AI_MAX_PROMPT_TOKENS", "8000")
+        config = load_config(str(tmp_path))
+        assert config.max_prompt_tokens == 8000
+
+    def test_env_override_cache(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("GIT_AI_CACHE", "false")
+        config = load_config(str(tmp_path))
+        assert config.cache.enabled is False
+
     def test_env_overrides_file(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
         config_file = tmp_path / ".git-ai.toml"
         config_file.write_text('[git-ai]\nprovider = "openai"\n')
@@ -83,6 +139,33 @@ class TestLoadConfig:
         config = load_config(str(tmp_path))
         assert config.provider == "anthropic"
 
+    def test_provider_chain_starts_with_first_entry(self, tmp_path: Path) -> None:
+        config_file = tmp_path / ".git-ai.toml"
+        config_file.write_text('[git-ai]\nproviders = ["openai", "claude-code"]\n')
+        config = load_config(str(tmp_path))
+        assert config.provider == "openai"
+        assert config.providers == ["openai", "claude-code"]
+
+    def test_explicit_provider_leads_the_chain(self, tmp_path: Path) -> None:
+        config_file = tmp_path / ".git-ai.toml"
+        config_file.write_text(
+            '[git-ai]\nprovider = "claude-code"\nproviders = ["openai", "claude-code"]\n'
+        )
+        assert load_config(str(tmp_path)).provider == "claude-code"
+
+    def test_env_override_providers_and_timeout(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("GIT_AI_PROVIDERS", "anthropic, openai")
+        monkeypatch.setenv("GIT_AI_TIMEOUT", "30")
+        config = load_config(str(tmp_path))
+        assert config.providers == ["anthropic", "openai"]
+        assert config.timeout == 30.0
+
+    def test_diff_strategy_from_env(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("GIT_AI_DIFF_STRATEGY", "map-reduce")
+        assert load_config(str(tmp_path)).diff.strategy == "map-reduce"
+
     def test_returns_defaults_when_no_config(self, tmp_path: Path) -> None:
         config = load_config(str(tmp_path))
         assert config.provider == "anthropic"
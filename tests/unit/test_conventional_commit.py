@@ -0,0 +1,82 @@
+"""Tests for the Conventional Commits message parser."""
+
+from git_ai.support.conventional_commit import ConventionalCommit, parse_commit_message
+
+
+class TestParseCommitMessage:
+    def test_parses_the_header(self) -> None:
+        assert parse_commit_message("feat(auth): add OAuth2 login") == ConventionalCommit(
+            type="feat", description="add OAuth2 login", scope="auth"
+        )
+
+    def test_bang_marks_a_breaking_change(self) -> None:
+        commit = parse_commit_message("refactor!: drop Python 3.12")
+        assert commit is not None
+        assert commit.breaking is True
+        assert commit.scope is None
+
+    def test_rejects_free_form_titles(self) -> None:
+        assert parse_commit_message("added some stuff") is None
+        assert parse_commit_message("") is None
+
+    def test_accepts_headers_git_log_grouped_before(self) -> None:
+        for title, scope in [
+            ("feat(api,cli): x", "api,cli"),
+            ("feat(api, cli): x", "api, cli"),
+            ("feat:x", None),
+        ]:
+            assert parse_commit_message(title) == ConventionalCommit(
+                type="feat", description="x", scope=scope
+            )
+
+    def test_splits_body_and_footers(self) -> None:
+        commit = parse_commit_message(
+            "fix(api): handle timeouts\n\n"
+            "Retries once before giving up.\n\nKeeps the old limit.\n\n"
+            "Refs: #12\n"
+            "BREAKING CHANGE: the timeout is now\n  given in seconds\n"
+            "Closes #40\n"
+        )
+        assert commit is not None
+        assert commit.body == "Retries once before giving up.\n\nKeeps the old limit."
+        assert commit.footers == (
+            ("Refs", "#12"),
+            ("BREAKING CHANGE", "the timeout is now\ngiven in seconds"),
+            ("Closes", "#40"),
+        )
+        assert commit.breaking is True
+        assert commit.breaking_note == "the timeout is now\ngiven in seconds"
+        assert commit.footer("refs") == "#12"
+
+    def test_body_without_footers(self) -> None:
+        commit = parse_commit_message("docs: explain setup\n\nThe steps changed: see below.")
+        assert commit is not None
+        assert commit.body == "The steps changed: see below."
+        assert commit.footers == ()
+        assert commit.breaking is False
+
+    def test_prose_ending_in_a_colon_line_is_body(self) -> None:
+        message = "fix: x\n\nNote: the retry\nhappens only once."
+        commit = parse_commit_message(message)
+        assert commit is not None
+        assert commit.body == "Note: the retry\nhappens only once."
+        assert commit.footers == ()
+
+    def test_footers_without_body(self) -> None:
+        commit = parse_commit_message("feat: x\n\nBREAKING-CHANGE: config moved")
+        assert commit is not None
+        assert commit.body == ""
+        assert commit.breaking_note == "config moved"
+
+    def test_git_reverts(self) -> None:
+        sha = "0123456789abcdef" * 2 + "01234567"
+        commit = parse_commit_message(f'Revert "feat: add login"\n\nThis reverts commit {sha}.')
+        assert commit is not None
+        assert commit.type == "revert"
+        assert commit.description == "feat: add login"
+        assert commit.reverts == sha
+
+    def test_conventional_reverts(self) -> None:
+        commit = parse_commit_message("revert: let us never again\n\nThis reverts commit 676104e.")
+        assert commit is not None
+        assert commit.reverts == "676104e"
@@ -0,0 +1,84 @@
+"""Tests for the daemon, driven through the thin client."""
+
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from git_ai import client
+from git_ai.__version__ import __version__
+from git_ai.daemon import Daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="the daemon needs fork")
+
+
+@pytest.fixture(scope="module")
+def running_daemon(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Path]:
+    path = tmp_path_factory.mktemp("run") / "daemon.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-c", f"from git_ai.daemon import Daemon; Daemon({str(path)!r}).serve()"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 20
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield path
+    process.terminate()
+    process.wait(timeout=10)
+
+
+@pytest.fixture
+def daemon_socket(running_daemon: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("GIT_AI_DAEMON_SOCKET", str(running_daemon))
+    return running_daemon
+
+
+class TestDaemon:
+    def test_runs_commands_on_the_clients_terminal(
+        self, daemon_socket: Path, capfd: pytest.CaptureFixture[str]
+    ) -> None:
+        assert client.forward(["--version"]) == 0
+        assert __version__ in capfd.readouterr().out
+
+    def test_reports_the_command_exit_status(
+        self, daemon_socket: Path, capfd: pytest.CaptureFixture[str]
+    ) -> None:
+        assert client.forward(["no-such-command"]) == 2
+        assert "No such command" in capfd.readouterr().err
+
+    def test_runs_in_the_clients_directory(
+        self,
+        daemon_socket: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capfd: pytest.CaptureFixture[str],
+    ) -> None:
+        # The ceiling travels with the client's environment
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+        assert client.forward(["commit"]) == 1
+        assert "not a Git repository" in capfd.readouterr().out
+
+    def test_refuses_to_start_twice(self, daemon_socket: Path) -> None:
+        with pytest.raises(RuntimeError, match="already listening"):
+            Daemon(str(daemon_socket)).listen()
+
+    def test_refuses_a_directory_others_can_enter(self, tmp_path: Path) -> None:
+        tmp_path.chmod(0o755)
+        with pytest.raises(RuntimeError, match="mode 0700"):
+            Daemon(str(tmp_path / "daemon.sock")).listen()
+        assert not (tmp_path / "daemon.sock").exists()
+
+    def test_replaces_a_stale_socket(self, tmp_path: Path) -> None:
+        tmp_path.chmod(0o700)
+        path = tmp_path / "daemon.sock"
+        path.write_text("")
+        daemon = Daemon(str(path))
+        daemon.listen()
+        assert daemon._server is not None
+        daemon._server.close()
@@ -0,0 +1,119 @@
+"""Tests for per-file diff budgeting."""
+
+from git_ai.support.diff_budget import (
+    DiffBudget,
+    PerFileBudget,
+    _water_fill,
+    file_weight,
+    is_generated,
+)
+from git_ai.support.staged_snapshot import StagedFile, StagedSnapshot
+from git_ai.support.token_estimator import TokenEstimator
+
+ZERO = "0" * 40
+SHA = "b" * 40
+
+
+def make_snapshot(files: dict[str, int], budget: DiffBudget | None = None) -> StagedSnapshot:
+    """Build a snapshot where each file adds the given number of lines."""
+    raw = "".join(f":000000 100644 {ZERO} {SHA} A\0{path}\0" for path in files)
+    numstat = "".join(f"{count}\t0\t{path}\0" for path, count in files.items())
+    patch = "".join(
+        f"diff --git a/{path} b/{path}\n@@ -0,0 +1,{count} @@ def {path}\n"
+        + "".join(f"+{path} line {i}\n" for i in range(count))
+        for path, count in files.items()
+    )
+    return StagedSnapshot.from_diff_output(raw + numstat + "\0" + patch, budget)
+
+
+class TestGeneratedDetection:
+    def test_detects_generated_files(self) -> None:
+        assert is_generated("uv.lock") is True
+        assert is_generated("web/package-lock.json") is True
+        assert is_generated("web/dist/app.js") is True
+        assert is_generated("static/app.min.js") is True
+
+    def test_source_files_are_not_generated(self) -> None:
+        assert is_generated("src/git_ai/cli.py") is False
+        assert is_generated("src/distance.py") is False
+
+    def test_source_outweighs_generated(self) -> None:
+        source = StagedFile(path="src/app.py", status="M", additions=100)
+        generated = StagedFile(path="dist/app.js", status="M", additions=100)
+        assert file_weight(source) > file_weight(generated)
+
+    def test_binary_files_have_no_weight(self) -> None:
+        assert file_weight(StagedFile(path="logo.png", status="M", binary=True)) == 0.0
+
+
+class TestWaterFill:
+    def test_caps_small_items_and_redistributes(self) -> None:
+        assert _water_fill(100, [1.0, 1.0], [10, 1000]) == [10, 90]
+
+    def test_splits_in_proportion_to_weights(self) -> None:
+        assert _water_fill(90, [2.0, 1.0], [1000, 1000]) == [60, 30]
+
+    def test_ignores_zero_weight_items(self) -> None:
+        assert _water_fill(50, [0.0, 1.0], [100, 100]) == [0, 50]
+
+
+class TestDiffBudget:
+    def test_small_diff_is_kept_verbatim(self) -> None:
+        snapshot = make_snapshot({"a.py": 3, "b.py": 2})
+        budgeted = DiffBudget(max_size=10_000).apply(snapshot)
+        assert budgeted.truncated is False
+        assert budgeted.text == snapshot.patch
+
+    def test_large_file_does_not_starve_the_others(self) -> None:
+        files = {"a_big.py": 2000} | {f"small_{i}.py": 3 for i in range(5)}
+        budget = DiffBudget(max_size=1500)
+        snapshot = make_snapshot(files)
+        budgeted = budget.apply(snapshot)
+
+        assert budgeted.truncated is True
+        assert len(budgeted.text) <= 1500
+        for i in range(5):
+            assert f"+small_{i}.py line 2" in budgeted.text
+        assert "@@ -0,0 +1,2000 @@ def a_big.py" in budgeted.text
+        assert "+a_big.py line 0" in budgeted.text
+        assert "changed lines omitted ...]" in budgeted.text
+
+    def test_every_file_keeps_its_header_and_hunks(self) -> None:
+        snapshot = make_snapshot({f"file_{i}.txt": 50 for i in range(10)})
+        budgeted = DiffBudget(max_size=1200).apply(snapshot)
+        for i in range(10):
+            assert f"diff --git a/file_{i}.txt b/file_{i}.txt" in budgeted.text
+            assert f"@@ -0,0 +1,50 @@ def file_{i}.txt" in budgeted.text
+
+    def test_generated_files_get_less_budget(self) -> None:
+        snapshot = make_snapshot({"dist/bundle.js": 200, "src/app.py": 200})
+        text = DiffBudget(max_size=2000).apply(snapshot).text
+        assert text.count("+src/app.py line") > 5 * text.count("+dist/bundle.js line")
+
+    def test_falls_back_to_headers_when_they_do_not_fit(self) -> None:
+        snapshot = make_snapshot({f"file_{i}.py": 1 for i in range(50)})
+        budgeted = DiffBudget(max_size=300).apply(snapshot)
+        assert budgeted.truncated is True
+        assert budgeted.omitted_files > 0
+        assert "more files omitted ...]" in budgeted.text
+
+    def test_retention_limits_favor_high_signal_files(self) -> None:
+        snapshot = make_snapshot({"src/app.py": 400, "uv.lock": 400})
+        limits = DiffBudget(max_size=1000).retention_limits(snapshot.files)
+        assert limits[0] > limits[1]
+
+    def test_per_file_budget_keeps_a_whole_budget_of_every_file(self) -> None:
+        files = {f"src/file_{i:02}.py": 200 for i in range(20)}
+        shared = make_snapshot(files, DiffBudget(max_size=1000))
+        per_file = make_snapshot(files, PerFileBudget(max_size=1000))
+        # A shared budget splits its room; each file is read up to a whole budget of its own
+        assert max(p.body_size for p in shared.patches) < 200
+        assert all(900 < p.body_size <= 1000 for p in per_file.patches)
+
+    def test_measures_with_a_token_estimator(self) -> None:
+        estimator = TokenEstimator("openai")
+        snapshot = make_snapshot({"src/app.py": 300, "src/util.py": 300})
+        budgeted = DiffBudget(max_size=500, measure=estimator.units).apply(snapshot)
+        assert budgeted.truncated is True
+        assert estimator.units(budgeted.text) <= 500
+        assert len(budgeted.text) > 500
@@ -0,0 +1,240 @@
+"""Tests for the content-aware diff reducers."""
+
+import json
+from collections.abc import Iterable
+
+import pytest
+
+from git_ai.config import DiffConfig, GitAiConfig
+from git_ai.support.diff_budget import DiffBudget
+from git_ai.support.diff_reducers import ReducerPipeline
+from git_ai.support.staged_snapshot import StagedSnapshot
+
+ZERO = "0" * 40
+
+
+class FakeBlobSource:
+    """Serves blob contents from memory and records what was requested."""
+
+    def __init__(self, blobs: dict[str, bytes]) -> None:
+        self.blobs = blobs
+        self.requests: list[list[str]] = []
+
+    def read_blobs(self, shas: Iterable[str]) -> dict[str, bytes]:
+        self.requests.append(list(shas))
+        return {sha: self.blobs[sha] for sha in self.requests[-1] if sha in self.blobs}
+
+    def get_blob_sizes(self, shas: Iterable[str]) -> dict[str, int]:
+        self.requests.append(list(shas))
+        return {sha: len(self.blobs[sha]) for sha in self.requests[-1] if sha in self.blobs}
+
+
+def make_snapshot(*files: tuple[str, str, str, str]) -> StagedSnapshot:
+    """Build a snapshot from (path, status, old_blob, new_blob) with a 3-line patch each."""
+    raw = "".join(
+        f":100644 100644 {old} {new} {status}\0{path}\0" for path, status, old, new in files
+    )
+    numstat = "".join(f"2\t1\t{path}\0" for path, *_ in files)
+    patch = "".join(
+        f"diff --git a/{path} b/{path}\nindex 1..2 100644\n--- a/{path}\n+++ b/{path}\n"
+        "@@ -1 +1,2 @@\n-old line\n+new line\n+another line\n"
+        for path, *_ in files
+    )
+    return StagedSnapshot.from_diff_output(raw + numstat + "\0" + patch)
+
+
+def reduce(snapshot: StagedSnapshot, source: FakeBlobSource, **diff: object) -> str:
+    config = GitAiConfig(diff=DiffConfig(**diff))  # type: ignore[arg-type]
+    return ReducerPipeline.from_config(config).apply(snapshot, source).patch
+
+
+def uv_lock(**packages: str) -> bytes:
+    return "".join(
+        f'[[package]]\nname = "{name}"\nversion = "{version}"\n\n'
+        for name, version in packages.items()
+    ).encode()
+
+
+def notebook(*sources: str) -> bytes:
+    cells = [
+        {"cell_type": "code", "source": source, "outputs": [{"text": "x" * 5000}]}
+        for source in sources
+    ]
+    return json.dumps({"cells": cells, "nbformat": 4}).encode()
+
+
+class TestLockfileReducer:
+    def test_summarizes_package_changes(self) -> None:
+        source = FakeBlobSource(
+            {
+                "a" * 40: uv_lock(requests="2.31.0", idna="3.6", old="1.0"),
+                "b" * 40: uv_lock(requests="2.32.3", idna="3.6", new="0.1"),
+            }
+        )
+        text = reduce(make_snapshot(("uv.lock", "M", "a" * 40, "b" * 40)), source)
+        assert "uv.lock: 1 package bumped, 1 added, 1 removed" in text
+        assert "  bumped requests 2.31.0 -> 2.32.3" in text
+        assert "  added new 0.1" in text
+        assert "+new line" not in text
+        assert "index 1..2" not in text
+
+    def test_parses_package_lock_json(self) -> None:
+        def lock(version: str) -> bytes:
+            packages = {"": {"name": "app"}, "node_modules/@scope/pkg": {"version": version}}
+            return json.dumps({"packages": packages}).encode()
+
+        source = FakeBlobSource({"a" * 40: lock("1.0.0"), "b" * 40: lock("1.1.0")})
+        text = reduce(make_snapshot(("web/package-lock.json", "M", "a" * 40, "b" * 40)), source)
+        assert "bumped @scope/pkg 1.0.0 -> 1.1.0" in text
+
+    def test_parses_yarn_lock(self) -> None:
+        def lock(version: str) -> bytes:
+            return f'"@babel/core@^7.0.0", "@babel/core@^7.1":\n  version "{version}"\n'.encode()
+
+        source = FakeBlobSource({"a" * 40: lock("7.1.0"), "b" * 40: lock("7.2.0")})
+        text = reduce(make_snapshot(("yarn.lock", "M", "a" * 40, "b" * 40)), source)
+        assert "bumped @babel/core 7.1.0 -> 7.2.0" in text
+
+    def test_lists_a_limited_number_of_packages(self) -> None:
+        new = uv_lock(**{f"pkg{i}": "1.0" for i in range(15)})
+        source = FakeBlobSource({"b" * 40: new})
+        text = reduce(make_snapshot(("uv.lock", "A", ZERO, "b" * 40)), source)
+        assert "uv.lock: 15 packages added" in text
+        assert "  ... and 5 more" in text
+
+    def test_keeps_the_diff_when_the_lockfile_cannot_be_parsed(self) -> None:
+        source = FakeBlobSource({"a" * 40: b"not [toml", "b" * 40: b"still not"})
+        text = reduce(make_snapshot(("uv.lock", "M", "a" * 40, "b" * 40)), source)
+        assert "+new line" in text
+
+    def test_custom_rules_route_files_to_a_reducer(self) -> None:
+        source = FakeBlobSource({"a" * 40: uv_lock(x="1"), "b" * 40: uv_lock(x="2")})
+        snapshot = make_snapshot(("deps/requirements.lock", "M", "a" * 40, "b" * 40))
+        text = reduce(snapshot, source, rules={"lockfile": ["deps/*.lock"]})
+        assert "bumped x 1 -> 2" in text
+
+
+class TestNotebookReducer:
+    def test_diffs_cell_sources_without_outputs(self) -> None:
+        source = FakeBlobSource(
+            {"a" * 40: notebook("x = 1", "print(x)"), "b" * 40: notebook("x = 2", "print(x)", "y")}
+        )
+        text = reduce(make_snapshot(("analysis.ipynb", "M", "a" * 40, "b" * 40)), source)
+        assert "notebook: 1 cell edited, 1 added, outputs stripped" in text
+        assert "-x = 1\n+x = 2" in text
+        assert "xxxxx" not in text
+
+    def test_reports_output_only_changes(self) -> None:
+        source = FakeBlobSource({"a" * 40: notebook("x = 1"), "b" * 40: notebook("x = 1")})
+        text = reduce(make_snapshot(("analysis.ipynb", "M", "a" * 40, "b" * 40)), source)
+        assert "notebook: only outputs or metadata changed, outputs stripped" in text
+
+
+class TestAssetReducers:
+    def test_summarizes_binary_svg_and_minified_files_by_size(self) -> None:
+        source = FakeBlobSource({"a" * 40: b"x" * 2048, "b" * 40: b"x" * 3072, "c" * 40: b"<svg/>"})
+        snapshot = make_snapshot(
+            ("static/app.min.js", "M", "a" * 40, "b" * 40),
+            ("icon.svg", "A", ZERO, "c" * 40),
+        )
+        text = reduce(snapshot, source)
+        assert "minified: static/app.min.js rebuilt (2.0 KB -> 3.0 KB)" in text
+        assert "svg: icon.svg added (6 B)" in text
+        # Size-only reducers never read blob contents
+        assert source.requests == [["a" * 40, "b" * 40, ZERO, "c" * 40]]
+
+    def test_detects_minified_content_by_line_length(self) -> None:
+        output = (
+            f":100644 100644 {'a' * 40} {'b' * 40} M\0bundle.js\0"
+            "1\t1\tbundle.js\0\0"
+            f"diff --git a/bundle.js b/bundle.js\n@@ -1 +1 @@\n-{'a;' * 600}\n+{'b;' * 600}\n"
+        )
+        text = reduce(StagedSnapshot.from_diff_output(output), FakeBlobSource({}))
+        assert "minified: bundle.js rebuilt" in text
+
+    def test_detects_minified_content_dropped_by_the_budget(self) -> None:
+        output = (
+            f":100644 100644 {'a' * 40} {'b' * 40} M\0bundle.js\0"
+            "1\t1\tbundle.js\0\0"
+            f"diff --git a/bundle.js b/bundle.js\n@@ -1 +1 @@\n-{'a;' * 600}\n+{'b;' * 600}\n"
+        )
+        snapshot = StagedSnapshot.from_diff_output(output, DiffBudget(max_size=100))
+        assert snapshot.patches[0].hunks[0].lines == []
+        assert "minified: bundle.js rebuilt" in reduce(snapshot, FakeBlobSource({}))
+
+
+class TestPythonReducer:
+    SOURCES = {
+        "a" * 40: b"def run(self, *args):\n    return args\n",
+        "b" * 40: b"def run(self, *args, check=False):\n    return args\n",
+    }
+
+    def test_is_off_by_default(self) -> None:
+        snapshot = make_snapshot(("src/app.py", "M", "a" * 40, "b" * 40))
+        assert "python structure" not in reduce(snapshot, FakeBlobSource(self.SOURCES))
+
+    def test_adds_the_summary_alongside_the_hunks(self) -> None:
+        snapshot = make_snapshot(("src/app.py", "M", "a" * 40, "b" * 40))
+        text = reduce(snapshot, FakeBlobSource(self.SOURCES), python_summary="alongside")
+        assert (
+            "python structure:\n"
+            "  changed signature of `run`: (self, *args) -> (self, *args, check=False)"
+        ) in text
+        assert "+new line" in text
+
+    def test_replaces_the_hunks(self) -> None:
+        snapshot = make_snapshot(("src/app.py", "M", "a" * 40, "b" * 40))
+        text = reduce(snapshot, FakeBlobSource(self.SOURCES), python_summary="replace")
+        assert "changed signature of `run`" in text
+        assert "+new line" not in text
+
+    def test_keeps_hunks_when_the_source_does_not_parse(self) -> None:
+        source = FakeBlobSource({"a" * 40: b"x = 1\n", "b" * 40: b"def (:\n"})
+        snapshot = make_snapshot(("src/app.py", "M", "a" * 40, "b" * 40))
+        text = reduce(snapshot, source, python_summary="replace")
+        assert "python structure" not in text
+        assert "+new line" in text
+
+    def test_rejects_unknown_modes(self) -> None:
+        with pytest.raises(ValueError, match="Invalid python_summary: 'always'"):
+            ReducerPipeline.from_config(GitAiConfig(diff=DiffConfig(python_summary="always")))
+
+
+class TestRenameReducer:
+    def test_collapses_rename_headers_and_keeps_residual_hunks(self) -> None:
+        output = (
+            f":100644 100644 {'a' * 40} {'b' * 40} R097\0pkg/old.py\0lib/new.py\0"
+            "1\t1\t\0pkg/old.py\0lib/new.py\0\0"
+            "diff --git a/pkg/old.py b/lib/new.py\nsimilarity index 97%\n"
+            "rename from pkg/old.py\nrename to lib/new.py\nindex a..b 100644\n"
+            "--- a/pkg/old.py\n+++ b/lib/new.py\n@@ -1 +1 @@\n-import pkg\n+import lib\n"
+        )
+        source = FakeBlobSource({})
+        text = reduce(StagedSnapshot.from_diff_output(output), source)
+        assert text == (
+            "diff --git a/pkg/old.py b/lib/new.py\n"
+            "renamed pkg/old.py -> lib/new.py (97% similar)\n"
+            "@@ -1 +1 @@\n-import pkg\n+import lib"
+        )
+        assert source.requests == []
+
+
+class TestReducerPipeline:
+    def test_leaves_source_files_untouched_without_reading_blobs(self) -> None:
+        source = FakeBlobSource({})
+        snapshot = make_snapshot(("src/app.py", "M", "a" * 40, "b" * 40))
+        assert reduce(snapshot, source) == snapshot.patch
+        assert source.requests == []
+
+    def test_keep_patterns_bypass_reducers(self) -> None:
+        snapshot = make_snapshot(("uv.lock", "M", "a" * 40, "b" * 40))
+        assert "+new line" in reduce(snapshot, FakeBlobSource({}), keep=["uv.lock"])
+
+    def test_disabled_reducers_do_not_run(self) -> None:
+        snapshot = make_snapshot(("icon.svg", "M", "a" * 40, "b" * 40))
+        assert "+new line" in reduce(snapshot, FakeBlobSource({}), reducers=["binary"])
+
+    def test_rejects_unknown_reducers(self) -> None:
+        config = GitAiConfig(diff=DiffConfig(reducers=["lockfile", "images"]))
+        with pytest.raises(ValueError, match="Unknown diff reducer: 'images'"):
+            ReducerPipeline.from_config(config)
@@ -0,0 +1,163 @@
+"""Tests for summarizing a huge staged diff file by file."""
+
+import asyncio
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from git_ai.agents.prompts import PromptParts
+from git_ai.config import GitAiConfig
+from git_ai.services.ai_service import AiService
+from git_ai.services.diff_summarizer import SUMMARIES_HEADER, DiffSummarizer, FileDiff
+from git_ai.support.response_cache import ResponseCache
+from git_ai.support.staged_snapshot import StagedFile, StagedSnapshot
+
+ZERO = "0" * 40
+
+
+def staged_diff(files: dict[str, tuple[str, int]]) -> StagedSnapshot:
+    """A snapshot adding each file with `lines` lines, its blob named after `blob`."""
+    raw = "".join(
+        f":000000 100644 {ZERO} {blob * 40} A\0{path}\0" for path, (blob, _) in files.items()
+    )
+    numstat = "".join(f"{lines}\t0\t{path}\0" for path, (_, lines) in files.items())
+    patch = "".join(
+        f"diff --git a/{path} b/{path}\nnew file mode 100644\n--- /dev/null\n+++ b/{path}\n"
+        f"@@ -0,0 +1,{lines} @@\n" + "".join(f"+line {i} of {path}\n" for i in range(lines))
+        for path, (_, lines) in files.items()
+    )
+    return StagedSnapshot.from_diff_output(raw + numstat + "\0" + patch)
+
+
+class SummaryAiService(AiService):
+    """Summarizes every file of a part by its path, tracking calls and concurrency."""
+
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__(GitAiConfig())
+        self.fail = fail
+        self.parts: list[list[str]] = []
+        self.running = 0
+        self.peak = 0
+
+    def _call(self, prompt: PromptParts) -> str:
+        raise AssertionError("summaries are generated asynchronously")
+
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        paths = re.findall(r"^diff --git a/\S+ b/(\S+)$", prompt.suffix, flags=re.MULTILINE)
+        self.parts.append(paths)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.running -= 1
+        if self.fail:
+            raise RuntimeError("overloaded")
+        return json.dumps({"files": [{"path": p, "summary": f"Adds {p}."} for p in paths]})
+
+
+def make_cache(tmp_path: Path) -> ResponseCache:
+    return ResponseCache(tmp_path / "cache", max_bytes=1024 * 1024, max_age_seconds=86400)
+
+
+class TestDiffSummarizer:
+    def test_lists_every_file_with_its_summary(self) -> None:
+        ai = SummaryAiService()
+        snapshot = staged_diff({"b.py": ("b", 2), "a.py": ("a", 3)})
+
+        text = DiffSummarizer(ai, max_size=10_000).summarize(snapshot)
+
+        assert text.startswith(SUMMARIES_HEADER)
+        assert snapshot.stat in text
+        assert "- b.py (A, +2 -0): Adds b.py." in text
+        assert "- a.py (A, +3 -0): Adds a.py." in text
+        assert text.index("- b.py") < text.index("- a.py")
+        assert ai.parts == [["a.py", "b.py"]]
+
+    def test_packs_neighbours_in_path_order(self) -> None:
+        summarizer = DiffSummarizer(SummaryAiService(), max_size=25)
+        diffs = [
+            FileDiff(StagedFile(path=path, status="A"), "x" * 10)
+            for path in ("src/b.py", "docs/a.md", "src/a.py")
+        ]
+
+        parts = summarizer.pack(diffs)
+
+        assert [[d.file.path for d in part] for part in parts] == [
+            ["docs/a.md", "src/a.py"],
+            ["src/b.py"],
+        ]
+
+    def test_cuts_a_file_larger_than_one_call(self) -> None:
+        ai = SummaryAiService()
+        snapshot = staged_diff({"big.py": ("a", 500)})
+
+        summarizer = DiffSummarizer(ai, max_size=2_000)
+        text = summarizer.summarize(snapshot)
+
+        assert "- big.py (A, +500 -0): Adds big.py." in text
+        fitted = summarizer._fit(snapshot.files[0], snapshot.patches[0])
+        patch, marker = fitted.text.rsplit("\n", 1)
+        assert len(patch) <= 2_000
+        assert marker.endswith("changed lines omitted ...]")
+
+    def test_only_changed_files_are_summarized_again(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        first = staged_diff({"a.py": ("a", 2), "b.py": ("b", 2), "c.py": ("c", 2)})
+        DiffSummarizer(SummaryAiService(), max_size=10_000, cache=cache).summarize(first)
+
+        # The user fixes b.py and stages it again
+        ai = SummaryAiService()
+        again = staged_diff({"a.py": ("a", 2), "b.py": ("d", 2), "c.py": ("c", 2)})
+        text = DiffSummarizer(ai, max_size=10_000, cache=cache).summarize(again)
+
+        assert ai.parts == [["b.py"]]
+        assert "- a.py (A, +2 -0): Adds a.py." in text
+        assert "- c.py (A, +2 -0): Adds c.py." in text
+
+    def test_settings_are_part_of_the_cache_key(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        snapshot = staged_diff({"a.py": ("a", 2)})
+        DiffSummarizer(SummaryAiService(), 10_000, cache=cache, fingerprint="1").summarize(snapshot)
+
+        ai = SummaryAiService()
+        DiffSummarizer(ai, 10_000, cache=cache, fingerprint="2").summarize(snapshot)
+
+        assert ai.parts == [["a.py"]]
+
+    def test_bounds_concurrency_and_reports_progress(self) -> None:
+        ai = SummaryAiService()
+        snapshot = staged_diff({f"f{i}.py": ("a", 20) for i in range(8)})
+        progress: list[tuple[int, int]] = []
+
+        DiffSummarizer(ai, max_size=300, concurrency=2).summarize(
+            snapshot, on_progress=lambda done, total: progress.append((done, total))
+        )
+
+        assert len(ai.parts) == 8
+        assert ai.peak == 2
+        assert progress[0] == (0, 8)
+        assert progress[-1] == (8, 8)
+
+    def test_missing_summary_is_marked(self) -> None:
+        ai = SummaryAiService()
+        snapshot = staged_diff({"a.py": ("a", 2)})
+
+        async def no_files(diff: str, fresh: bool = False) -> dict:
+            return {"files": [{"path": "other.py", "summary": "Unrelated."}, "junk"]}
+
+        ai.agenerate_file_summaries = no_files  # type: ignore[method-assign]
+        text = DiffSummarizer(ai, max_size=10_000).summarize(snapshot)
+
+        assert "- a.py (A, +2 -0): No summary available." in text
+
+    def test_failed_part_fails_the_summary(self) -> None:
+        snapshot = staged_diff({"a.py": ("a", 2)})
+        with pytest.raises(RuntimeError, match="overloaded"):
+            DiffSummarizer(SummaryAiService(fail=True), max_size=10_000).summarize(snapshot)
+
+    def test_needs_a_positive_concurrency(self) -> None:
+        with pytest.raises(ValueError):
+            DiffSummarizer(SummaryAiService(), max_size=100, concurrency=0)
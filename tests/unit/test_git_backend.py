@@ -0,0 +1,95 @@
+"""Tests for the pluggable Git backends."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from git_ai.services.git_backend import (
+    GitPythonBackend,
+    SubprocessGitBackend,
+    resolve_git_backend,
+)
+from git_ai.services.git_service import GitService
+
+
+class TestResolveGitBackend:
+    def test_auto_uses_subprocess(self, tmp_git_repo: Path) -> None:
+        backend = resolve_git_backend(str(tmp_git_repo))
+        assert isinstance(backend, SubprocessGitBackend)
+
+    def test_explicit_gitpython_inside_repository(self, tmp_git_repo: Path) -> None:
+        backend = resolve_git_backend(str(tmp_git_repo), "gitpython")
+        assert isinstance(backend, GitPythonBackend)
+        backend.close()
+
+    def test_gitpython_falls_back_to_subprocess_outside_repository(self, tmp_path: Path) -> None:
+        backend = resolve_git_backend(str(tmp_path), "gitpython")
+        assert isinstance(backend, SubprocessGitBackend)
+
+    def test_explicit_subprocess(self, tmp_git_repo: Path) -> None:
+        backend = resolve_git_backend(str(tmp_git_repo), "subprocess")
+        assert isinstance(backend, SubprocessGitBackend)
+
+    def test_raises_for_unknown_backend(self, tmp_git_repo: Path) -> None:
+        with pytest.raises(ValueError, match="Unknown git backend"):
+            resolve_git_backend(str(tmp_git_repo), "libgit3")
+
+    def test_git_service_accepts_backend_instance(self, tmp_git_repo: Path) -> None:
+        backend = SubprocessGitBackend(str(tmp_git_repo))
+        service = GitService(working_directory=str(tmp_git_repo), backend=backend)
+        assert service.backend is backend
+
+
+@pytest.mark.parametrize("name", ["gitpython", "subprocess"])
+class TestGitBackendParity:
+    def test_reads_config_values(self, tmp_git_repo: Path, name: str) -> None:
+        subprocess.run(
+            ["git", "config", "core.hooksPath", "custom-hooks"],
+            cwd=tmp_git_repo,
+            capture_output=True,
+        )
+        backend = resolve_git_backend(str(tmp_git_repo), name)
+        assert backend.get_config("core.hooksPath") == "custom-hooks"
+        assert backend.get_config("core.doesNotExist") is None
+        backend.close()
+
+    def test_config_names_ignore_case_like_git(self, tmp_git_repo: Path, name: str) -> None:
+        with open(tmp_git_repo / ".git" / "config", "a") as config:
+            config.write('[CORE]\n\thookspath = lower-hooks\n[remote "Origin"]\n\turl = x\n')
+        backend = resolve_git_backend(str(tmp_git_repo), name)
+        assert backend.get_config("core.hooksPath") == "lower-hooks"
+        assert backend.get_config("remote.Origin.URL") == "x"
+        # Subsection names are case-sensitive
+        assert backend.get_config("remote.origin.url") is None
+        backend.close()
+
+    def test_reads_subsection_config_values(self, tmp_git_repo: Path, name: str) -> None:
+        subprocess.run(
+            ["git", "remote", "add", "origin", "https://example.com/repo.git"],
+            cwd=tmp_git_repo,
+            capture_output=True,
+        )
+        backend = resolve_git_backend(str(tmp_git_repo), name)
+        assert backend.get_config("remote.origin.url") == "https://example.com/repo.git"
+        backend.close()
+
+    def test_resolves_git_dir(self, tmp_git_repo: Path, name: str) -> None:
+        backend = resolve_git_backend(str(tmp_git_repo), name)
+        git_dir = backend.get_git_dir()
+        assert git_dir is not None
+        assert Path(git_dir).resolve() == (tmp_git_repo / ".git").resolve()
+        backend.close()
+
+    def test_run_returns_completed_process(self, tmp_git_repo: Path, name: str) -> None:
+        backend = resolve_git_backend(str(tmp_git_repo), name)
+        result = backend.run(["log", "--format=%s", "-1"])
+        assert result.returncode == 0
+        assert result.stdout == "chore: initial commit\n"
+        backend.close()
+
+    def test_run_reports_failures_without_raising(self, tmp_git_repo: Path, name: str) -> None:
+        backend = resolve_git_backend(str(tmp_git_repo), name)
+        result = backend.run(["rev-parse", "does-not-exist"])
+        assert result.returncode != 0
+        backend.close()
@@ -6,6 +6,8 @@ from pathlib import Path
 import pytest
 
 from git_ai.services.git_service import GitService
+from git_ai.support.diff_budget import DiffBudget
+from git_ai.support.staged_snapshot import MoveDetection
 
 
 class TestGitService:
@@ -43,6 +45,82 @@ class TestGitService:
         subprocess.run(["git", "add", "file.txt"], cwd=tmp_git_repo, capture_output=True)
         assert git_service.has_staged_changes() is True
 
+    def test_snapshot_is_empty_when_nothing_staged(self, git_service: GitService) -> None:
+        assert git_service.get_staged_snapshot().is_empty is True
+
+    def test_snapshot_collects_staged_changes(
+        self, git_service: GitService, tmp_git_repo: Path
+    ) -> None:
+        (tmp_git_repo / "README.md").write_text("# Test\nmore\n")
+        (tmp_git_repo / "new_file.txt").write_text("hello world\n")
+        subprocess.run(["git", "add", "."], cwd=tmp_git_repo, capture_output=True)
+        snapshot = git_service.get_staged_snapshot()
+        assert [(f.path, f.status) for f in snapshot.files] == [
+            ("README.md", "M"),
+            ("new_file.txt", "A"),
+        ]
+        assert snapshot.files[1].additions == 1
+        assert len(snapshot.files[1].new_blob) == 40
+        assert "+hello world" in snapshot.patch
+        assert snapshot.patch.startswith("diff --git a/README.md b/README.md")
+        assert "2 files changed" in snapshot.stat
+
+    def test_snapshot_stops_git_once_budget_is_reached(
+        self, git_service: GitService, tmp_git_repo: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        (tmp_git_repo / "small.txt").write_text("small\n")
+        (tmp_git_repo / "zz_generated.txt").write_text("generated line\n" * 200_000)
+        subprocess.run(["git", "add", "."], cwd=tmp_git_repo, capture_output=True)
+
+        processes: list[subprocess.Popen[bytes]] = []
+        open_stream = git_service.backend.open_stream
+
+        def spy(args: list[str]) -> subprocess.Popen[bytes]:
+            processes.append(open_stream(args))
+            return processes[-1]
+
+        monkeypatch.setattr(git_service.backend, "open_stream", spy)
+        snapshot = git_service.get_staged_snapshot(budget=DiffBudget(max_size=1000))
+
+        assert snapshot.truncated is True
+        assert [f.path for f in snapshot.files] == ["small.txt", "zz_generated.txt"]
+        assert snapshot.patches[0].hunks[0].lines == ["+small"]
+        assert snapshot.patches[1].unread is True
+        assert processes[0].returncode is not None
+
+    def test_snapshot_detects_moves_with_threshold(
+        self, git_service: GitService, tmp_git_repo: Path
+    ) -> None:
+        content = "".join(f"line {i}\n" for i in range(100))
+        (tmp_git_repo / "module.py").write_text(content)
+        subprocess.run(["git", "add", "."], cwd=tmp_git_repo, capture_output=True)
+        subprocess.run(["git", "commit", "-m", "add module"], cwd=tmp_git_repo, capture_output=True)
+        (tmp_git_repo / "module.py").unlink()
+        (tmp_git_repo / "moved.py").write_text(content.replace("line 5\n", "line five\n"))
+        subprocess.run(["git", "add", "-A"], cwd=tmp_git_repo, capture_output=True)
+
+        moved = git_service.get_staged_snapshot(moves=MoveDetection(threshold=90))
+        assert [(f.status, f.old_path, f.path) for f in moved.files] == [
+            ("R", "module.py", "moved.py")
+        ]
+        assert moved.files[0].similarity == 98
+        assert moved.files[0].lines_changed == 2
+
+        strict = git_service.get_staged_snapshot(moves=MoveDetection(threshold=100))
+        assert [f.status for f in strict.files] == ["D", "A"]
+
+    def test_reads_staged_blobs_and_sizes(
+        self, git_service: GitService, tmp_git_repo: Path
+    ) -> None:
+        (tmp_git_repo / "README.md").write_text("# Changed\n")
+        subprocess.run(["git", "add", "."], cwd=tmp_git_repo, capture_output=True)
+        file = git_service.get_staged_snapshot().files[0]
+
+        blobs = git_service.read_blobs([file.old_blob, file.new_blob, "0" * 40, "f" * 40])
+        assert blobs == {file.old_blob: b"# Test\n", file.new_blob: b"# Changed\n"}
+        sizes = git_service.get_blob_sizes([file.new_blob, "f" * 40])
+        assert sizes == {file.new_blob: 10}
+
     def test_commit_with_message(self, git_service: GitService, tmp_git_repo: Path) -> None:
         (tmp_git_repo / "file.txt").write_text("content\n")
         subprocess.run(["git", "add", "file.txt"], cwd=tmp_git_repo, capture_output=True)
@@ -81,6 +159,42 @@ class TestGitService:
         assert "v1.0.0" in tags
         assert "v2.0.0" in tags
 
+    def test_returns_release_tags_in_version_order(
+        self, git_service: GitService, tmp_git_repo: Path
+    ) -> None:
+        def git(*args: str) -> str:
+            result = subprocess.run(["git", *args], cwd=tmp_git_repo, capture_output=True)
+            return result.stdout.decode().strip()
+
+        git("tag", "v1.0.0")
+        git("commit", "--allow-empty", "-m", "feat: two")
+        git("tag", "-a", "v10.0.0", "-m", "Ten")
+        git("tag", "v2.0.0")
+        git("tag", "tree-tag", git("rev-parse", "HEAD^{tree}"))
+
+        tags = git_service.get_release_tags()
+
+        assert [tag.name for tag in tags] == ["v1.0.0", "v2.0.0", "v10.0.0"]
+        assert tags[2].sha == git("rev-parse", "HEAD")
+        assert tags[0].sha == git("rev-parse", "HEAD~1")
+        assert len(tags[0].date) == 10
+
+    def test_iter_history_walks_every_revision_once(
+        self, git_service: GitService, tmp_git_repo: Path
+    ) -> None:
+        subprocess.run(["git", "tag", "v1.0.0"], cwd=tmp_git_repo, capture_output=True)
+        subprocess.run(
+            ["git", "commit", "--allow-empty", "-m", "feat: two"],
+            cwd=tmp_git_repo,
+            capture_output=True,
+        )
+
+        first, second = git_service.iter_history("v1.0.0", "HEAD")
+
+        assert first.subject == "feat: two"
+        assert first.parents == (second.hash,)
+        assert second.parents == ()
+
     def test_returns_first_commit_hash(self, git_service: GitService) -> None:
         first_hash = git_service.get_first_commit_hash()
         assert first_hash is not None
@@ -97,9 +211,32 @@ class TestGitService:
             cwd=tmp_git_repo,
             capture_output=True,
         )
-        commits = git_service.get_commits_between("v1.0.0", "HEAD")
+        commits = list(git_service.iter_commits("v1.0.0", "HEAD"))
         assert len(commits) == 1
-        assert commits[0]["message"] == "feat: new feature"
+        assert commits[0].subject == "feat: new feature"
+        assert len(commits[0].hash) == 40
+        assert commits[0].author_date > 0
+
+    def test_streams_bodies_and_trailers(self, git_service: GitService, tmp_git_repo: Path) -> None:
+        subprocess.run(["git", "tag", "v1.0.0"], cwd=tmp_git_repo, capture_output=True)
+        for message in (
+            "feat: first | with a pipe",
+            "fix(api): second\n\nExplain why.\n\nRefs: #12\nBREAKING-CHANGE: drops v1",
+        ):
+            subprocess.run(
+                ["git", "commit", "--allow-empty", "-m", message],
+                cwd=tmp_git_repo,
+                capture_output=True,
+            )
+        newest, oldest = git_service.iter_commits("v1.0.0", "HEAD")
+        assert oldest.subject == "feat: first | with a pipe"
+        assert oldest.body == ""
+        assert newest.subject == "fix(api): second"
+        assert newest.body.startswith("Explain why.")
+        assert newest.trailers == (("Refs", "#12"), ("BREAKING-CHANGE", "drops v1"))
+
+    def test_unknown_reference_yields_nothing(self, git_service: GitService) -> None:
+        assert list(git_service.iter_commits("no-such-tag", "HEAD")) == []
 
     def test_returns_empty_when_no_commits_between(self, git_service: GitService) -> None:
         subprocess.run(
@@ -107,8 +244,7 @@ class TestGitService:
             cwd=git_service.working_directory,
             capture_output=True,
         )
-        commits = git_service.get_commits_between("v1.0.0", "HEAD")
-        assert commits == []
+        assert list(git_service.iter_commits("v1.0.0", "HEAD")) == []
 
     def test_get_hooks_path(self, git_service: GitService, tmp_git_repo: Path) -> None:
         hooks_path = git_service.get_hooks_path()
@@ -119,3 +255,20 @@ class TestGitService:
         (tmp_git_repo / "untracked.txt").write_text("new file\n")
         git_service.add_all()
         assert git_service.has_staged_changes() is True
+
+    def test_get_index_path(self, git_service: GitService, tmp_git_repo: Path) -> None:
+        index_path = git_service.get_index_path()
+        assert index_path is not None
+        assert Path(index_path) == (tmp_git_repo / ".git" / "index").resolve()
+
+    def test_write_tree_follows_the_staged_content(
+        self, git_service: GitService, tmp_git_repo: Path
+    ) -> None:
+        before = git_service.write_tree()
+        assert before == git_service.write_tree()
+
+        (tmp_git_repo / "new_file.txt").write_text("hello world\n")
+        subprocess.run(["git", "add", "new_file.txt"], cwd=tmp_git_repo, capture_output=True)
+        after = git_service.write_tree()
+        assert len(after) == 40
+        assert after != before
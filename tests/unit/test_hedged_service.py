@@ -0,0 +1,201 @@
+"""Tests for hedging requests across a chain of providers."""
+
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from git_ai.agents.prompts import PromptParts
+from git_ai.config import GitAiConfig, HedgeConfig
+from git_ai.services.ai_service import AiService, UsageStats
+from git_ai.services.hedged_service import HedgedAiService
+from git_ai.support.latency_history import LatencyHistory
+
+
+def commit_response(description: str) -> str:
+    return (
+        f'{{"type": "fix", "scope": "", "description": "{description}", '
+        '"body": "", "is_breaking_change": false}'
+    )
+
+
+class SlowAiService(AiService):
+    """Answers with its own name after `delay` seconds, or fails with `error`."""
+
+    def __init__(self, provider: str, delay: float = 0.0, error: str | None = None) -> None:
+        super().__init__(GitAiConfig(hedge=HedgeConfig(initial_delay=0.1, min_delay=0.05)))
+        self.provider = provider
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    def _call(self, prompt: PromptParts) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        self.last_usage = UsageStats(input_tokens=10, output_tokens=5)
+        return commit_response(self.provider)
+
+    def _stream(self, prompt: PromptParts) -> Iterator[str]:
+        text = self._call(prompt)
+        for start in range(0, len(text), 10):
+            yield text[start : start + 10]
+
+    async def _acall(self, prompt: PromptParts, temperature: float | None = None) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise RuntimeError(self.error)
+        return commit_response(self.provider)
+
+
+class TestHedgedAiService:
+    def test_fast_primary_answers_alone(self) -> None:
+        primary, fallback = SlowAiService("primary"), SlowAiService("fallback")
+        service = HedgedAiService([primary, fallback])
+
+        result = service.generate_commit_message("diff")
+
+        assert result["description"] == "primary"
+        assert service.last_provider == "primary"
+        assert service.last_usage is not None
+        assert fallback.calls == 0
+
+    def test_slow_primary_is_hedged(self, tmp_path: Path) -> None:
+        primary, fallback = SlowAiService("primary", delay=0.5), SlowAiService("fallback")
+        history = LatencyHistory(tmp_path / "latency.json")
+        service = HedgedAiService([primary, fallback], history)
+
+        started = time.monotonic()
+        result = service.generate_commit_message("diff")
+
+        assert result["description"] == "fallback"
+        assert time.monotonic() - started < 0.5
+        assert service.last_provider == "fallback"
+        assert len(history.samples("fallback")) == 1
+        # The loser's latency is recorded once it answers as well
+        time.sleep(0.6)
+        [seconds] = history.samples("primary")
+        assert seconds >= 0.5
+
+    def test_failed_primary_falls_back_at_once(self) -> None:
+        primary = SlowAiService("primary", error="overloaded")
+        fallback = SlowAiService("fallback")
+        service = HedgedAiService([primary, fallback])
+        service.config.hedge.initial_delay = 60.0
+
+        assert service.generate_commit_message("diff")["description"] == "fallback"
+
+    def test_reports_every_failure(self) -> None:
+        service = HedgedAiService(
+            [SlowAiService("primary", error="overloaded"), SlowAiService("fallback", error="down")]
+        )
+        with pytest.raises(RuntimeError, match="primary: overloaded; fallback: down"):
+            service.generate_commit_message("diff")
+
+    def test_single_failure_is_raised_as_is(self) -> None:
+        service = HedgedAiService([SlowAiService("primary", error="overloaded")])
+        with pytest.raises(RuntimeError, match="^overloaded$"):
+            service.generate_commit_message("diff")
+
+    def test_deadline_follows_latency_history(self, tmp_path: Path) -> None:
+        history = LatencyHistory(tmp_path / "latency.json")
+        primary = SlowAiService("primary")
+        service = HedgedAiService([primary], history)
+        assert service.delay(primary) == 0.1
+
+        for seconds in (0.2, 0.3, 0.4, 0.5, 3.0):
+            history.record("primary", seconds)
+        assert service.delay(primary) == 3.0
+
+        history = LatencyHistory(tmp_path / "fast.json")
+        for _ in range(5):
+            history.record("primary", 0.01)
+        assert HedgedAiService([primary], history).delay(primary) == 0.05
+
+    def test_only_the_winner_updates_the_draft(self) -> None:
+        primary = SlowAiService("primary", delay=0.5)
+        fallback = SlowAiService("fallback")
+        service = HedgedAiService([primary, fallback])
+        updates: list[str] = []
+        lock = threading.Lock()
+
+        def on_update(fields: dict, partial: dict) -> None:
+            with lock:
+                updates.append(fields.get("description", ""))
+
+        result = service.generate_commit_message("diff", on_update=on_update)
+        assert result["description"] == "fallback"
+        # The primary answers after losing; none of its fields reach the draft
+        time.sleep(0.6)
+        assert "primary" not in updates
+
+    def test_streams_the_fallback_after_a_failure(self) -> None:
+        primary = SlowAiService("primary", error="overloaded")
+        fallback = SlowAiService("fallback")
+        service = HedgedAiService([primary, fallback])
+        updates: list[dict] = []
+
+        service.generate_commit_message("diff", on_update=lambda f, p: updates.append(dict(f)))
+        assert updates[-1]["description"] == "fallback"
+
+    def test_async_cancels_the_loser(self) -> None:
+        primary, fallback = SlowAiService("primary", delay=2.0), SlowAiService("fallback")
+        service = HedgedAiService([primary, fallback])
+
+        result = asyncio.run(service.agenerate_commit_message("diff"))
+
+        assert result["description"] == "fallback"
+        assert primary.cancelled is True
+
+    def test_async_records_only_completed_calls(self, tmp_path: Path) -> None:
+        primary, fallback = SlowAiService("primary", delay=2.0), SlowAiService("fallback")
+        history = LatencyHistory(tmp_path / "latency.json")
+        service = HedgedAiService([primary, fallback], history)
+
+        asyncio.run(service.agenerate_commit_message("diff"))
+
+        assert len(history.samples("fallback")) == 1
+        # The cancelled primary never answered, so its time is unknown
+        assert history.samples("primary") == []
+
+    def test_stalled_last_provider_times_out(self) -> None:
+        primary, fallback = SlowAiService("primary", delay=2.0), SlowAiService("fallback", 2.0)
+        service = HedgedAiService([primary, fallback])
+        service.config.timeout = 0.3
+
+        started = time.monotonic()
+        with pytest.raises(RuntimeError, match="No provider answered within 0.3 seconds"):
+            service.generate_commit_message("diff")
+        assert time.monotonic() - started < 1.0
+
+    def test_async_stalled_last_provider_times_out(self) -> None:
+        primary, fallback = SlowAiService("primary", delay=2.0), SlowAiService("fallback", 2.0)
+        service = HedgedAiService([primary, fallback])
+        service.config.timeout = 0.3
+
+        with pytest.raises(RuntimeError, match="No provider answered within 0.3 seconds"):
+            asyncio.run(service.agenerate_commit_message("diff"))
+        assert primary.cancelled and fallback.cancelled
+
+    def test_async_falls_back_on_failure(self) -> None:
+        primary = SlowAiService("primary", error="overloaded")
+        service = HedgedAiService([primary, SlowAiService("fallback")])
+
+        result = asyncio.run(service.agenerate_commit_message("diff", temperature=0.7))
+
+        assert result["description"] == "fallback"
+        assert service.last_provider == "fallback"
+
+    def test_needs_a_provider(self) -> None:
+        with pytest.raises(ValueError):
+            HedgedAiService([])
@@ -0,0 +1,65 @@
+"""Tests for the git index watcher."""
+
+import os
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from git_ai.support.index_watcher import IndexWatcher
+
+
+@pytest.fixture(params=["inotify", "polling"])
+def watcher(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[IndexWatcher]:
+    index = tmp_path / "index"
+    index.write_bytes(b"DIRC0")
+    use_inotify = request.param == "inotify"
+    watcher = IndexWatcher(index, debounce=0.3, poll_interval=0.05, use_inotify=use_inotify)
+    if use_inotify and not watcher.uses_inotify:
+        watcher.close()
+        pytest.skip("inotify is not available")
+    with watcher:
+        yield watcher
+
+
+def rewrite_index(index: Path, content: bytes) -> None:
+    """Replace the index the way git does, through a renamed lock file."""
+    lock = index.with_name("index.lock")
+    lock.write_bytes(content)
+    os.replace(lock, index)
+
+
+def rewrite_later(index: Path, times: int, gap: float) -> threading.Thread:
+    def run() -> None:
+        for i in range(times):
+            time.sleep(gap)
+            rewrite_index(index, b"DIRC" + bytes([i]) * (i + 2))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestIndexWatcher:
+    def test_reports_a_rewritten_index(self, watcher: IndexWatcher) -> None:
+        thread = rewrite_later(watcher.index_path, times=1, gap=0.1)
+        next(watcher.changes())
+        thread.join()
+
+    def test_collapses_a_burst_of_changes(self, watcher: IndexWatcher) -> None:
+        thread = rewrite_later(watcher.index_path, times=3, gap=0.1)
+        changes = watcher.changes()
+        started = time.monotonic()
+        next(changes)
+        thread.join()
+
+        # The change is only reported once the burst has settled
+        assert time.monotonic() - started >= 0.3 + 0.2
+        assert not watcher._wait(0.2)
+
+    def test_ignores_other_files(self, watcher: IndexWatcher) -> None:
+        (watcher.index_path.parent / "HEAD").write_text("ref: refs/heads/main\n")
+
+        assert not watcher._wait(0.2)
@@ -0,0 +1,71 @@
+"""Tests for the incremental JSON parser."""
+
+import json
+
+from git_ai.support.json_stream import JsonStreamParser
+
+RESPONSE = {
+    "type": "feat",
+    "scope": "api",
+    "description": 'add "café" endpoint 😀',
+    "body": "Line one.\nLine two with a \\ backslash.",
+    "is_breaking_change": False,
+}
+
+
+def feed_in_chunks(text: str, size: int) -> JsonStreamParser:
+    parser = JsonStreamParser()
+    for start in range(0, len(text), size):
+        parser.feed(text[start : start + size])
+    return parser
+
+
+class TestJsonStreamParser:
+    def test_parses_complete_object(self) -> None:
+        parser = feed_in_chunks(json.dumps(RESPONSE), 1000)
+        assert parser.fields == RESPONSE
+        assert parser.done
+
+    def test_any_chunking_gives_the_same_fields(self) -> None:
+        for text in (json.dumps(RESPONSE), json.dumps(RESPONSE, ensure_ascii=False, indent=2)):
+            for size in (1, 2, 3, 7):
+                assert feed_in_chunks(text, size).fields == RESPONSE
+
+    def test_fields_complete_before_the_object(self) -> None:
+        parser = JsonStreamParser()
+        parser.feed('{"type": "fix", "scope": "", "description": "handle empty')
+        assert parser.fields == {"type": "fix", "scope": ""}
+        assert parser.partial == {"description": "handle empty"}
+        parser.feed(' diff", "body": "')
+        assert parser.fields["description"] == "handle empty diff"
+        assert parser.partial == {"body": ""}
+        assert not parser.done
+
+    def test_partial_string_never_shows_a_cut_escape(self) -> None:
+        text = json.dumps(RESPONSE)
+        parser = JsonStreamParser()
+        for char in text:
+            parser.feed(char)
+            for key, value in parser.partial.items():
+                assert RESPONSE[key].startswith(value)
+
+    def test_reports_whether_anything_changed(self) -> None:
+        parser = JsonStreamParser()
+        assert parser.feed('{"ty') is False
+        assert parser.feed('pe": "fi') is True
+        assert parser.feed('x"') is True
+        assert parser.feed("  ") is False
+
+    def test_skips_code_fence(self) -> None:
+        parser = feed_in_chunks('```json\n{"type": "docs"}\n```', 4)
+        assert parser.fields == {"type": "docs"}
+
+    def test_parses_nested_values(self) -> None:
+        value = {"sections": [{"type": "feat", "entries": ["a ]} b", "c"]}], "n": -1.5e3}
+        assert feed_in_chunks(json.dumps(value), 3).fields == value
+
+    def test_stops_quietly_on_malformed_input(self) -> None:
+        parser = JsonStreamParser()
+        parser.feed('{"type": "fix", oops "description": "x"}')
+        assert parser.fields == {"type": "fix"}
+        assert parser.done
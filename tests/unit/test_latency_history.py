@@ -0,0 +1,42 @@
+"""Tests for the per-provider latency history."""
+
+from pathlib import Path
+
+from git_ai.support.latency_history import MIN_SAMPLES, LatencyHistory
+
+
+class TestLatencyHistory:
+    def test_percentile_of_recorded_samples(self, tmp_path: Path) -> None:
+        history = LatencyHistory.for_git_dir(tmp_path)
+        for seconds in range(1, 21):
+            history.record("anthropic", float(seconds))
+
+        assert history.percentile("anthropic", 0.95) == 19.0
+        assert history.percentile("anthropic", 0.5) == 10.0
+        assert (tmp_path / "git-ai" / "latency.json").exists()
+
+    def test_needs_enough_samples(self, tmp_path: Path) -> None:
+        history = LatencyHistory(tmp_path / "latency.json")
+        for _ in range(MIN_SAMPLES - 1):
+            history.record("openai", 1.0)
+
+        assert history.percentile("openai", 0.95) is None
+        assert history.percentile("anthropic", 0.95) is None
+
+    def test_keeps_a_rolling_window_per_provider(self, tmp_path: Path) -> None:
+        history = LatencyHistory(tmp_path / "latency.json", max_samples=3)
+        for seconds in (9.0, 1.0, 2.0, 3.0):
+            history.record("anthropic", seconds)
+        history.record("openai", 5.0)
+
+        assert history.samples("anthropic") == [1.0, 2.0, 3.0]
+        assert history.samples("openai") == [5.0]
+
+    def test_ignores_a_corrupt_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "latency.json"
+        path.write_text("not json")
+        history = LatencyHistory(path)
+
+        assert history.samples("anthropic") == []
+        history.record("anthropic", 1.5)
+        assert history.samples("anthropic") == [1.5]
@@ -0,0 +1,59 @@
+"""Tests for building changelog sections without the AI."""
+
+from git_ai.support.commit_log import CommitRecord
+from git_ai.support.conventional_commit import parse_commit_message
+from git_ai.support.local_changelog import local_entries, local_entry, local_sections
+
+
+def entry(message: str) -> str:
+    return local_entry(message.partition("\n")[0], parse_commit_message(message))
+
+
+class TestLocalEntry:
+    def test_strips_the_type_prefix(self) -> None:
+        assert entry("feat: add paging") == "Add paging"
+
+    def test_keeps_the_scope(self) -> None:
+        assert entry("fix(api): handle timeouts") == "(api) Handle timeouts"
+
+    def test_calls_out_breaking_changes(self) -> None:
+        assert entry("refactor!: drop Python 3.12") == "**BREAKING** Drop Python 3.12"
+        assert (
+            entry("feat: page lists\n\nBREAKING CHANGE: pass\n  `page=1` for the old list")
+            == "**BREAKING** Page lists (pass `page=1` for the old list)"
+        )
+
+    def test_lists_and_unspaced_headers_keep_their_type(self) -> None:
+        commits = [
+            CommitRecord("a" * 40, "feat(api,cli): add paging"),
+            CommitRecord("b" * 40, "feat(api, cli): add sorting"),
+            CommitRecord("c" * 40, "feat:add filters"),
+        ]
+        assert [ctype for ctype, _ in local_entries(commits)] == ["feat", "feat", "feat"]
+
+    def test_free_form_titles_are_kept(self) -> None:
+        assert entry("Update README") == "Update README"
+
+
+class TestLocalSections:
+    def test_builds_sections_in_type_order(self) -> None:
+        commits = [
+            CommitRecord("1" * 40, "Update README"),
+            CommitRecord("2" * 40, "fix: handle timeouts"),
+            CommitRecord("3" * 40, "feat: add paging"),
+            CommitRecord("4" * 40, "Merge branch 'main' into paging"),
+            CommitRecord("5" * 40, "feat: add paging."),
+            CommitRecord("6" * 40, "wip: try something"),
+        ]
+
+        sections = local_sections(local_entries(commits))
+
+        assert sections == [
+            {"type": "feat", "entries": ["Add paging"]},
+            {"type": "fix", "entries": ["Handle timeouts"]},
+            {"type": "wip", "entries": ["Try something"]},
+            {"type": "other", "entries": ["Update README"]},
+        ]
+
+    def test_empty_range(self) -> None:
+        assert local_sections([]) == []
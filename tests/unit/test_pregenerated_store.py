@@ -0,0 +1,46 @@
+"""Tests for the store of pregenerated commit messages."""
+
+import os
+from pathlib import Path
+
+from git_ai.support.pregenerated_store import PregeneratedStore
+
+RESPONSE = {"type": "feat", "description": "add login"}
+
+
+class TestPregeneratedStore:
+    def test_returns_what_was_stored_for_the_tree(self, tmp_path: Path) -> None:
+        store = PregeneratedStore.for_git_dir(tmp_path)
+        store.put("abc123", "settings", RESPONSE)
+
+        assert store.get("abc123", "settings") == RESPONSE
+        assert (tmp_path / "git-ai" / "pregenerated" / "abc123.json").exists()
+
+    def test_misses_for_another_tree(self, tmp_path: Path) -> None:
+        store = PregeneratedStore(tmp_path)
+        store.put("abc123", "settings", RESPONSE)
+
+        assert store.get("def456", "settings") is None
+
+    def test_misses_when_the_settings_changed(self, tmp_path: Path) -> None:
+        store = PregeneratedStore(tmp_path)
+        store.put("abc123", "settings", RESPONSE)
+
+        assert store.get("abc123", "other settings") is None
+
+    def test_ignores_corrupt_entries(self, tmp_path: Path) -> None:
+        (tmp_path / "abc123.json").write_text("{not json")
+
+        assert PregeneratedStore(tmp_path).get("abc123", "settings") is None
+
+    def test_keeps_only_the_newest_entries(self, tmp_path: Path) -> None:
+        store = PregeneratedStore(tmp_path, max_entries=2)
+        for age, tree in enumerate(["old", "middle"]):
+            store.put(tree, "settings", RESPONSE)
+            os.utime(tmp_path / f"{tree}.json", (age, age))
+        store.put("new", "settings", RESPONSE)
+
+        assert store.get("old", "settings") is None
+        assert store.get("middle", "settings") == RESPONSE
+        assert store.get("new", "settings") == RESPONSE
+        assert not list(tmp_path.glob("*.tmp"))
@@ -1,6 +1,13 @@
 """Tests for AI prompt builders."""
 
-from git_ai.agents.prompts import build_changelog_prompt, build_commit_prompt
+from git_ai.agents.prompts import (
+    build_changelog_entries_prompt_parts,
+    build_changelog_prompt,
+    build_changelog_prompt_parts,
+    build_commit_prompt,
+    build_commit_prompt_parts,
+    build_file_summary_prompt_parts,
+)
 
 
 class TestBuildCommitPrompt:
@@ -52,6 +59,24 @@ class TestBuildCommitPrompt:
         assert '"is_breaking_change"' in prompt
 
 
+class TestPromptParts:
+    def test_commit_prefix_does_not_depend_on_diff(self) -> None:
+        first = build_commit_prompt_parts("first diff", allowed_scopes=["api"])
+        second = build_commit_prompt_parts("second diff", allowed_scopes=["api"])
+        assert first.prefix == second.prefix
+        assert "first diff" in first.suffix
+
+    def test_commit_parts_join_into_full_prompt(self) -> None:
+        parts = build_commit_prompt_parts("diff", language="pt-BR")
+        assert parts.text == build_commit_prompt("diff", language="pt-BR")
+
+    def test_changelog_prefix_does_not_depend_on_commits(self) -> None:
+        parts = build_changelog_prompt_parts("- add feature")
+        assert "add feature" not in parts.prefix
+        assert parts.suffix == "- add feature"
+        assert parts.text == build_changelog_prompt("- add feature")
+
+
 class TestBuildChangelogPrompt:
     def test_contains_commits_prompt(self) -> None:
         prompt = build_changelog_prompt("## feat\n- add feature\n")
@@ -70,3 +95,28 @@ class TestBuildChangelogPrompt:
         prompt = build_changelog_prompt("commits")
         assert '"sections"' in prompt
         assert '"entries"' in prompt
+
+
+class TestBuildChangelogEntriesPrompt:
+    def test_commits_are_only_in_the_suffix(self) -> None:
+        parts = build_changelog_entries_prompt_parts("- [3f2a1b9c0d12] feat: add login")
+        assert "add login" not in parts.prefix
+        assert parts.suffix == "- [3f2a1b9c0d12] feat: add login"
+        assert '"entries"' in parts.prefix
+        assert '"id"' in parts.prefix
+
+    def test_other_language(self) -> None:
+        parts = build_changelog_entries_prompt_parts("commits", language="pt-BR")
+        assert "pt-BR" in parts.prefix
+
+
+class TestBuildFileSummaryPrompt:
+    def test_diff_is_only_in_the_suffix(self) -> None:
+        parts = build_file_summary_prompt_parts("diff --git a/x.py b/x.py")
+        assert "x.py" not in parts.prefix
+        assert "diff --git a/x.py b/x.py" in parts.suffix
+
+    def test_json_schema_in_prompt(self) -> None:
+        parts = build_file_summary_prompt_parts("diff")
+        assert '"files"' in parts.prefix
+        assert '"summary"' in parts.prefix
@@ -0,0 +1,93 @@
+"""Tests for AST-based Python change summaries."""
+
+from git_ai.support.python_summary import summarize_many, summarize_python_change
+
+OLD = """
+import os
+import sys
+
+MAX_RETRIES = 3
+
+
+class GitService:
+    def _run(self, *args):
+        return args
+
+    def commit(self, message):
+        return message
+
+
+class Legacy:
+    def old(self):
+        pass
+
+
+def helper():
+    return 1
+"""
+
+NEW = """
+import os
+import re
+
+MAX_RETRIES = 5
+
+
+class GitService:
+    def _run(self, *args, check=False):
+        return args
+
+    def commit(self, message):
+        return message.strip()
+
+    @property
+    def name(self):
+        return "git"
+
+
+def helper():
+    # comments and formatting are not structural
+    return (1)
+
+
+def resolve_ai_service(config) -> str:
+    return config
+"""
+
+
+class TestSummarizePythonChange:
+    def test_describes_structural_changes(self) -> None:
+        assert summarize_python_change(OLD, NEW) == [
+            "removed class `Legacy`",
+            "changed signature of `GitService._run`: (self, *args) -> (self, *args, check=False)",
+            "added method `GitService.name(self)`",
+            "added function `resolve_ai_service(config) -> str`",
+            "modified method `GitService.commit`",
+            "imports: added re; removed sys",
+            "changed constant `MAX_RETRIES`",
+        ]
+
+    def test_ignores_formatting_and_comments(self) -> None:
+        assert summarize_python_change("x = f( 1 )\n", "# note\nx = f(1)\n") == []
+
+    def test_collapses_members_of_new_classes(self) -> None:
+        changes = summarize_python_change("", "class A(B):\n    def f(self): ...\n")
+        assert changes == ["added class `A(B)` with 1 method"]
+
+    def test_returns_none_for_invalid_source(self) -> None:
+        assert summarize_python_change("x = 1\n", "def broken(:\n") is None
+
+    def test_limits_the_number_of_lines(self) -> None:
+        new = "".join(f"def f{i}(): pass\n" for i in range(40))
+        changes = summarize_python_change("", new)
+        assert changes is not None
+        assert len(changes) == 31
+        assert changes[-1] == "... and 10 more changes"
+
+
+class TestSummarizeMany:
+    def test_process_pool_matches_in_process_results(self) -> None:
+        pairs = [(OLD, NEW), ("", "def f(): pass\n"), ("x = 1\n", "def (:\n"), (NEW, OLD)]
+        expected = [summarize_python_change(old, new) for old, new in pairs]
+        assert summarize_many(pairs, processes=2) == expected
+        assert summarize_many(pairs[:1], processes=2) == expected[:1]
@@ -0,0 +1,52 @@
+"""Tests for splitting the history into tagged releases."""
+
+from git_ai.support.commit_log import CommitRecord
+from git_ai.support.release_ranges import ReleaseTag, parse_release_tags, split_releases
+
+
+def commit(sha: str, *parents: str) -> CommitRecord:
+    return CommitRecord(sha, f"feat: {sha}", parents=parents)
+
+
+class TestParseReleaseTags:
+    def test_peels_annotated_tags(self) -> None:
+        output = "v1.0.0 commit aaa   2024-01-02\nv2.0.0 tag ttt commit bbb 2024-03-04\n"
+        assert parse_release_tags(output) == [
+            ReleaseTag("v1.0.0", "aaa", "2024-01-02"),
+            ReleaseTag("v2.0.0", "bbb", "2024-03-04"),
+        ]
+
+    def test_skips_tags_of_other_objects(self) -> None:
+        output = "blob-tag blob fff   2024-01-02\ntree-tag tag ttt tree eee 2024-01-02\n"
+        assert parse_release_tags(output) == []
+
+
+class TestSplitReleases:
+    def test_each_commit_goes_to_the_first_tag_containing_it(self) -> None:
+        # a - b - d - e     v1 = b, v2 = e; c was branched from a and merged by d
+        #      \- c -/
+        history = [
+            commit("e", "d"),
+            commit("d", "b", "c"),
+            commit("c", "a"),
+            commit("b", "a"),
+            commit("a"),
+        ]
+        tags = [ReleaseTag("v1", "b", ""), ReleaseTag("v2", "e", "")]
+
+        releases = split_releases(tags, history, lambda record: record.hash)
+
+        assert releases == [["b", "a"], ["e", "d", "c"]]
+
+    def test_tag_on_a_released_commit_is_empty(self) -> None:
+        history = [commit("b", "a"), commit("a")]
+        tags = [ReleaseTag("v1", "b", ""), ReleaseTag("v1.0.1", "b", "")]
+
+        assert split_releases(tags, history, lambda record: record.hash) == [["b", "a"], []]
+
+    def test_commits_after_the_last_tag_are_left_out(self) -> None:
+        history = [commit("b", "a"), commit("a")]
+
+        tags = [ReleaseTag("v1", "a", "")]
+
+        assert split_releases(tags, history, lambda record: record.hash) == [["a"]]
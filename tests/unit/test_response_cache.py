@@ -0,0 +1,89 @@
+"""Tests for the on-disk AI response cache."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from git_ai.support.response_cache import ResponseCache
+
+DAY = 86400
+
+
+def make_cache(tmp_path: Path, max_bytes: int = 1024 * 1024) -> ResponseCache:
+    return ResponseCache(tmp_path / "cache", max_bytes=max_bytes, max_age_seconds=30 * DAY)
+
+
+def age(cache: ResponseCache, key: str, seconds: float) -> None:
+    path = cache._path(key)
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+class TestResponseCache:
+    def test_returns_stored_response(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        cache.put("abc123", '{"type": "fix"}')
+        assert cache.get("abc123") == '{"type": "fix"}'
+
+    def test_misses_unknown_key(self, tmp_path: Path) -> None:
+        assert make_cache(tmp_path).get("abc123") is None
+
+    def test_lives_under_the_git_directory(self, tmp_path: Path) -> None:
+        cache = ResponseCache.for_git_dir(tmp_path, max_bytes=1, max_age_seconds=1)
+        assert cache.directory == tmp_path / "git-ai" / "cache"
+
+    def test_key_depends_on_every_part(self) -> None:
+        key = ResponseCache.key("anthropic", "model", "1", "prompt")
+        assert key == ResponseCache.key("anthropic", "model", "1", "prompt")
+        assert key != ResponseCache.key("openai", "model", "1", "prompt")
+        assert key != ResponseCache.key("anthropic", "model", "2", "prompt")
+        assert ResponseCache.key("a b", "c") != ResponseCache.key("a", "b c")
+
+    def test_expires_entries_older_than_max_age(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        cache.put("abc123", "old")
+        age(cache, "abc123", 31 * DAY)
+        assert cache.get("abc123") is None
+
+    def test_ignores_corrupt_entries(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        cache.put("abc123", "value")
+        cache._path("abc123").write_text("{not json")
+        assert cache.get("abc123") is None
+
+    def test_evicts_least_recently_used_over_size(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path, max_bytes=350)
+        cache.put("aa1", "x" * 100)
+        cache.put("bb1", "y" * 100)
+        age(cache, "aa1", 20)
+        age(cache, "bb1", 10)
+        # Reading the older entry makes it the most recently used
+        assert cache.get("aa1") is not None
+        cache.put("cc1", "z" * 100)
+        assert cache.get("bb1") is None
+        assert cache.get("aa1") == "x" * 100
+        assert cache.get("cc1") == "z" * 100
+
+    def test_eviction_drops_expired_entries(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        cache.put("aa1", "old")
+        age(cache, "aa1", 31 * DAY)
+        cache.put("bb1", "new")
+        assert not cache._path("aa1").exists()
+
+    def test_concurrent_writes_leave_whole_entries(self, tmp_path: Path) -> None:
+        cache = make_cache(tmp_path)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: cache.put("abc123", chr(65 + i) * 1000), range(32)))
+        value = cache.get("abc123")
+        assert value is not None
+        assert len(set(value)) == 1
+        assert not list(cache.directory.glob("*/*.tmp"))
+
+    def test_unwritable_directory_is_ignored(self, tmp_path: Path) -> None:
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        cache = ResponseCache(blocker / "cache", max_bytes=1024, max_age_seconds=DAY)
+        cache.put("abc123", "value")
+        assert cache.get("abc123") is None
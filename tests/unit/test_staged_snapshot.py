@@ -0,0 +1,182 @@
+"""Tests for the StagedSnapshot value object."""
+
+from collections.abc import Iterator
+
+import pytest
+
+from git_ai.support.diff_budget import DiffBudget
+from git_ai.support.staged_snapshot import MoveDetection, StagedFile, StagedSnapshot
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+ZERO = "0" * 40
+
+DIFF_OUTPUT = (
+    f":100644 100644 {SHA_A} {SHA_B} M\0x.txt\0"
+    f":000000 100644 {ZERO} {SHA_B} A\0new.py\0"
+    f":100644 100644 {SHA_A} {SHA_B} R097\0old.txt\0sub/new name.txt\0"
+    f":100644 100644 {SHA_A} {SHA_B} M\0logo.png\0"
+    "2\t1\tx.txt\0"
+    "1\t0\tnew.py\0"
+    "1\t0\t\0old.txt\0sub/new name.txt\0"
+    "-\t-\tlogo.png\0"
+    "\0"
+    "diff --git a/x.txt b/x.txt\n--- a/x.txt\n+++ b/x.txt\n@@ -1 +1,2 @@\n-a\n+b\n+c\n"
+    "diff --git a/new.py b/new.py\nnew file mode 100644\n--- /dev/null\n+++ b/new.py\n"
+    "@@ -0,0 +1 @@\n+print('hi')\n"
+    "diff --git a/old.txt b/sub/new name.txt\nsimilarity index 97%\n"
+    "rename from old.txt\nrename to sub/new name.txt\n--- a/old.txt\n+++ b/sub/new name.txt\n"
+    "@@ -9,2 +9,3 @@ section\n 9\n 10\n+11\n"
+    "diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ\n"
+)
+
+
+class TestStagedSnapshot:
+    def test_empty_snapshot(self) -> None:
+        snapshot = StagedSnapshot.empty()
+        assert snapshot.is_empty is True
+        assert snapshot.patch == ""
+        assert snapshot.stat == ""
+
+    def test_parses_files_from_raw_and_numstat(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(DIFF_OUTPUT)
+        assert [f.path for f in snapshot.files] == [
+            "x.txt",
+            "new.py",
+            "sub/new name.txt",
+            "logo.png",
+        ]
+        assert snapshot.files[0] == StagedFile(
+            path="x.txt",
+            status="M",
+            additions=2,
+            deletions=1,
+            old_blob=SHA_A,
+            new_blob=SHA_B,
+        )
+        assert snapshot.files[1].status == "A"
+
+    def test_parses_renames(self) -> None:
+        renamed = StagedSnapshot.from_diff_output(DIFF_OUTPUT).files[2]
+        assert renamed.status == "R"
+        assert renamed.old_path == "old.txt"
+        assert renamed.display_path == "old.txt => sub/new name.txt"
+        assert renamed.additions == 1
+        assert renamed.similarity == 97
+
+    def test_parses_binary_files(self) -> None:
+        binary = StagedSnapshot.from_diff_output(DIFF_OUTPUT).files[3]
+        assert binary.binary is True
+        assert binary.lines_changed == 0
+
+    def test_splits_patch_per_file(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(DIFF_OUTPUT)
+        assert len(snapshot.patches) == 4
+        renamed = snapshot.patches[2]
+        assert renamed.header[0] == "diff --git a/old.txt b/sub/new name.txt"
+        assert renamed.header[-1] == "+++ b/sub/new name.txt"
+        assert renamed.hunks[0].header == "@@ -9,2 +9,3 @@ section"
+        assert renamed.hunks[0].lines == [" 9", " 10", "+11"]
+        assert snapshot.patches[3].hunks == []
+
+    def test_keeps_full_patch_without_budget(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(DIFF_OUTPUT)
+        assert snapshot.truncated is False
+        assert snapshot.patch.startswith("diff --git a/x.txt b/x.txt")
+        assert snapshot.patch.endswith("Binary files a/logo.png and b/logo.png differ")
+
+    def test_renders_stat(self) -> None:
+        stat = StagedSnapshot.from_diff_output(DIFF_OUTPUT).stat.split("\n")
+        assert stat[0] == " x.txt" + " " * 22 + " | 3 ++-"
+        assert stat[2] == " old.txt => sub/new name.txt | 1 +"
+        assert stat[3] == " logo.png" + " " * 19 + " | Bin"
+        assert stat[-1] == " 4 files changed, 4 insertions(+), 1 deletion(-)"
+
+    def test_scales_stat_graph(self) -> None:
+        snapshot = StagedSnapshot(files=(StagedFile(path="big.txt", status="A", additions=400),))
+        line = snapshot.stat.split("\n")[0]
+        assert line.count("+") == 40
+
+    def test_retains_body_lines_up_to_file_limit(self) -> None:
+        output = (
+            f":000000 100644 {ZERO} {SHA_A} A\0a.txt\0"
+            f":000000 100644 {ZERO} {SHA_B} A\0b.txt\0"
+            "100\t0\ta.txt\0"
+            "1\t0\tb.txt\0\0"
+            "diff --git a/a.txt b/a.txt\n@@ -0,0 +1,100 @@\n"
+            + "".join(f"+line {i:03}\n" for i in range(100))
+            + "diff --git a/b.txt b/b.txt\n@@ -0,0 +1 @@\n+only line\n"
+        )
+        snapshot = StagedSnapshot.from_diff_output(output, DiffBudget(max_size=200))
+        first, second = snapshot.patches
+        assert first.dropped is True
+        assert first.unread is False
+        assert 0 < len(first.hunks[0].lines) < 100
+        assert second.hunks[0].lines == ["+only line"]
+
+    def test_not_truncated_when_within_budget(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(DIFF_OUTPUT, DiffBudget(max_size=10_000))
+        assert snapshot.truncated is False
+
+    def test_reads_header_and_multibyte_text_split_across_chunks(self) -> None:
+        data = DIFF_OUTPUT.replace("+c", "+çã").encode()
+        chunks = [data[i : i + 3] for i in range(0, len(data), 3)]
+        snapshot = StagedSnapshot.from_stream(chunks)
+        assert len(snapshot.files) == 4
+        assert snapshot.patches[0].hunks[0].lines[-1] == "+çã"
+
+    def test_stops_consuming_stream_when_last_file_is_full(self) -> None:
+        consumed = []
+        header = f":000000 100644 {ZERO} {SHA_B} A\0big.txt\0" "100000\t0\tbig.txt\0\0"
+
+        def chunks() -> Iterator[bytes]:
+            yield (header + "diff --git a/big.txt b/big.txt\n@@ -0,0 +1,100000 @@\n").encode()
+            for i in range(1000):
+                consumed.append(i)
+                yield b"+" + b"x" * 1023 + b"\n"
+
+        snapshot = StagedSnapshot.from_stream(chunks(), DiffBudget(max_size=5000))
+        assert snapshot.truncated is True
+        assert snapshot.patches[0].unread is True
+        assert len(consumed) < 20
+
+    def test_does_not_buffer_a_line_too_long_for_the_file(self) -> None:
+        header = (
+            f":000000 100644 {ZERO} {SHA_A} A\0app.min.js\0"
+            f":000000 100644 {ZERO} {SHA_B} A\0b.txt\0"
+            "1\t0\tapp.min.js\0"
+            "1\t0\tb.txt\0\0"
+        )
+
+        def chunks() -> Iterator[bytes]:
+            yield (header + "diff --git a/app.min.js b/app.min.js\n@@ -0,0 +1 @@\n+").encode()
+            for _ in range(256):
+                yield b"x" * 65536
+            yield b"\n@@ -9 +9 @@\n+more\ndiff --git a/b.txt b/b.txt\n@@ -0,0 +1 @@\n+only line\n"
+
+        snapshot = StagedSnapshot.from_stream(chunks(), DiffBudget(max_size=100_000))
+        minified, second = snapshot.patches
+        assert minified.dropped is True
+        assert [hunk.header for hunk in minified.hunks] == ["@@ -0,0 +1 @@", "@@ -9 +9 @@"]
+        assert all(hunk.lines == [] for hunk in minified.hunks)
+        assert second.hunks[0].lines == ["+only line"]
+
+    def test_fills_unread_files_with_placeholders_at_ceiling(self) -> None:
+        snapshot = StagedSnapshot.from_diff_output(DIFF_OUTPUT, DiffBudget(max_size=20))
+        assert snapshot.patches[-1].unread is True
+        assert snapshot.patches[-1].header == ["diff --git a/logo.png b/logo.png"]
+
+
+class TestMoveDetection:
+    def test_detects_renames_and_copies_at_one_threshold(self) -> None:
+        assert MoveDetection(threshold=70).flags == ("-M70%", "-C70%")
+
+    def test_renames_only(self) -> None:
+        assert MoveDetection(threshold=90, copies=False).flags == ("-M90%",)
+
+    def test_zero_threshold_disables_detection(self) -> None:
+        assert MoveDetection(threshold=0).flags == ("--no-renames",)
+
+    def test_rejects_out_of_range_threshold(self) -> None:
+        with pytest.raises(ValueError, match="Invalid rename threshold"):
+            MoveDetection(threshold=150)
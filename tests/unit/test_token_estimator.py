@@ -0,0 +1,32 @@
+"""Tests for the offline token estimator."""
+
+from git_ai.support.token_estimator import TokenEstimator
+
+
+class TestTokenEstimator:
+    def test_empty_text_has_no_tokens(self) -> None:
+        assert TokenEstimator().count("") == 0
+
+    def test_cjk_is_denser_than_ascii_per_character(self) -> None:
+        estimator = TokenEstimator("openai")
+        english = "the quick brown fox jumps"
+        chinese = "敏捷的棕色狐狸跳过了懒狗和猫"
+        assert estimator.count(chinese) / len(chinese) > estimator.count(english) / len(english)
+
+    def test_minified_code_is_denser_than_prose(self) -> None:
+        estimator = TokenEstimator("openai")
+        prose = "this function returns the next value of the counter"
+        minified = "a=function(b){return b+1};c=[a(1),a(2)];"
+        assert estimator.count(minified) / len(minified) > estimator.count(prose) / len(prose)
+
+    def test_indentation_is_cheap(self) -> None:
+        assert TokenEstimator("openai").count(" " * 64) == 8
+
+    def test_anthropic_is_calibrated_above_openai(self) -> None:
+        text = "def resolve_ai_service(config: GitAiConfig) -> AiService:\n" * 20
+        assert TokenEstimator("anthropic").count(text) > TokenEstimator("openai").count(text)
+
+    def test_units_for_inverts_the_calibration(self) -> None:
+        estimator = TokenEstimator("anthropic")
+        assert estimator.units_for(115) == 100
+        assert estimator.units_for(-5) == 0